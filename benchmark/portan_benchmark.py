@@ -0,0 +1,269 @@
+#! python3
+#! /usr/bin/python3
+# -*- Mode: Python; coding: utf-8; indent-tabs-mode: t; c-basic-offset: 4; tab-width: 4 -*-
+#
+# portan_benchmark.py
+# Copyright (C) 2020 Benrick Smit <metatronicprogramming@hotmail.com>
+#
+# Portan is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Portan is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Benchmark Process
+#   1)  Load every saved webpage in the corpus directory, gzipped or not, without any network access
+#   2)  Analyze every webpage a number of times, recording every stage with a PortanProfiler
+#       - The fastest run of every stage gives its throughput in MB/s
+#       - One more run with tracemalloc tracing gives the peak memory of every stage
+#   3)  Time a fixed calibration workload of regexes, string operations, and dictionaries in the same process, so that
+#       the times can be compared with a baseline saved on a faster or slower machine
+#   4)  Compare the results with the stored baseline, scaled by how much slower or faster the calibration ran, and report
+#       every stage that became slower or uses more memory than the tolerance allows
+#   5)  Exit with 1 should there be any regressions, so that the benchmark can fail a build
+#   6)  Time importing portan and its first analyze() of the smallest webpage in fresh processes, which is what a script
+#       that analyzes a single webpage waits for. This is only displayed, as starting processes is too noisy to compare
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import subprocess
+import tracemalloc
+
+# Portan is found next to the benchmark directory, in source/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+import portan
+
+
+# The url the webpages of the corpus are analyzed as, so that partial hyperlinks can be completed
+string_corpus_url = "https://en.wikipedia.org/wiki/Web_crawler"
+
+
+# Load the webpages of the corpus as (name, bytes) pairs, sorted by name
+def load_corpus(string_corpus_directory):
+    list_webpages = []
+    for string_file_name in sorted(os.listdir(string_corpus_directory)):
+        string_file_path = os.path.join(string_corpus_directory, string_file_name)
+        if (string_file_name.endswith(".html.gz")):
+            with gzip.open(string_file_path, "rb") as file_webpage:
+                list_webpages.append((string_file_name[:-3], file_webpage.read()))
+        elif (string_file_name.endswith(".html")):
+            with open(string_file_path, "rb") as file_webpage:
+                list_webpages.append((string_file_name, file_webpage.read()))
+
+    return list_webpages
+
+
+# Analyze a webpage once, recording its stages in the profiler
+def run_webpage(bytes_webpage, profiler):
+    portan_webpage = portan.Portan()
+    portan_webpage.set_profiler(profiler)
+    string_webpage = profiler.run_stage("decode", lambda: bytes_webpage.decode("utf-8", "replace"), len(bytes_webpage))
+    portan_webpage.process_webpage(string_corpus_url, 200, None, string_webpage)
+    portan_webpage.set_profiler(None)
+
+    return None
+
+
+# Benchmark a webpage, returning the throughput, time, matches, and peak memory of every stage
+def benchmark_webpage(bytes_webpage, int_repeat):
+    # Keep the fastest of the runs, as the slower ones only measure whatever else the machine was doing
+    dict_results = {}
+    for int_run in range(int_repeat):
+        profiler = portan.PortanProfiler()
+        run_webpage(bytes_webpage, profiler)
+        for string_stage, dict_stage in profiler.get_stages().items():
+            if (string_stage not in dict_results) or (dict_stage["wall_seconds"] < dict_results[string_stage]["seconds"]):
+                dict_results[string_stage] = {"seconds": dict_stage["wall_seconds"], "matches": dict_stage["matches"],\
+                    "mb_per_second": (dict_stage["input_size"] / 1000000 / dict_stage["wall_seconds"]) if (dict_stage["wall_seconds"] > 0) else 0.0}
+
+    # Tracing makes everything slower, so the memory is measured in a run of its own
+    profiler = portan.PortanProfiler()
+    tracemalloc.start()
+    run_webpage(bytes_webpage, profiler)
+    tracemalloc.stop()
+    for string_stage, dict_stage in profiler.get_stages().items():
+        dict_results[string_stage]["peak_memory"] = dict_stage["peak_memory"]
+
+    return dict_results
+
+
+# The script run in a fresh process, printing the seconds importing portan, and then its first analyze() of the webpage
+# read from stdin, take
+string_cold_start_script = """
+import sys
+import time
+sys.path.insert(0, sys.argv[1])
+float_start = time.perf_counter()
+import portan
+float_imported = time.perf_counter()
+portan.analyze(sys.stdin.buffer.read().decode("utf-8", "replace"), base_url=sys.argv[2])
+print(float_imported - float_start, time.perf_counter() - float_imported)
+"""
+
+
+# Return the seconds importing portan, and its first analyze() of the webpage, take in a fresh process, the fastest of the runs
+def measure_cold_start(bytes_webpage, int_repeat):
+    string_source_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source")
+    list_fastest = None
+    for int_run in range(int_repeat):
+        completed_process = subprocess.run([sys.executable, "-c", string_cold_start_script, string_source_directory, string_corpus_url],\
+            input=bytes_webpage, capture_output=True, check=True)
+        list_seconds = [float(string_seconds) for string_seconds in completed_process.stdout.split()]
+        if (list_fastest == None):
+            list_fastest = list_seconds
+        list_fastest = [min(float_fastest, float_seconds) for float_fastest, float_seconds in zip(list_fastest, list_seconds)]
+
+    return tuple(list_fastest)
+
+
+# Run the calibration workload, which does the kind of work the stages do on a synthetic webpage, returning what it counted
+def calibration_workload():
+    string_webpage = "<p class=\"text\">Some words of a webpage, and <a href=\"https://example.com/page\">a hyperlink</a></p>\n" * 4000
+    int_characters = 0
+    for match_token in re.finditer("<[^>]*>|[^<]+", string_webpage):
+        int_characters += len(match_token.group())
+
+    dict_words = {}
+    for string_word in string_webpage.lower().split():
+        dict_words[string_word] = dict_words.get(string_word, 0) + 1
+
+    return int_characters + len(re.findall(r"https?://[^\"\s<>]+", string_webpage)) + len(dict_words)
+
+
+# Return the seconds the fastest of the runs of the calibration workload takes on this machine
+def calibrate(int_repeat):
+    float_fastest = None
+    for int_run in range(max(int_repeat, 5)):
+        float_start = time.perf_counter()
+        calibration_workload()
+        float_seconds = time.perf_counter() - float_start
+        if (float_fastest == None) or (float_seconds < float_fastest):
+            float_fastest = float_seconds
+
+    return float_fastest
+
+
+# Return a message for every stage that is slower, or uses more memory, than the baseline allows. The times of the baseline
+# are scaled by float_speed_ratio, the calibration time of this machine divided by that of the machine the baseline was saved on
+def find_regressions(dict_results, dict_baseline, float_tolerance, float_speed_ratio = 1.0):
+    list_regressions = []
+    for string_webpage, dict_stages in dict_baseline.items():
+        for string_stage, dict_expected in dict_stages.items():
+            if (string_webpage not in dict_results) or (string_stage not in dict_results[string_webpage]):
+                list_regressions.append(string_webpage + " " + string_stage + ": missing")
+                continue
+
+            # Stages that only take microseconds are too noisy to compare
+            dict_result = dict_results[string_webpage][string_stage]
+            float_expected_seconds = dict_expected["seconds"] * float_speed_ratio
+            if (float_expected_seconds >= 0.0005) and (dict_result["seconds"] > float_expected_seconds * (1 + float_tolerance)):
+                list_regressions.append(string_webpage + " " + string_stage + ": " + format(dict_result["seconds"] * 1000, ".2f") +\
+                    " ms instead of " + format(float_expected_seconds * 1000, ".2f") + " ms")
+
+            # Memory is only compared once it is more than 64 KB, for the same reason
+            if (dict_result["peak_memory"] > 65536) and (dict_result["peak_memory"] > dict_expected["peak_memory"] * (1 + float_tolerance)):
+                list_regressions.append(string_webpage + " " + string_stage + ": " + format(dict_result["peak_memory"] / 1048576, ".2f") +\
+                    " MB of memory instead of " + format(dict_expected["peak_memory"] / 1048576, ".2f") + " MB")
+
+    return list_regressions
+
+
+# Display the results as a table, one line per webpage and stage
+def display_results(dict_results):
+    print("\nWEBPAGE\t\t\tSTAGE\t\tMB/S\t\tMS\t\tMATCHES\t\tPEAK MEMORY")
+    print("-------\t\t\t-----\t\t----\t\t--\t\t-------\t\t-----------")
+    for string_webpage, dict_stages in dict_results.items():
+        for string_stage, dict_result in dict_stages.items():
+            print("%-24s%-16s%-16s%-16s%-16s%s" % (string_webpage, string_stage, format(dict_result["mb_per_second"], ".2f"),\
+                format(dict_result["seconds"] * 1000, ".2f"), dict_result["matches"], format(dict_result["peak_memory"] / 1048576, ".2f") + " MB"))
+
+    return None
+
+
+# Find the value following an argument, or string_default should the argument not be present
+def find_argument_value(list_arguments, string_item_to_find, string_default):
+    if (string_item_to_find not in list_arguments) or (list_arguments.index(string_item_to_find) + 1 >= len(list_arguments)):
+        return string_default
+
+    return list_arguments[list_arguments.index(string_item_to_find) + 1]
+
+
+# Main function which controls the execution of the benchmark
+#   >> portan_benchmark.py [--repeat number] [--tolerance fraction] [--corpus directory] [--baseline file] [--save-baseline]
+def main():
+    list_arguments = list(sys.argv)
+    string_directory = os.path.dirname(os.path.abspath(__file__))
+    string_corpus_directory = find_argument_value(list_arguments, "--corpus", os.path.join(string_directory, "corpus"))
+    string_baseline_file = find_argument_value(list_arguments, "--baseline", os.path.join(string_directory, "baseline.json"))
+    try:
+        int_repeat = max(1, int(find_argument_value(list_arguments, "--repeat", "5")))
+        float_tolerance = float(find_argument_value(list_arguments, "--tolerance", "0.25"))
+    except ValueError:
+        print("Error: --repeat requires a number, and --tolerance a fraction such as 0.25...")
+        return 2
+
+    # Benchmark every webpage of the corpus, and calibrate before and after, keeping the fastest, should the machine have been busy
+    float_calibration_seconds = calibrate(int_repeat)
+    dict_results = {}
+    for string_webpage, bytes_webpage in load_corpus(string_corpus_directory):
+        dict_results[string_webpage] = benchmark_webpage(bytes_webpage, int_repeat)
+    float_calibration_seconds = min(float_calibration_seconds, calibrate(int_repeat))
+    display_results(dict_results)
+    print("\nCALIBRATION:\t\t" + format(float_calibration_seconds * 1000, ".2f") + " ms")
+
+    # The smallest webpage shows the time a fresh process takes before its first result, with the least analysis in it
+    list_webpages = load_corpus(string_corpus_directory)
+    if (len(list_webpages) > 0):
+        string_webpage, bytes_webpage = min(list_webpages, key=lambda tuple_webpage: len(tuple_webpage[1]))
+        float_import_seconds, float_analyze_seconds = measure_cold_start(bytes_webpage, int_repeat)
+        print("IMPORT:\t\t\t" + format(float_import_seconds * 1000, ".2f") + " ms")
+        print("FIRST ANALYZE():\t" + format(float_analyze_seconds * 1000, ".2f") + " ms (" + string_webpage + ")")
+
+    # Should --save-baseline be set, the results become the baseline the next runs are compared with
+    if ("--save-baseline" in list_arguments):
+        with open(string_baseline_file, "w") as file_baseline:
+            json.dump({"calibration_seconds": float_calibration_seconds, "webpages": dict_results}, file_baseline, indent=1, sort_keys=True)
+        print("\nSaved the baseline to " + string_baseline_file)
+        return 0
+
+    if (not os.path.exists(string_baseline_file)):
+        print("\nNo baseline to compare with, run with --save-baseline to create " + string_baseline_file)
+        return 0
+
+    # A baseline saved before there was a calibration is only comparable on the machine it was saved on
+    with open(string_baseline_file) as file_baseline:
+        dict_baseline = json.load(file_baseline)
+    float_speed_ratio = 1.0
+    if ("calibration_seconds" in dict_baseline):
+        float_speed_ratio = float_calibration_seconds / dict_baseline["calibration_seconds"]
+        dict_baseline = dict_baseline["webpages"]
+        print("SPEED COMPARED WITH THE BASELINE:\t" + format(1 / float_speed_ratio, ".2f") + "x")
+    else:
+        print("The baseline has no calibration, so its times are compared as they are, save it again with --save-baseline")
+    list_regressions = find_regressions(dict_results, dict_baseline, float_tolerance, float_speed_ratio)
+    if (len(list_regressions) > 0):
+        print("\nREGRESSIONS (MORE THAN " + format(float_tolerance * 100, ".0f") + "% WORSE THAN THE BASELINE):")
+        print("-------------------------------------------------")
+        for string_regression in list_regressions:
+            print(string_regression)
+        return 1
+
+    print("\nNo regressions compared with " + string_baseline_file)
+
+    return 0
+
+
+# Run the benchmark, but only when run as a program rather than imported
+if __name__ == "__main__":
+    sys.exit(main())
@@ -33,9 +33,17 @@
 import re
 import os
 import sys
-import urllib.request, urllib.error
-
-import pprint
+import json
+import math
+import time
+import codecs
+import hashlib
+import collections
+import threading
+import urllib.error, urllib.parse
+
+# NOTE: asyncio, ssl, http.client, tempfile, and concurrent.futures are only imported by the functions that need them,
+#       so that importing portan to analyze html that has already been downloaded stays fast
 
 # Class defition
 class Portan:
@@ -69,7 +77,23 @@ class Portan:
     __list_html_tags = ["None"]                     # Contains all the html tags found in the website
     __string_webpage_plain_text = ""                # Contains the normal plaintext based on the html document without tags, comments, or javascript
     __list_image_hyperlinks = ["None"]              # Contains all the hyperlinks to images
+    __list_image_sources = []                       # Contains the targets of the <img src> tags, which --verify-images checks as well
+    __dict_image_probes = None                      # Contains the Content-Type and size of every image checked by --verify-images, None when not checked
+    __dict_terms = None                             # Contains the totals of the terms of the webpage, None when not counted
     __list_found_searched_strings = ["None"]        # contains the found results for all the searched strings
+    __tuple_tokenized_webpage = (None, [], [])      # Contains the webpage together with the tags and plaintext segments it was split into
+
+    # CPU budget of the webpage being analyzed
+    __float_cpu_deadline = None                     # Contains the thread CPU time at which the analysis is stopped, None when there is no budget
+    __string_current_stage = "N/A"                  # Contains the stage being run, as reported should the budget be used up in it
+    __string_cpu_budget_stage = None                # Contains the stage the analysis was stopped in, None when it was not stopped
+
+    # The extractors process_webpage() runs by default, and the inputs every extractor can be given besides the other extractors
+    TUPLE_EXTRACTORS = ("html_tags", "plaintext", "hyperlinks", "emails", "images")
+    TUPLE_EXTRACTOR_INPUTS = ("url", "headers", "webpage")
+    __dict_extractors = None                        # Contains the inputs and function of every extractor, see _get_extractors()
+    __tuple_extracted = TUPLE_EXTRACTORS            # Contains the extractors that were run on the webpage
+    __dict_extracted = {}                           # Contains what the extractors registered with register_extractor() found
 
     # Set program flags for use
     #   NOTE: certain flags override output, such as --help, --license, and --version
@@ -85,35 +109,126 @@ class Portan:
     __flag_plaintext = False
     __flag_search = False
     __flag_images = False
+    __flag_terms = False
+
+    # Set how webpages are downloaded
+    __int_stream_chunk_size = 0                     # Contains the size of the chunks --stream downloads and analyzes, 0 when not streaming
+    __int_max_bytes = 0                             # Contains the most bytes to download of every webpage, 0 when there is no limit
+    __int_workers = 0                               # Contains the number of processes that analyze the webpages of --batch and --crawl, 0 for none
+    __int_verify_concurrency = 0                    # Contains how many images --verify-images checks at the same time, 0 when not checking them
+    __tuple_requested_extractors = None             # Contains the extractors the flags need, None to run those of TUPLE_EXTRACTORS
+
+    # The regexes are compiled the first time they are needed and then shared by all Portan objects
+    __email_name_start_regex = None
+    __email_first_character_regex = None
+    __email_domain_regex = None
+    __email_mailto_regex = None
+    __email_obfuscated_domain_regex = None
+    __email_obfuscated_dot_regex = None
+    __host_regex = None
+    __path_regex = None
+    __a_href_regex = None
+    __url_scheme_regex = None
+    __url_authority_regex = None
+    __any_image_extension_regex = None
+    __image_source_regex = None
+    __tag_attribute_regex = None
+    __charset_regex = None
+    __meta_charset_regex = None
+    __tuple_image_extension_regexes = None
+    __tuple_email_obfuscated_at_regexes = None
+
+    # Shared by all Portan objects so that connections to the same host can be reused
+    __connection_pool = None
+    __lock_connection_pool = threading.Lock()       # Makes sure only one connection pool is created by the threads of batch()
+    __http_cache = None                             # Contains the PortanHttpCache set by --cache, None when not caching
+    __search_index = None                           # Contains the PortanSearchIndex set by --index, None when not indexing
+    __ndjson_writer = None                          # Contains the PortanNdjsonWriter set by --ndjson, None when not writing records
+    __profiler = None                               # Contains the PortanProfiler the stages of every webpage are recorded in, None when not profiling
+    __float_cpu_budget = 0.0                        # Contains the CPU seconds the analysis of every webpage may take, 0 when there is no limit
+    __image_probe_cache = None                      # Contains the PortanImageProbeCache of --verify-images, so that no image is checked twice
+    __lock_image_probe_cache = threading.Lock()     # Makes sure only one image probe cache is created by the threads of batch()
+    __term_statistics = None                        # Contains the PortanTermStatistics the terms of every webpage are added to, None when not counting
+    __watch_snapshots = None                        # Contains the PortanWatchSnapshots set by --snapshot, None to keep them in memory
+    __robots_rules = None                           # Contains the PortanRobotsRules set by --robots and --sitemap, None when robots.txt is not obeyed
+    __near_duplicates = None                        # Contains the PortanNearDuplicates set by --near-duplicates, None when not looking for them
 
 
     # Constructor taking arguments from the commandline
-    def __init__(self, list_arguments):
+    #   NOTE: without any arguments the object only holds the data of a single webpage, as used by batch() and analyze()
+    def __init__(self, list_arguments = None):
+        self._reset_webpage()
+        if (list_arguments != None):
+            self.run_commandline(list_arguments)
+
+        return None
+
+
+    # Not supposed to be called
+    def _reset_webpage(self):
+        # Give the object its own copy of everything found on a webpage, rather than sharing the lists of the class,
+        # so that nothing found on one webpage can show up on another
+        self.__int_num_images = 0
+        self.__int_num_emails = 0
+        self.__int_num_hyperlinks = 0
+        self.__int_num_text = 0
+        self.__int_num_html_tags = 0
+        self.__string_provided_url = "N/A"
+        self.__string_returned_webpage = "N/A"
+        self.__string_status_code = "N/A"
+        self.__dict_header_info = "N/A"
+        self.__list_emails = ["None"]
+        self.__list_hyperlinks = ["None"]
+        self.__list_html_tags = ["None"]
+        self.__string_webpage_plain_text = ""
+        self.__list_image_hyperlinks = ["None"]
+        self.__list_image_sources = []
+        self.__dict_image_probes = None
+        self.__dict_terms = None
+        self.__list_found_searched_strings = ["None"]
+        self.__tuple_base_url = None
+        self.__bool_has_base_tag = False
+        self.__dict_resolved_hyperlinks = {}
+        self.__tuple_tokenized_webpage = (None, [], [])
+        self.__tuple_extracted = Portan.TUPLE_EXTRACTORS
+        self.__dict_extracted = {}
+        self.__float_cpu_deadline = None
+        self.__string_current_stage = "N/A"
+        self.__string_cpu_budget_stage = None
+        self.__string_near_duplicate_of = None
+
+        return None
+
+
+    # Run Portan as asked by the arguments from the commandline, the first of which is the path of the program
+    def run_commandline(self, list_arguments):
         # Dictate and set the arguments that are supported by portan - Remember to delete this later
         self.__list_possible_arguments = ["--verbose", "--version", "--help", "--minimal", "--no-output",\
-             "--license", "--emails", "--hyperlinks", "--write", "--plaintext", "--search", "--images"]
+             "--license", "--emails", "--hyperlinks", "--write", "--plaintext", "--search", "--images",\
+             "--batch", "--concurrency", "--crawl", "--depth", "--max-pages", "--all-hosts", "--stream", "--chunk-size",\
+             "--max-bytes", "--cache", "--cache-size", "--cache-ttl", "--index", "--query", "--limit", "--workers", "--ndjson", "--gzip", "--profile", "--profile-file",\
+             "--cpu-budget", "--verify-images", "--probe-cache", "--terms", "--top", "--ngram", "--keep-stopwords", "--terms-file",\
+             "--serve", "--queue", "--watch", "--rounds", "--snapshot", "--local", "--search-file", "--context", "--robots", "--sitemap", "--extract",\
+             "--near-duplicates"]
 
         # Remove the first part of the list, as this will always be the current file path
         list_arguments.pop(0)
 
-        # Should the --search text be active, find what string to search for which is assumed to be one after
-        string_to_search_for = ""
-        try:
-            # Find the position of the argument
-            int_search_argument_position = list_arguments.index("--search")
-            
+        # Should --search be set, find the strings to search for, each of which follows a --search
+        list_terms_to_search_for = []
+        for int_search_argument_position, string_argument in enumerate(list_arguments):
+            if (string_argument != "--search"):
+                continue
+
             # Find the string, and try and match it to other tags to exclude and provide an error message if necessary
-            if (list_arguments[int_search_argument_position+1] in self.__list_possible_arguments):
+            if (int_search_argument_position + 1 >= len(list_arguments)) or\
+                (list_arguments[int_search_argument_position+1] in self.__list_possible_arguments):
                 print("Error: no string to search for specified...")
                 self.help_menu()
                 return None
 
             # Should the string not be found in list of possible arguments, get the string to search for
-            string_to_search_for = list_arguments[int_search_argument_position+1]
-        
-        except:
-            # Do nothing
-            string_to_search_for = "N/A"
+            list_terms_to_search_for.append(list_arguments[int_search_argument_position+1])
 
         # Determine whether there are any arguments for Portan to use
         if len(list_arguments) < 1:
@@ -149,421 +264,2530 @@ class Portan:
             self.__flag_write = True
         if (self._find_argument(list_arguments, "--plaintext")):
             self.__flag_plaintext = True
-        if (self._find_argument(list_arguments, "--search")):
+        if (self._find_argument(list_arguments, "--search")) or (self._find_argument(list_arguments, "--search-file")):
             self.__flag_search = True
         if (self._find_argument(list_arguments, "--images")):
             self.__flag_images = True
+        if (self._find_argument(list_arguments, "--terms")) or (self._find_argument(list_arguments, "--terms-file")):
+            self.__flag_terms = True
 
         # Determine whether the program has any mutually exclusive arguments active
         if (int(self.__flag_verbose) + int(self.__flag_minimal) + int(self.__flag_no_output)) > 1:
             print("Error: Cannot contain more than one mutually exclusive tags. \nChoose one: --verbose, --minimal, or --no_output")
             return None     # To exit the program
 
+        # Should --batch be set, find the file containing the urls, or "-" to read them from stdin
+        string_batch_file = self._find_argument_value(list_arguments, "--batch")
+        if (self._find_argument(list_arguments, "--batch")) and (string_batch_file == None):
+            print("Error: no file containing urls specified...")
+            self.help_menu()
+            return None
+
+        # Determine how many webpages may be downloaded at the same time in batch and crawl mode
+        int_concurrency = self._find_argument_number(list_arguments, "--concurrency", 8, 1)
+
+        # Determine how far --crawl may follow the hyperlinks
+        int_crawl_depth = self._find_argument_number(list_arguments, "--depth", 2, 0)
+        int_crawl_max_pages = self._find_argument_number(list_arguments, "--max-pages", 100, 1)
+
+        # Determine whether to download and analyze the webpages in chunks, and how much of them to download
+        int_chunk_size = self._find_argument_number(list_arguments, "--chunk-size", 65536, 1)
+        int_max_bytes = self._find_argument_number(list_arguments, "--max-bytes", 0, 1)
+
+        # Determine where to cache the webpages, how many megabytes the cache may use, and for how many seconds
+        # a cached webpage is used without asking the server whether it has changed
+        string_cache_directory = self._find_argument_value(list_arguments, "--cache")
+        int_cache_megabytes = self._find_argument_number(list_arguments, "--cache-size", 256, 1)
+        int_cache_ttl = self._find_argument_number(list_arguments, "--cache-ttl", 0, 0)
+
+        # Determine which index the analyzed webpages are added to, or searched with --query, and how many results to show
+        string_index_file = self._find_argument_value(list_arguments, "--index")
+        string_query = self._find_argument_value(list_arguments, "--query")
+        int_query_limit = self._find_argument_number(list_arguments, "--limit", 10, 1)
+
+        # Determine the file, or - for stdout, to append a json record of every webpage to
+        string_ndjson_file = self._find_argument_value(list_arguments, "--ndjson")
+        if (self._find_argument(list_arguments, "--ndjson")) and (string_ndjson_file == None):
+            print("Error: no file, or - for stdout, to write the records to specified...")
+            return None
+        if (string_ndjson_file == "-") and (self.__flag_verbose):
+            print("Error: --ndjson - writes the records to stdout, which can not be used together with --verbose")
+            return None
+        if (string_ndjson_file == "-"):
+            self.__flag_no_output = True
+
+        # Determine how the stages recorded by --profile are shown, and where to
+        string_profile_format = self._find_argument_value(list_arguments, "--profile")
+        string_profile_file = self._find_argument_value(list_arguments, "--profile-file")
+        if (string_profile_format not in ("table", "json", "prometheus")):
+            string_profile_format = "table"
+        if (self._find_argument(list_arguments, "--profile-file")) and (string_profile_file == None):
+            print("Error: no file to write the profile to specified...")
+            return None
+
+        # Determine how many processes analyze the webpages downloaded by --batch and --crawl
+        int_workers = self._find_argument_number(list_arguments, "--workers", 0, 1)
+
+        # Determine where --verify-images keeps what it found out about every image, which is only kept in memory otherwise
+        string_probe_cache_file = self._find_argument_value(list_arguments, "--probe-cache")
+        if (self._find_argument(list_arguments, "--probe-cache")) and (string_probe_cache_file == None):
+            print("Error: no file to keep the checked images in specified...")
+            return None
+
+        # Determine how many of the most common terms --terms shows, how many terms its n-grams have, and where to write the totals
+        int_top_terms = self._find_argument_number(list_arguments, "--top", 10, 1)
+        int_ngram_size = self._find_argument_number(list_arguments, "--ngram", 2, 1)
+        string_terms_file = self._find_argument_value(list_arguments, "--terms-file")
+        if (self._find_argument(list_arguments, "--terms-file")) and (string_terms_file == None):
+            print("Error: no file to write the terms to specified...")
+            return None
+
+        # Determine the address --serve answers on, a port, host:port, or unix:path, and how many requests may wait
+        string_serve_address = self._find_argument_value(list_arguments, "--serve") or "127.0.0.1:8750"
+        int_queue_size = self._find_argument_number(list_arguments, "--queue", 64, 0)
+        if (self._find_argument(list_arguments, "--serve")) and (not string_serve_address.startswith("unix:")) and\
+            (not string_serve_address.rpartition(":")[2].isdigit()):
+            print("Error: --serve requires a port, host:port, or unix:path...")
+            return None
+
+        # Determine the html file, directory, or WARC archive to analyze instead of downloading the webpages
+        string_local_path = self._find_argument_value(list_arguments, "--local")
+        if (self._find_argument(list_arguments, "--local")) and ((string_local_path == None) or (not os.path.exists(string_local_path))):
+            print("Error: no html file, directory, or WARC archive to analyze found...")
+            return None
+
+        # Determine how many seconds --watch waits between polling the webpages, how often it polls them, and where it keeps the snapshots
+        int_watch_interval = self._find_argument_number(list_arguments, "--watch", 300, 1)
+        int_watch_rounds = self._find_argument_number(list_arguments, "--rounds", 0, 1)
+        string_snapshot_file = self._find_argument_value(list_arguments, "--snapshot")
+        if (self._find_argument(list_arguments, "--snapshot")) and (string_snapshot_file == None):
+            print("Error: no file to keep the snapshots in specified...")
+            return None
+
+        # Determine the file containing more strings to search for, one per line, and how many characters around them --search shows
+        string_search_file = self._find_argument_value(list_arguments, "--search-file")
+        int_search_context = self._find_argument_number(list_arguments, "--context", 40, 0)
+        if (self._find_argument(list_arguments, "--search-file")) and ((string_search_file == None) or (not os.path.isfile(string_search_file))):
+            print("Error: no file containing the strings to search for found...")
+            return None
+
+        # Determine the extractors to run besides those of the flags, separated by commas
+        string_extract = self._find_argument_value(list_arguments, "--extract")
+        if (self._find_argument(list_arguments, "--extract")) and (string_extract == None):
+            print("Error: no extractors specified, choose from: " + ", ".join(self._get_extractors()))
+            return None
+        list_extractors_to_run = [string_name.strip() for string_name in (string_extract or "").split(",") if (string_name.strip() != "")]
+        for string_name in list_extractors_to_run:
+            if (string_name not in self._get_extractors()):
+                print("Error: unknown extractor " + string_name + ", choose from: " + ", ".join(self._get_extractors()))
+                return None
+
+        # Determine how many bits the fingerprints of two webpages may differ in for --near-duplicates to find them nearly the same.
+        # --watch needs everything found on every webpage to tell what changed, which is not found on a near-duplicate
+        int_near_duplicate_bits = self._find_argument_number(list_arguments, "--near-duplicates", 3, 0)
+        if (self._find_argument(list_arguments, "--near-duplicates")) and (self._find_argument(list_arguments, "--watch")):
+            print("Error: --near-duplicates can not be used together with --watch")
+            return None
+
+        # Determine how many milliseconds of CPU time the analysis of a single webpage may take
+        int_cpu_budget = self._find_argument_number(list_arguments, "--cpu-budget", 0, 1)
+        if (None in (int_concurrency, int_crawl_depth, int_crawl_max_pages, int_chunk_size, int_max_bytes, int_cache_megabytes, int_cache_ttl,\
+            int_query_limit, int_workers, int_cpu_budget, int_top_terms, int_ngram_size, int_queue_size,\
+            int_watch_interval, int_watch_rounds, int_search_context, int_near_duplicate_bits)):
+            return None
+        if (self._find_argument(list_arguments, "--cache")) and (string_cache_directory == None):
+            print("Error: no directory to cache the webpages in specified...")
+            return None
+        if (self._find_argument(list_arguments, "--index")) and (string_index_file == None):
+            print("Error: no file to keep the index in specified...")
+            return None
+        if (self._find_argument(list_arguments, "--query")) and ((string_query == None) or (string_index_file == None)):
+            print("Error: --query needs the words to search for, and the --index to search in...")
+            return None
+        if (string_cache_directory != None):
+            self.set_http_cache(PortanHttpCache(string_cache_directory, int_cache_megabytes * 1048576, int_cache_ttl))
+        if (string_probe_cache_file != None):
+            try:
+                Portan.__image_probe_cache = PortanImageProbeCache(string_probe_cache_file)
+            except Exception as error:
+                print("Error: " + string_probe_cache_file + ": " + str(error))
+                return None
+        if (string_snapshot_file != None):
+            try:
+                Portan.__watch_snapshots = PortanWatchSnapshots(string_snapshot_file)
+            except Exception as error:
+                print("Error: " + string_snapshot_file + ": " + str(error))
+                return None
+        if (string_index_file != None):
+            try:
+                Portan.__search_index = PortanSearchIndex(string_index_file)
+            except Exception as error:
+                print("Error: " + string_index_file + ": " + str(error))
+                return None
+        if (self._find_argument(list_arguments, "--profile")):
+            self.set_profiler(PortanProfiler())
+        if (self._find_argument(list_arguments, "--robots")) or (self._find_argument(list_arguments, "--sitemap")):
+            Portan.__robots_rules = PortanRobotsRules()
+        if (self._find_argument(list_arguments, "--near-duplicates")):
+            self.set_near_duplicates(PortanNearDuplicates(int_near_duplicate_bits))
+        keyword_search = None
+        if (self.__flag_search):
+            if (string_search_file != None):
+                list_terms_to_search_for.extend(self._read_url_list(string_search_file))
+            keyword_search = PortanKeywordSearch(list_terms_to_search_for, int_search_context)
+        if (self.__flag_terms):
+            self.set_term_statistics(PortanTermStatistics(int_ngram_size, not self._find_argument(list_arguments, "--keep-stopwords"), int_top_terms))
+        if (string_ndjson_file != None):
+            try:
+                Portan.__ndjson_writer = PortanNdjsonWriter(string_ndjson_file, self._find_argument(list_arguments, "--gzip"))
+            except OSError as error:
+                print("Error: " + string_ndjson_file + ": " + str(error))
+                return None
+        if (self._find_argument(list_arguments, "--stream")):
+            self.__int_stream_chunk_size = int_chunk_size
+        self.__int_max_bytes = int_max_bytes
+        self.__int_workers = int_workers
+        self.set_cpu_budget(int_cpu_budget / 1000)
+        if (self._find_argument(list_arguments, "--verify-images")):
+            self.__int_verify_concurrency = int_concurrency
+        self.__tuple_requested_extractors = self._get_requested_extractors(list_arguments, list_extractors_to_run)
+
         # Display the license information
         self.license_menu(self.__flag_no_output)
 
-        # Should --minimal be set, don't display any message, should --verbose be set, display all messages
-        # PS, the first argument should be the url, if not, some errors will occur
-        self.get(list_arguments[0], self.__flag_verbose)
+        # Should --query be set, search the index instead of analyzing any webpage
+        if (string_query != None):
+            self.display_query(string_query, int_query_limit, self.__flag_no_output)
+        # Should --serve be set, answer requests to analyze urls or html until interrupted
+        elif (self._find_argument(list_arguments, "--serve")):
+            self.serve(string_serve_address, int_concurrency, int_queue_size, self.__flag_verbose)
+        # Should --local be set, analyze the html files or WARC archive without downloading anything
+        elif (string_local_path != None):
+            self.analyze_local(string_local_path, self.__flag_verbose, keyword_search)
+        # Should --watch be set, poll the url, or every url of --batch, and report what changed until interrupted
+        elif (self._find_argument(list_arguments, "--watch")):
+            list_urls = list(self._read_url_list(string_batch_file)) if (string_batch_file != None) else [list_arguments[0]]
+            self.watch(list_urls, int_watch_interval, int_watch_rounds, int_concurrency, self.__flag_verbose, keyword_search)
+        # Should --sitemap be set, analyze every url listed in the sitemaps of the website that robots.txt allows,
+        # but no more than --max-pages should it be given
+        elif (self._find_argument(list_arguments, "--sitemap")):
+            iterator_urls = self.discover(list_arguments[0], self.__flag_verbose)
+            if (self._find_argument(list_arguments, "--max-pages")):
+                import itertools
+                iterator_urls = itertools.islice(iterator_urls, int_crawl_max_pages)
+            self.batch(iterator_urls, int_concurrency, self.__flag_verbose, keyword_search)
+        # Should --batch be set, analyze every url in the list instead of a single one
+        elif (string_batch_file != None):
+            self.batch(self._read_url_list(string_batch_file), int_concurrency, self.__flag_verbose, keyword_search)
+        # Should --crawl be set, analyze the url and recursively the webpages it links to
+        elif (self._find_argument(list_arguments, "--crawl")):
+            self.crawl(list_arguments[0], int_crawl_depth, int_crawl_max_pages, not self._find_argument(list_arguments, "--all-hosts"),\
+                int_concurrency, self.__flag_verbose, keyword_search)
+        else:
+            # Should --minimal be set, don't display any message, should --verbose be set, display all messages
+            # PS, the first argument should be the url, if not, some errors will occur
+            if (self.__int_stream_chunk_size > 0):
+                self.get_streamed(list_arguments[0], self.__flag_verbose, self.__int_stream_chunk_size, self.__int_max_bytes,\
+                    self._is_plaintext_needed(), self.__flag_write, self.__tuple_requested_extractors)
+            else:
+                self.get(list_arguments[0], self.__flag_verbose, self.__int_max_bytes, self.__tuple_requested_extractors)
+
+            # Display the information requested by the flags
+            self._report(self, keyword_search)
+
+        # Write the webpages and records that are left
+        if (Portan.__search_index != None):
+            Portan.__search_index.close()
+        if (Portan.__image_probe_cache != None):
+            Portan.__image_probe_cache.close()
+        if (Portan.__watch_snapshots != None):
+            Portan.__watch_snapshots.close()
+        if (Portan.__ndjson_writer != None):
+            Portan.__ndjson_writer.close()
+
+        # Should --terms be set, show the terms of all the webpages of --batch and --crawl, and write them should --terms-file be set
+        if (Portan.__term_statistics != None):
+            self.display_corpus_terms(string_terms_file, self.__flag_no_output or (Portan.__term_statistics.count() < 2))
+
+        # Should --profile be set, show where the time went
+        if (Portan.__profiler != None):
+            self.display_profile(string_profile_format, string_profile_file)
+	
+        return None
+
+
+    # Display and write the information of a webpage as requested by the flags
+    def _report(self, portan_webpage, keyword_search):
+        # Should --near-duplicates find the webpage to be nearly the same as one seen before, only say so, and write its record
+        if (portan_webpage.__string_near_duplicate_of != None):
+            if (not self.__flag_no_output):
+                print("NEAR DUPLICATE: " + str(portan_webpage.__string_provided_url) + " of " + portan_webpage.__string_near_duplicate_of)
+            if (Portan.__ndjson_writer != None):
+                Portan.__ndjson_writer.write(portan_webpage.get_record(self.__flag_search))
+            return None
+
+        # Should --verify-images be set, check the images before anything about them is shown or written, unless batch() already did
+        if (self.__int_verify_concurrency > 0) and (portan_webpage.__string_status_code != "N/A") and (portan_webpage.__dict_image_probes == None):
+            portan_webpage.verify_images(self.__int_verify_concurrency)
 
         # Should --no-output be set, get the information, but display nothing
-        self.display_details(self.__flag_no_output)
+        portan_webpage.display_details(self.__flag_no_output)
+
+        # Should the webpage have used up its --cpu-budget, tell where it was stopped, as everything after it was not analyzed
+        if (portan_webpage.__string_cpu_budget_stage != None) and (not self.__flag_no_output):
+            print("Error: " + str(portan_webpage.__string_provided_url) + ": used up its CPU budget of " + format(Portan.__float_cpu_budget * 1000, ".0f") +\
+                " ms in the " + portan_webpage.__string_cpu_budget_stage + " stage, so only part of it was analyzed...")
 
         # Should --no-output be set, don't display the emails even if the the required tag is active 
         if (self.__flag_emails):
-            self.display_emails(self.__flag_no_output)
+            portan_webpage.display_emails(self.__flag_no_output)
 
         # Should --no-output be set, don't display the hyperlinks even if the required tag is active
         if (self.__flag_hyperlinks):
-            self.display_hyperlinks(self.__flag_no_output)
+            portan_webpage.display_hyperlinks(self.__flag_no_output)
 
         # Should --no-output be set, don't display the images even if the required tag is active
         if (self.__flag_images):
-            self.display_images(self.__flag_no_output)
+            portan_webpage.display_images(self.__flag_no_output)
+
+        # Should --no-output be set, don't display the terms even if the required tag is active
+        if (self.__flag_terms):
+            portan_webpage.display_terms(self.__flag_no_output)
 
         # Should --no-output be set, don't display the searched text, even if the required tag is active
         if (self.__flag_search):
-            self.display_search(string_to_search_for, self.__flag_no_output)
+            portan_webpage.display_search(keyword_search, self.__flag_no_output)
 
         # This function only activates should the required argument be presented
         if (self.__flag_write):
-            self.write_files()
+            portan_webpage.write_files()
 
         # This funciton only activates should the required argumnet be presented
         if (self.__flag_plaintext):
-            self.display_plaintext(self.__flag_no_output)
-	
+            portan_webpage.display_plaintext(self.__flag_no_output)
+
+        # Should --extract be set, display what its extractors found
+        portan_webpage.display_extracted(self.__flag_no_output)
+
+        # Should --index be set, add the plaintext to the index
+        if (Portan.__search_index != None) and (portan_webpage.__string_webpage_plain_text != None) and\
+            (portan_webpage.__string_status_code != "N/A"):
+            Portan.__search_index.add(portan_webpage.__string_provided_url, portan_webpage.__string_webpage_plain_text)
+
+        # Should --ndjson be set, add the record of the webpage
+        if (Portan.__ndjson_writer != None):
+            Portan.__ndjson_writer.write(portan_webpage.get_record(self.__flag_search))
+
         return None
 
 
-    def get(self, string_received_url, bool_is_verbose = False):
-        # Retrieve the data from the web
+    # Not supposed to be called
+    def _get_requested_extractors(self, list_arguments, list_extractors_to_run):
+        # Returns the extractors the flags need, together with those of --extract, or None to run all of TUPLE_EXTRACTORS.
+        # All of them are run unless a flag asks for something in particular, as the summary of every webpage shows all the
+        # counts, and --write, --ndjson, and --watch use everything found
+        list_extractors = []
+        if (self.__flag_emails):
+            list_extractors.append("emails")
+        if (self.__flag_hyperlinks):
+            list_extractors.append("hyperlinks")
+        if (self.__flag_images) or (self.__int_verify_concurrency > 0):
+            list_extractors.append("images")
+        if (self._is_plaintext_needed() and (Portan.__near_duplicates == None)) or (self.__flag_terms):
+            list_extractors.append("plaintext")
+        if (self._find_argument(list_arguments, "--crawl")):
+            list_extractors += ["hyperlinks", "images"]
+
+        if (len(list_extractors) == 0) or (self.__flag_write) or (self._find_argument(list_arguments, "--ndjson")) or\
+            (self._find_argument(list_arguments, "--watch")):
+            if (len(list_extractors_to_run) == 0):
+                return None
+            list_extractors = list(Portan.TUPLE_EXTRACTORS)
+
+        # --near-duplicates fingerprints the plaintext, but does not ask for anything that would otherwise not be found
+        if (Portan.__near_duplicates != None):
+            list_extractors.append("plaintext")
+
+        return self._get_required_extractors(tuple(list_extractors + list_extractors_to_run))
+
+
+    # Determine whether the flags need the plaintext of the webpages to be kept once it has been counted
+    def _is_plaintext_needed(self):
+        return self.__flag_plaintext or self.__flag_search or self.__flag_write or (Portan.__search_index != None) or\
+            (Portan.__near_duplicates != None)
+
+
+    def get(self, string_received_url, bool_is_verbose = False, int_max_bytes = 0, tuple_extractors = None):
+        # Retrieve the data from the web, or the cache
         self.__log("Retrieve Server Data...", bool_is_verbose)
         try:
-            file_object = urllib.request.urlopen(string_received_url)
+            tuple_fetched_webpage = self._fetch_webpage(string_received_url, int_max_bytes)
         except urllib.error.URLError as error:
             print(error.reason)
             return None
 
-        # Set the webpage data
-        self.__log("Extract Website Data...", bool_is_verbose)
-        self.__string_provided_url = string_received_url
-        self.__string_status_code = file_object.getcode()
-        self.__string_returned_webpage = file_object.read().decode().replace("\n", "", -1)    # Remove all newlines as well, gets a few more tags later on
-        
-        # Extract the necessary header information
-        self.__log("Extract Header Data...", bool_is_verbose)
-        self.__dict_header_info = file_object.info()
-        self._get_webpage_information()
+        # Analyze the downloaded webpage, running only the given extractors, and those they need, should there be any
+        self._process_fetched_webpage(string_received_url, tuple_fetched_webpage, bool_is_verbose, int_max_bytes, tuple_extractors)
+
+        return None
 
-        # Get all html tags
-        self.__log("Extract HTML, CSS, JavaScript Data...", bool_is_verbose)
-        self._find_all_tags()
 
-        # Get normal text
-        self.__log("Extract Plaintext...", bool_is_verbose)
-        self._find_all_text()
+    # Not supposed to be called
+    def _fetch_webpage(self, string_received_url, int_max_bytes, dict_request_headers = None):
+        # Records the download as the fetch stage, with the bytes received, should there be a profiler
+        if (Portan.__profiler == None):
+            return self._fetch_webpage_uncounted(string_received_url, int_max_bytes, dict_request_headers)
 
-        # Get all hyperlinks
-        self.__log("Extract Hyperlinks...", bool_is_verbose)
-        self._find_all_hyperlinks()
+        float_wall_start = time.perf_counter()
+        float_cpu_start = time.thread_time()
+        tuple_fetched_webpage = self._fetch_webpage_uncounted(string_received_url, int_max_bytes, dict_request_headers)
+        Portan.__profiler.add_stage("fetch", time.perf_counter() - float_wall_start, time.thread_time() - float_cpu_start,\
+            0 if (tuple_fetched_webpage[2] == None) else len(tuple_fetched_webpage[2]), 1)
 
-        # Get all emails
-        self.__log("Extract Emails...\n", bool_is_verbose)
-        self._find_all_emails()
+        return tuple_fetched_webpage
 
-        # Get all images
-        self.__log("Extract Images...\n", bool_is_verbose)
-        self._find_all_images()
 
-        return None
+    # Not supposed to be called
+    def _fetch_webpage_uncounted(self, string_received_url, int_max_bytes, dict_request_headers = None):
+        # Returns the status code, the headers, the body, and the cache entry of the webpage. The cache entry
+        # is only given, in place of the body, should the cached webpage still be up to date. The request headers,
+        # such as those of --watch, are only sent without a cache, as the cache asks the server itself
+        self._check_robots_rules(string_received_url)
+        http_cache = Portan.__http_cache
+        if (http_cache == None):
+            int_status_code, dict_header_info, bytes_webpage = self._get_connection_pool().fetch(string_received_url, dict_request_headers,\
+                int_max_bytes=int_max_bytes, bool_text_only=True)
+            return int_status_code, dict_header_info, bytes_webpage, None
+
+        # Use the cached webpage without asking the server, should it have been cached only recently
+        dict_cache_entry = http_cache.lookup(string_received_url)
+        if (dict_cache_entry != None) and (dict_cache_entry["bool_is_fresh"]):
+            return dict_cache_entry["status_code"], None, None, dict_cache_entry
+
+        # Otherwise ask the server to only send the webpage should it have changed
+        int_status_code, dict_header_info, bytes_webpage = self._get_connection_pool().fetch(string_received_url,\
+            http_cache.get_conditional_headers(dict_cache_entry), int_max_bytes=int_max_bytes, bool_text_only=True)
+        if (int_status_code == 304) and (dict_cache_entry != None):
+            http_cache.revalidate(string_received_url, dict_cache_entry, dict_header_info)
+            return dict_cache_entry["status_code"], dict_header_info, None, dict_cache_entry
+
+        return int_status_code, dict_header_info, bytes_webpage, None
 
 
     # Not supposed to be called
-    def _get_webpage_information(self):
-        # Parse the webpage information into the required variables
-        self.__string_last_modified = self.__dict_header_info["Last-Modified"]
-        self.__string_content_language = self.__dict_header_info["Content-language"]
-        self.__string_current_date = self.__dict_header_info["Date"]
-        self.__string_content_type = self.__dict_header_info["Content-Type"]
-        self.__string_content_length_bytes = self.__dict_header_info["Content-Length"]
+    def _check_robots_rules(self, string_received_url):
+        # Raises a URLError, as a failed download would, should robots.txt be obeyed and not allow the url
+        if (Portan.__robots_rules != None) and (not Portan.__robots_rules.is_allowed(string_received_url)):
+            raise urllib.error.URLError("Disallowed by robots.txt")
 
         return None
 
 
-    # print the details to the screen
-    def display_details(self, bool_no_output = False):
-        # Print the required data to the screen if allowed
-        if(bool_no_output):
+    # Not supposed to be called
+    def _process_fetched_webpage(self, string_received_url, tuple_fetched_webpage, bool_is_verbose, int_max_bytes, tuple_extractors = None):
+        # Analyze the webpage returned by _fetch_webpage, or reuse the cached analysis should it not have changed
+        int_status_code, dict_header_info, bytes_webpage, dict_cache_entry = tuple_fetched_webpage
+        if (dict_cache_entry != None):
+            self.__log("Use Cached Data...", bool_is_verbose)
+            self._run_stage("cache", lambda: self._restore_cache_entry(string_received_url, dict_cache_entry, bool_is_verbose), 0)
             return None
 
-        # Print the URL Accessed & Header information
-        print("\n\nACCESSED: \t\t%s\nSTATUS CODE: \t\t%s\nLAST MODIFIED: \t\t%s\nDATE ACCESSED: \t\t%s\nCONTENT TYPE: \t\t%s\nCONTENT LANGUAGE: \t%s\nRECEIVED BYTES: \t%s\n\n" \
-            % (self.__string_provided_url, self.__string_status_code, self.__string_last_modified, self.__string_current_date, self.__string_content_type, self.__string_content_language,self.__string_content_length_bytes))
+        string_webpage = self._run_stage("decode", lambda: self._decode_webpage(bytes_webpage, dict_header_info), len(bytes_webpage))
+        self.process_webpage(string_received_url, int_status_code, dict_header_info, string_webpage, bool_is_verbose, tuple_extractors)
 
-        # Print the status information on found emails and hyperlinks TODO (Add in text size, reduced text_size, image links)
-        print("EMAILS: \t\t%s\nHYPERLINKS: \t\t%s\nTAGS: \t\t\t%s\nSEARCHABLE TEXT: \t%s BYTES" \
-            % (self.__int_num_emails, self.__int_num_hyperlinks, self.__int_num_html_tags, self.__int_num_text))
+        # Cache the webpage, unless it was cut off by --max-bytes or only partly analyzed
+        if (Portan.__http_cache != None) and (int_status_code == 200) and ((int_max_bytes == 0) or (len(bytes_webpage) < int_max_bytes)) and\
+            (tuple_extractors == None) and (self.__string_cpu_budget_stage == None) and (self.__string_near_duplicate_of == None):
+            Portan.__http_cache.store(string_received_url, int_status_code, dict_header_info, self._get_analysis(), bytes_webpage)
 
         return None
 
 
-    # Find all the emails in the text
-    def _find_all_emails(self):
-        # Create the regex to identify nearly all email addresses
-        email_regex = re.compile("""(?P<full_email>
-        (?![@.,%&#\-\/*{}])                                             # To avoid false positives, such as }@font-face, avoid certain special characters 
-        ([a-zA-Z0-9\u00a1-\uffff.!#$%&’*+\/=?\^_`\{\|\}~\-]+)           # Character class that matches most nicknames
-        @                                                               # The @ sign
-        ([a-zA-Z0-9\u00a1-\uffff\-]+)                                   # Character class that matches most mail-servers
-        (\.[a-zA-Z0-9\-]+)+                                             # Character class that matches most top-level domains                                                     
-	    )""", re.VERBOSE)
+    # Not supposed to be called
+    def _set_processed_webpage(self, string_received_url, tuple_fetched_webpage, dict_analysis, int_max_bytes):
+        # Set what another process found on a webpage returned by _fetch_webpage, and cache it as _process_fetched_webpage would.
+        # Its terms are not added to the PortanTermStatistics, as the process returns the totals of all its webpages at once.
+        # The near-duplicates are only looked for here, as the fingerprints are kept by this process
+        int_status_code, dict_header_info, bytes_webpage, dict_cache_entry = tuple_fetched_webpage
+        self.__string_provided_url = string_received_url
+        self.__dict_header_info = dict_header_info
+        self._get_webpage_information()
+        self._set_analysis(dict_analysis)
+        if (Portan.__near_duplicates != None):
+            self._run_stage("fingerprint", self._find_near_duplicate, self.__int_num_text, lambda: int(self.__string_near_duplicate_of != None))
 
-        # Search the member variable for emails
-        list_found_emails = self._from_tuple_to_list(email_regex.findall(self.__string_returned_webpage))
+        if (Portan.__http_cache != None) and (int_status_code == 200) and ((int_max_bytes == 0) or (len(bytes_webpage) < int_max_bytes)) and\
+            (self.__tuple_extracted == Portan.TUPLE_EXTRACTORS) and (self.__string_cpu_budget_stage == None):
+            Portan.__http_cache.store(string_received_url, int_status_code, dict_header_info, dict_analysis, bytes_webpage)
 
-        # Remove any duplicates
-        list_found_emails = self._remove_list_duplicates(list_found_emails)
+        return None
 
-        # With some creative (&& Repetive coding - should improve this later)
-        # it is possible to remove any urls that were incorrectly recognized as emails
-        # thanks to the existence of sets. Not implemented here, though
 
-        # Determine whether any information was found
-        if (len(list_found_emails) > 0):
-            self.__list_emails = list_found_emails
+    # Not supposed to be called
+    def _restore_cache_entry(self, string_received_url, dict_cache_entry, bool_is_verbose):
+        # Set the cached analysis, or analyze the cached body again should the analysis lack the plaintext or
+        # tags, which --stream only keeps when they are needed, or the terms, which are only counted when needed.
+        # Only part of a near-duplicate is analyzed, so the cached analysis is then left as it was
+        dict_header_info = Portan.__http_cache.get_headers(dict_cache_entry)
+        dict_analysis = dict_cache_entry["analysis"]
+        if (dict_analysis["plaintext"] == None) or (dict_analysis["html_tags"] == None) or\
+            ((Portan.__term_statistics != None) and (dict_analysis.get("terms") == None)):
+            self.process_webpage(string_received_url, dict_cache_entry["status_code"], dict_header_info,\
+                self._decode_webpage(Portan.__http_cache.read_body(string_received_url), dict_header_info), bool_is_verbose)
+            if (self.__string_near_duplicate_of == None):
+                Portan.__http_cache.update_analysis(string_received_url, dict_cache_entry, self._get_analysis())
+            return None
 
-        # Set the email information
-        self.__int_num_emails = len(list_found_emails)
+        self.__string_provided_url = string_received_url
+        self.__dict_header_info = dict_header_info
+        self._get_webpage_information()
+        self._set_analysis(dict_analysis)
+        if (Portan.__near_duplicates != None):
+            self._run_stage("fingerprint", self._find_near_duplicate, self.__int_num_text, lambda: int(self.__string_near_duplicate_of != None))
+        if (Portan.__term_statistics != None) and (self.__string_near_duplicate_of == None):
+            Portan.__term_statistics.add_totals(self.__dict_terms)
 
         return None
 
 
-    # Find all the hyperlinks in the text
-    def _find_all_hyperlinks(self):
-        # Create a regex to identify nearly all hyperlinks, not only in the text, but also in the <a> tags
-        # Create regex to find all links containing https or https
-        hyperlink_regex = re.compile("""(?P<full_url>
-            # URLS are very peculiar and quite a few have been made. We can't just match www.google.com, as github.com also exits.
-            # Additionally there are protocosl and ports sometimes specified as well, for example https://www.google.com, or localhost:8080.
-            # Urls can also not start with special characters, such as @.,%&#-
-            # This regex will try and find all of them given these conditions.
-
-            (?![@.,%&#\-]+)                                                 # Match only if it doesn't match with a special character
-            (?P<protocol>(http|https)\://)                                  # Optional schemes that indicate protocols and "://"; matches minimally   ;removed \w{2,10}
-            ([a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,$+_~]+?)                    # Host names must be at least one character long, but will be separated by periods
-            (\.[a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,$+_~]+?)                  # Host names must be at least one character long, but will be separated by periods
-            (\.[a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,$+_~]+?)                  # Host names must be at least one character long, but will be separated by periods             
-            (?![@])                                                         # Matches only if the next character is not @; prevent recognizing emails
-            (?(protocol)((:\d)+))?                                          # Port matching only if there was a protocol
-            ([a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,\/$+_~]+)                   # The path of the url can contain any number of special characters
-            (?![.,?!\-])                                                    # The path cannot end on .,?!-            
-        )""", re.VERBOSE | re.UNICODE)
-
-        # Create regex to find partial hyperlinks located in the anchor tag (<a href="...">)
-        a_href_regex = re.compile("""(?P<a_href_urls>
-            href=(["'])(.*?)(["'])                                          # Find only the text witihn the <a href=""> parts of the tag
-        )""", re.VERBOSE)
+    # Return everything found on the webpage as a dictionary that can be stored as json
+    def _get_analysis(self):
+        # The plaintext and the tags are None should they not have been kept
+        return {"status_code": self.__string_status_code, "emails": self.__list_emails, "hyperlinks": self.__list_hyperlinks,\
+            "images": self.__list_image_hyperlinks, "html_tags": self.__list_html_tags, "plaintext": self.__string_webpage_plain_text,\
+            "num_emails": self.__int_num_emails, "num_hyperlinks": self.__int_num_hyperlinks, "num_images": self.__int_num_images,\
+            "num_html_tags": self.__int_num_html_tags, "num_text": self.__int_num_text, "cpu_budget_stage": self.__string_cpu_budget_stage,\
+            "image_sources": self.__list_image_sources, "terms": self.__dict_terms, "extractors": self.__tuple_extracted,\
+            "extracted": self.__dict_extracted}
+
+
+    # Set everything found on a webpage from a dictionary returned by _get_analysis
+    def _set_analysis(self, dict_analysis):
+        self.__string_status_code = dict_analysis["status_code"]
+        self.__list_emails = dict_analysis["emails"]
+        self.__list_hyperlinks = dict_analysis["hyperlinks"]
+        self.__list_image_hyperlinks = dict_analysis["images"]
+        self.__list_html_tags = dict_analysis["html_tags"]
+        self.__string_webpage_plain_text = dict_analysis["plaintext"]
+        self.__int_num_emails = dict_analysis["num_emails"]
+        self.__int_num_hyperlinks = dict_analysis["num_hyperlinks"]
+        self.__int_num_images = dict_analysis["num_images"]
+        self.__int_num_html_tags = dict_analysis["num_html_tags"]
+        self.__int_num_text = dict_analysis["num_text"]
+        self.__string_cpu_budget_stage = dict_analysis.get("cpu_budget_stage")
+        self.__list_image_sources = dict_analysis.get("image_sources", [])
+        self.__dict_terms = dict_analysis.get("terms")
+        self.__tuple_extracted = tuple(dict_analysis.get("extractors", Portan.TUPLE_EXTRACTORS))
+        self.__dict_extracted = dict_analysis.get("extracted", {})
 
-        # Search the member variable for hyperlinks
-        list_found_hyperlinks = self._from_tuple_to_list(hyperlink_regex.findall(self.__string_returned_webpage))
-        list_local_hyperlinks = self._from_tuple_to_list(a_href_regex.findall("".join(self.__list_html_tags)))
-        list_local_partial_hyperlinks = []
-
-        # Remove the unnecessary parts of the links & remove any complete links, leaving only partial links
-        # This might be sketchy at best, but find the base-form of the link since it seems as if most websites link their
-        # images to the base hyperlink
-        string_base_provided_url = (\
-            re.compile("""(http(s)?:\/\/)([a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&,$+_~]+)\.([a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&,$+_~]+)\.([a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&,$+_~]+)""", \
-            re.VERBOSE).search(self.__string_provided_url).group(0))
-        for element in list_local_hyperlinks:
-            string_new_element = element[6:len(element)-1]
-            if not (str(string_new_element).startswith(r"//") or \
-                str(string_new_element).startswith("http")):
-                if not (str(string_new_element).startswith("/")):
-                    string_new_element = r"/" + string_new_element
-                # Add the links
-                list_local_partial_hyperlinks.append(string_base_provided_url + string_new_element)
-
-        # Add the new links to the found hyperlinks
-        list_found_hyperlinks += list_local_partial_hyperlinks
-        list_local_partial_hyperlinks = []
-
-        # Remove duplicates
-        list_found_hyperlinks = self._remove_list_duplicates(list_found_hyperlinks)
+        return None
 
-        # Determine whether any hyperlinks were found and update the member variables accordingly
-        if (len(list_found_hyperlinks)):
-            self.__list_hyperlinks = list_found_hyperlinks
 
-        # Set the hyperlink information
-        self.__int_num_hyperlinks = len(list_found_hyperlinks)
+    # Analyze a webpage that has already been downloaded, running only the given extractors (and those they need), or all of them
+    def process_webpage(self, string_received_url, int_status_code, dict_header_info, string_webpage, bool_is_verbose = False,\
+        tuple_extractors = None):
+        # Set the webpage data
+        self.__log("Extract Website Data...", bool_is_verbose)
+        self._reset_webpage()
+        self.__string_provided_url = string_received_url
+        self.__string_status_code = int_status_code
+        self.__string_returned_webpage = string_webpage.replace("\n", " ", -1)   # Make all newlines spaces, so that tags and hyperlinks are on one line, and attributes stay apart
+        self.__tuple_extracted = self._get_required_extractors(tuple_extractors)
+        
+        # Extract the necessary header information
+        self.__log("Extract Header Data...", bool_is_verbose)
+        self.__dict_header_info = dict_header_info
+        self._run_stage("headers", self._get_webpage_information, 0)
+
+        # Should the webpage use up its CPU budget, the stage it is in is stopped, and the stages after it are not run
+        self._start_cpu_budget()
+        try:
+            # Every extractor is run after the extractors it needs, so that whatever they found is there to be used. Nothing
+            # more is found on a near-duplicate once its plaintext has been fingerprinted, see _find_near_duplicate()
+            int_webpage_size = len(self.__string_returned_webpage)
+            for int_extractor, string_extractor in enumerate(self.__tuple_extracted):
+                self._run_extractor(string_extractor, int_webpage_size, bool_is_verbose)
+                if (self.__string_near_duplicate_of != None):
+                    self.__tuple_extracted = self.__tuple_extracted[:int_extractor + 1]
+                    break
+        except PortanCpuBudgetExceeded as error:
+            self._stop_at_cpu_budget(error.string_stage, bool_is_verbose)
+
+        # Release the webpage and its tokens once everything has been found, and the tags should they only have been
+        # needed to find the hyperlinks
+        self.__float_cpu_deadline = None
+        self.__string_returned_webpage = None
+        self.__tuple_tokenized_webpage = (None, [], [])
+        if (tuple_extractors != None) and ("html_tags" not in tuple_extractors):
+            self.__list_html_tags = None
 
         return None
 
 
-    # Find all images
-    def _find_all_images(self):
-        # Create a regex that will search the list of hyperlinks to scan for any images
-        image_regex = re.compile("""(?P<image_hyperlinks>
-            (.+?.jpg)|                                  # JPEGS
-            (.+?.jpeg)|                                 # JPEGS
-            (.+?.gif)|                                  # GIFS
-            (.+?.png)|                                  # PNGS
-            (.+?.tiff)|                                 # TIFF
-            (.+?.jpg)|                                  # JPEGS
-            (.+?.bmp)                                   # BMP
-        )""", re.VERBOSE | re.UNICODE | re.IGNORECASE)
+    # Not supposed to be called
+    def _run_extractor(self, string_extractor, int_webpage_size, bool_is_verbose):
+        # Runs a single extractor as its own stage. The tags and the plaintext share the tokens of the webpage, which are only
+        # split once whichever of them needs them first, see _tokenize_webpage()
+        if (string_extractor == "html_tags"):
+            self.__log("Extract HTML, CSS, JavaScript Data...", bool_is_verbose)
+            self._run_stage("tags", self._find_all_tags, int_webpage_size, lambda: self.__int_num_html_tags)
+        elif (string_extractor == "plaintext"):
+            self.__log("Extract Plaintext...", bool_is_verbose)
+            self._run_stage("text", self._find_all_text, int_webpage_size, lambda: self.__int_num_text)
+
+            # Look for a webpage seen before with nearly the same text, before any terms are counted for a near-duplicate
+            if (Portan.__near_duplicates != None):
+                self.__log("Fingerprint Plaintext...", bool_is_verbose)
+                self._run_stage("fingerprint", self._find_near_duplicate, self.__int_num_text, lambda: int(self.__string_near_duplicate_of != None))
+                if (self.__string_near_duplicate_of != None):
+                    return None
+
+            # Count the terms of the normal text
+            if (Portan.__term_statistics != None):
+                self.__log("Count Terms...", bool_is_verbose)
+                self._run_stage("terms", self._find_all_terms, self.__int_num_text, lambda: self.__dict_terms["words"])
+        elif (string_extractor == "hyperlinks"):
+            self.__log("Extract Hyperlinks...", bool_is_verbose)
+            self._run_stage("hyperlinks", self._find_all_hyperlinks, int_webpage_size, lambda: self.__int_num_hyperlinks)
+        elif (string_extractor == "emails"):
+            self.__log("Extract Emails...\n", bool_is_verbose)
+            self._run_stage("emails", self._find_all_emails, int_webpage_size, lambda: self.__int_num_emails)
+        elif (string_extractor == "images"):
+            self.__log("Extract Images...\n", bool_is_verbose)
+            self._run_stage("images", self._find_all_images, sum([len(string_hyperlink) for string_hyperlink in self.__list_hyperlinks]),\
+                lambda: self.__int_num_images)
+        else:
+            # Any other extractor is given its inputs, and what it returns is kept under its name
+            tuple_inputs, function_extract = self._get_extractors()[string_extractor]
+            self.__log("Extract " + string_extractor + "...", bool_is_verbose)
+            list_inputs = [self._get_extractor_input(string_input) for string_input in tuple_inputs]
+            self.__dict_extracted[string_extractor] = self._run_stage(string_extractor, lambda: function_extract(self, *list_inputs),\
+                int_webpage_size, lambda: self._count_extracted(string_extractor))
 
-        # Search the hyperlinks
-        list_images = self._from_tuple_to_list(image_regex.findall("\n".join(self.__list_hyperlinks)))
+        return None
 
-        # Remove any duplicates
-        list_images = self._remove_list_duplicates(list_images)
 
-        # Set the image lists, and the number of images found
-        self.__list_image_hyperlinks = list_images
-        self.__int_num_images = len(list_images)
+    # Not supposed to be called
+    def _get_extractor_input(self, string_input):
+        # Returns what an extractor is given for one of its inputs, where the lists that were not found are empty
+        if (string_input == "url"):
+            return self.__string_provided_url
+        elif (string_input == "headers"):
+            return self.__dict_header_info
+        elif (string_input == "webpage"):
+            return self.__string_returned_webpage
+        elif (string_input == "html_tags"):
+            return self.__list_html_tags
+        elif (string_input == "plaintext"):
+            return self.__string_webpage_plain_text
+        elif (string_input == "hyperlinks"):
+            return self.__list_hyperlinks if (self.__int_num_hyperlinks > 0) else []
+        elif (string_input == "emails"):
+            return self.__list_emails if (self.__int_num_emails > 0) else []
+        elif (string_input == "images"):
+            return self.__list_image_hyperlinks if (self.__int_num_images > 0) else []
+
+        return self.__dict_extracted.get(string_input)
 
-        return None
 
+    # Not supposed to be called
+    def _count_extracted(self, string_extractor):
+        # What an extractor found is counted as its number of items, or as one should it be a single value
+        value_extracted = self.__dict_extracted.get(string_extractor)
+        if (value_extracted == None):
+            return 0
+        if (isinstance(value_extracted, (list, tuple, dict, set))):
+            return len(value_extracted)
 
-    # Display all emails
-    def display_emails(self, bool_no_output = False):
-        if (not bool_no_output):
-            # Display a list of the emails and a menu
-            print("\n\nEMAILS:\n-------")
+        return 1
 
-            # Cycle through the image list
-            for element in self.__list_emails:
-                print(element)
 
-        return None
+    # Record the stages of every webpage analyzed from now on in the PortanProfiler, or stop recording with None
+    #   NOTE: the profiler is shared by all Portan objects, as the connection pool and the cache are
+    def set_profiler(self, profiler):
+        Portan.__profiler = profiler
 
+        return None
 
-    # Display all hyperlinks
-    def display_hyperlinks(self, bool_no_output = False):
-        if (not bool_no_output):
-            # Display a list of the emails and a menu
-            print("\n\nHYPERLINKS:\n-----------")
 
-            # Cycle through the image list
-            for element in self.__list_hyperlinks:
-                print(element)
+    # Keep every webpage downloaded from now on in the PortanHttpCache, as --cache does, or stop caching with None
+    #   NOTE: the cache is shared by all Portan objects, as the profiler is
+    def set_http_cache(self, http_cache):
+        Portan.__http_cache = http_cache
 
         return None
 
 
-    # Display all images
-    def display_images(self, bool_no_output = False):
-        if (not bool_no_output):
-            # Display a list of the emails and a menu
-            print("\n\nIMAGES:\n-------")
+    # Add the terms of every webpage analyzed from now on to the PortanTermStatistics, or stop counting them with None
+    #   NOTE: the statistics are shared by all Portan objects, as the profiler is
+    def set_term_statistics(self, term_statistics):
+        Portan.__term_statistics = term_statistics
 
-            # Cycle through the image list
-            for element in self.__list_image_hyperlinks:
-                    print(element)
         return None
 
-    # Display all plaintext
-    def display_plaintext(self, bool_no_output = False):
-        if (not bool_no_output):
-	        # Display the plaintext found on the webpage
-	        print("\n\nPLAINTEXT:\n---------")
-	        print(self.__string_webpage_plain_text)
-	
+
+    # Look for webpages nearly the same as one seen before in the PortanNearDuplicates from now on, or stop looking with None
+    #   NOTE: the fingerprints are shared by all Portan objects, as the profiler is
+    def set_near_duplicates(self, near_duplicates):
+        Portan.__near_duplicates = near_duplicates
+
         return None
 
-    # Separate the html tags from the normal text
-    def _find_html_tags(self):
-        # This function will take in the member variable containing the body of the html text
-        # and return all the tags. These can be searched for links later
 
-        list_html_tags = []
+    # Not supposed to be called
+    def _find_near_duplicate(self):
+        # Remembers the url of the webpage seen before whose plaintext is nearly the same, should there be PortanNearDuplicates.
+        # The error pages of a website are nearly the same for any url, so they are not fingerprinted. Html that was given
+        # rather than downloaded, as by analyze() and --serve, has "N/A" as its status, and is fingerprinted as well
+        if (Portan.__near_duplicates != None) and (self.__string_webpage_plain_text != None) and\
+            (not str(self.__string_status_code).startswith(("4", "5"))):
+            self.__string_near_duplicate_of = Portan.__near_duplicates.check(self.__string_provided_url, self.__string_webpage_plain_text)
 
-        # Create the regex to find all self-closing tags
-        html_self_closing_tag_regex = re.compile("""(?P<self_closing_tag>
-            (<.+?\/>)                         # Look for self-closing tags
-        )""", re.VERBOSE)
+        return None
 
-        # Create the regex to find all normal tags
-        html_tag_regex = re.compile("""(?P<pair_tags>
-            </?                                                             # Opening tag and possible / to close it
-            \w+                                                             # Immediately followed by any normal text
-            ((\s+\w+(\s*=\s*(?:".*?"|'.*?'|[\^'">\s]+))?)+\s*|\s*)          # Any number of tag attributes and values separated by any number of spaces
-            /?>                                                             # the ending of the tag - accouting for possible self-closing tags
-        )""", re.VERBOSE)
 
-        html_comment_regex = re.compile("""(?P<comment_tags>
-            (<!DOCTYPE(\s\S)?>)|                                            # Look for html document information
-            (<!--[\\s\\S]*?-->)                                              # Find only comments, but they may not be terminated as per HTML 5 spec
-        )""", re.VERBOSE)
+    # Let the analysis of every webpage from now on take at most this many seconds of CPU time, or any amount with 0
+    #   NOTE: the budget is shared by all Portan objects, as the profiler is
+    def set_cpu_budget(self, float_seconds):
+        Portan.__float_cpu_budget = float_seconds
 
-        javascript_html_regex = re.compile("""(?P<javascript_or_css_tags>
-            # Find javascript tags
-            (?P<script_tag>(<script[\s\S]*?>)                                 # Find script opening tag
-            ([\s\S]*?)                                                        # Find data witin the script tag
-            (<\/script>))?                                                    # Find the ending of the script tag
-            # Find noscript tags
-            (?P<noscript_tag>(<noscript[\s\S]*?>)                             # Find noscript openign tag
-            ([\s\S]*?)                                                        # Find the data between
-            (<\/noscript>))?                                                  # Find the ending noscript tag
-            # Find style tags
-            (?P<css_tags>(<style[\s\S]*?\/>))?                                # Find the css tag opening style which is likely self-terminating
-        )""", re.VERBOSE)
+        return None
 
-        # Use the regex accordingly
-        list_html_self_closing_tags = self._from_tuple_to_list(html_self_closing_tag_regex.findall(self.__string_returned_webpage))
-        list_html_tags = self._from_tuple_to_list(html_tag_regex.findall(self.__string_returned_webpage))
-        list_comment_tags = self._from_tuple_to_list(html_comment_regex.findall(self.__string_returned_webpage))
-        list_extra_tags = self._from_tuple_to_list(javascript_html_regex.findall(self.__string_returned_webpage))                       # Javascript and CSS tags
 
+    # Not supposed to be called
+    def _start_cpu_budget(self):
+        # The budget is measured in CPU time of the thread, so that waiting for other threads or for downloads is not counted
+        self.__float_cpu_deadline = None
+        if (Portan.__float_cpu_budget > 0):
+            self.__float_cpu_deadline = time.thread_time() + Portan.__float_cpu_budget
 
-        # Find all normal tag occurences and return them
-        list_html_tags = list_extra_tags + list_html_tags + list_html_self_closing_tags + list_comment_tags
+        return None
 
-        return list_html_tags
 
-    
-    # Separate the normal text from the html tags
-    def _find_html_text(self):
-        # This function will take in the member variable containing the body of the html text
-        # and return all the normal text. This bundle of text will be reduced and can be searched for links later
+    # Not supposed to be called
+    def _check_cpu_budget(self):
+        # Raises PortanCpuBudgetExceeded should the webpage being analyzed have used up its CPU budget. Called between
+        # the stages, and every so often within the loops of a stage
+        if (self.__float_cpu_deadline != None) and (time.thread_time() > self.__float_cpu_deadline):
+            raise PortanCpuBudgetExceeded(self.__string_current_stage)
 
-        # Find all the tags
-        list_found_html_tags = self._find_html_tags()
+        return None
 
-        # Cycle through all of the tags, and replace them with "" in the string
-        string_new_html_text = self.__string_returned_webpage
 
-        for element in list_found_html_tags:
-            string_new_html_text = string_new_html_text.replace(str(element), "", -1) # replace all
+    # Not supposed to be called
+    def _stop_at_cpu_budget(self, string_stage, bool_is_verbose):
+        # Remembers where the analysis was stopped, so that it is reported, and counts the webpage should there be a profiler
+        self.__log("Used up the CPU budget in the " + string_stage + " stage...", bool_is_verbose)
+        self.__float_cpu_deadline = None
+        self.__string_cpu_budget_stage = string_stage
+        if (Portan.__profiler != None):
+            Portan.__profiler.add_stage("cpu_budget", 0.0, 0.0, 0, 1)
 
-        return string_new_html_text
+        return None
 
 
-    # Find a list of all tags
-    def _find_all_tags(self):
-        # This function uses the _find_html_tags function to return a list of html tags that 
-        # can be perused and scanned to add more hyperlinks and emails which weren't previously found
-        self.__list_html_tags = self._find_html_tags()
-        self.__int_num_html_tags = len(self.__list_html_tags)
+    # Not supposed to be called
+    def _run_stage(self, string_stage, function_stage, int_input_size, function_count_matches = None):
+        # Runs the stage, and records it should there be a profiler
+        self.__string_current_stage = string_stage
+        self._check_cpu_budget()
+        if (Portan.__profiler == None):
+            return function_stage()
+
+        return Portan.__profiler.run_stage(string_stage, function_stage, int_input_size, function_count_matches)
+
+
+    # Return the headers, the counts, and the lists found on the webpage as a dictionary that can be written as json,
+    # together with the results of --search should bool_include_search be set
+    def get_record(self, bool_include_search = False):
+        page_result = self.get_result()
+        dict_record = {"url": page_result.url, "status_code": page_result.status_code, "last_modified": page_result.last_modified,\
+            "date": page_result.date, "content_type": page_result.content_type, "content_language": page_result.content_language,\
+            "content_length": page_result.content_length, "num_emails": self.__int_num_emails, "num_hyperlinks": self.__int_num_hyperlinks,\
+            "num_images": self.__int_num_images, "num_html_tags": self.__int_num_html_tags, "num_text": self.__int_num_text,\
+            "emails": page_result.emails, "hyperlinks": page_result.hyperlinks, "images": page_result.images,\
+            "cpu_budget_stage": self.__string_cpu_budget_stage}
+        if (self.__dict_image_probes != None):
+            dict_record["image_probes"] = dict([(string_image, {"content_type": string_content_type, "size": int_size})\
+                for string_image, (string_content_type, int_size) in self.__dict_image_probes.items()])
+        if (self.__dict_terms != None) and (Portan.__term_statistics != None):
+            dict_record["terms"] = Portan.__term_statistics.get_top(self.__dict_terms)
+        if (len(self.__dict_extracted) > 0):
+            dict_record["extracted"] = self.__dict_extracted
+        if (self.__string_near_duplicate_of != None):
+            dict_record["near_duplicate_of"] = self.__string_near_duplicate_of
+        if (bool_include_search):
+            dict_record["search"] = [string_found for string_found in self.__list_found_searched_strings if (string_found != "None")]
+
+        return dict_record
 
-        return None
 
+    # Not supposed to be called
+    def _get_required_extractors(self, tuple_extractors):
+        # Returns the given extractors together with the extractors they need, in the order they have to be run in. An extractor
+        # can only be registered once everything it needs is, so the order in which they were registered is an order that works
+        if (tuple_extractors == None):
+            return Portan.TUPLE_EXTRACTORS
 
-    # Find the html text reduced to normal plain text
-    def _find_all_text(self):
-        # This function uses the _find_html_text function to return a string of plain website text
-        # that can be perused and scanned for information.
-        self.__string_webpage_plain_text = self._find_html_text()
-        self.__int_num_text = len(self.__string_webpage_plain_text)
+        dict_extractors = self._get_extractors()
+        set_required = set()
+        list_to_check = list(tuple_extractors)
+        while (len(list_to_check) > 0):
+            string_extractor = list_to_check.pop()
+            if (string_extractor not in dict_extractors):
+                raise ValueError("Unknown extractor: " + str(string_extractor))
 
-        return None
+            if (string_extractor not in set_required):
+                set_required.add(string_extractor)
+                list_to_check += [string_input for string_input in dict_extractors[string_extractor][0] if (string_input in dict_extractors)]
 
+        return tuple([string_extractor for string_extractor in dict_extractors if (string_extractor in set_required)])
 
-    # Convert the regex tuple obtained with ".findall()" to a list with the required information
-    def _from_tuple_to_list(self, tuple_input):
-        # This function knows that the input tuple will have the complete information as the first element
-        # as such it will retrieve only first elment and return the list
-        list_to_return = []
 
-        # Get each tuple
-        for tuple_element in tuple_input:
-            # Change it to a list element and append it
-            list_to_return.append(tuple_element[0])
+    # Not supposed to be called
+    def _get_extractors(self):
+        # Returns the inputs and function of every extractor by name, in the order they were registered. The functions of the
+        # extractors of TUPLE_EXTRACTORS are None, as process_webpage() sets what they find itself, see _run_extractor()
+        if (Portan.__dict_extractors != None):
+            return Portan.__dict_extractors
 
-        return list_to_return
-    
+        Portan.__dict_extractors = {"html_tags": (("webpage",), None), "plaintext": (("webpage",), None),\
+            "hyperlinks": (("webpage", "html_tags"), None), "emails": (("webpage",), None), "images": (("hyperlinks",), None),\
+            "canonical": (("html_tags",), Portan._find_canonical_url), "meta_tags": (("html_tags",), Portan._find_meta_tags)}
 
-    # Remove any duplicates from a passed list. It will use sets to accomplish this
-    def _remove_list_duplicates(self, list_input):
-        # This function uses python's ability to change between sets and lists.
-        # With a set, duplicate information is automatically removed using approved
-        # methods which thus cut down time to improve efficiency. Downside is, this 
-        # method will take a bit of memory to do
-        list_to_return = []
+        return Portan.__dict_extractors
 
-        # convert the list to a set, and return it immediately
-        list_to_return = list(set(list_input))
 
-        return list_to_return
+    # Register an extractor that process_webpage(), analyze(), and --extract can run by its name. function_extract is given the
+    # value of every input, either one of TUPLE_EXTRACTOR_INPUTS or the name of another extractor, and returns what it found
+    #   NOTE: the extractors are shared by all Portan objects, as the profiler is, and what they return should be json
+    #         for it to be cached, sent between processes, and written by --ndjson
+    def register_extractor(self, string_name, function_extract, tuple_inputs):
+        dict_extractors = self._get_extractors()
+        if (string_name in dict_extractors) or (string_name in Portan.TUPLE_EXTRACTOR_INPUTS):
+            raise ValueError("Extractor already registered: " + str(string_name))
+        for string_input in tuple_inputs:
+            if (string_input not in dict_extractors) and (string_input not in Portan.TUPLE_EXTRACTOR_INPUTS):
+                raise ValueError("Unknown input of " + str(string_name) + ": " + str(string_input))
 
+        dict_extractors[string_name] = (tuple(tuple_inputs), lambda portan_webpage, *tuple_values: function_extract(*tuple_values))
 
-    # Find an argument in a list of arguments passed to the program
-    def _find_argument(self, list_arguments, string_item_to_find):
-        # This function takes a list of arguments passed to the program and looks to find a specified
-        # argument. Returns true if it is found, and false if not
-        bool_argument_found = False
-        
-        # Look for the argument
+        return None
+
+
+    # Return everything found on the webpage as a PortanPageResult, with None for everything that was not extracted
+    def get_result(self):
+        # Lists that were not found hold "None", which is returned as empty, and the tags and plaintext are None should
+        # they not have been kept
+        list_html_tags = self.__list_html_tags if ("html_tags" in self.__tuple_extracted) else None
+        string_plaintext = self.__string_webpage_plain_text if ("plaintext" in self.__tuple_extracted) else None
+        list_hyperlinks = None
+        list_emails = None
+        list_images = None
+        if ("hyperlinks" in self.__tuple_extracted):
+            list_hyperlinks = list(self.__list_hyperlinks) if (self.__int_num_hyperlinks > 0) else []
+        if ("emails" in self.__tuple_extracted):
+            list_emails = list(self.__list_emails) if (self.__int_num_emails > 0) else []
+        if ("images" in self.__tuple_extracted):
+            list_images = list(self.__list_image_hyperlinks)
+
+        return PortanPageResult(self.__string_provided_url, self.__string_status_code, self.__dict_header_info, list_html_tags,\
+            string_plaintext, list_hyperlinks, list_emails, list_images, self.__dict_extracted)
+
+
+    # Download and analyze a webpage chunk by chunk, so that the memory used depends on the chunk size rather than the webpage size
+    def get_streamed(self, string_received_url, bool_is_verbose = False, int_chunk_size = 65536, int_max_bytes = 0,\
+        bool_keep_plaintext = True, bool_keep_tags = True, tuple_extractors = None):
         try:
-            if (list_arguments.index(string_item_to_find)):
-                bool_argument_found = True
-        except ValueError:
-            bool_argument_found = False
+            self._check_robots_rules(string_received_url)
+        except urllib.error.URLError as error:
+            print(error.reason)
+            return None
 
-        return bool_argument_found
+        # Use the cached webpage without asking the server, should it have been cached only recently
+        http_cache = Portan.__http_cache
+        dict_cache_entry = None if (http_cache == None) else http_cache.lookup(string_received_url)
+        if (dict_cache_entry != None) and (dict_cache_entry["bool_is_fresh"]):
+            self.__log("Use Cached Data...", bool_is_verbose)
+            self._run_stage("cache", lambda: self._restore_cache_entry(string_received_url, dict_cache_entry, bool_is_verbose), 0)
+            return None
+
+        # Retrieve the data from the web, but only the headers for now
+        self.__log("Retrieve Server Data...", bool_is_verbose)
+        try:
+            pooled_response = self._run_stage("fetch", lambda: self._get_connection_pool().open(string_received_url,\
+                None if (http_cache == None) else http_cache.get_conditional_headers(dict_cache_entry), bool_text_only=True), 0, lambda: 1)
+        except urllib.error.URLError as error:
+            print(error.reason)
+            return None
+
+        # Reuse the cached analysis should the webpage not have changed
+        if (pooled_response.status == 304) and (dict_cache_entry != None):
+            pooled_response.discard()
+            http_cache.revalidate(string_received_url, dict_cache_entry, pooled_response.msg)
+            self.__log("Use Cached Data...", bool_is_verbose)
+            self._run_stage("cache", lambda: self._restore_cache_entry(string_received_url, dict_cache_entry, bool_is_verbose), 0)
+            return None
+
+        # Analyze the body while it is being downloaded, writing it to the cache as it arrives
+        file_cache_body = None
+        iterable_byte_chunks = pooled_response.iterate_chunks(int_chunk_size, int_max_bytes)
+        if (http_cache != None) and (pooled_response.status == 200):
+            file_cache_body = http_cache.open_body_writer()
+            iterable_byte_chunks = self._stream_tee_chunks(iterable_byte_chunks, file_cache_body)
+        list_bytes_read = [0]
+        if (Portan.__profiler != None):
+            iterable_byte_chunks = self._stream_count_chunks(iterable_byte_chunks, list_bytes_read)
+        try:
+            # The body is downloaded and analyzed at the same time, so both are recorded as the stream stage
+            float_wall_start = time.perf_counter()
+            float_cpu_start = time.thread_time()
+            self.process_webpage_stream(string_received_url, pooled_response.status, pooled_response.msg,\
+                iterable_byte_chunks, bool_is_verbose, bool_keep_plaintext, bool_keep_tags, tuple_extractors)
+            if (Portan.__profiler != None):
+                Portan.__profiler.add_stage("stream", time.perf_counter() - float_wall_start, time.thread_time() - float_cpu_start,\
+                    list_bytes_read[0], self.__int_num_html_tags + self.__int_num_hyperlinks + self.__int_num_emails + self.__int_num_images)
+        except urllib.error.URLError as error:
+            print(error.reason)
+            pooled_response.bool_truncated = True
+        finally:
+            pooled_response.close()
+
+        if (pooled_response.bool_truncated):
+            self.__log("Stopped after " + str(int_max_bytes) + " bytes...", bool_is_verbose)
+
+        # Cache the webpage, unless it was cut off or only partly analyzed, as a cached analysis has to have everything in it
+        if (file_cache_body != None):
+            if (pooled_response.bool_truncated) or (self.__string_cpu_budget_stage != None) or\
+                (self.__tuple_extracted != Portan.TUPLE_EXTRACTORS):
+                http_cache.discard_body_writer(file_cache_body)
+            else:
+                http_cache.store(string_received_url, pooled_response.status, pooled_response.msg, self._get_analysis(), file_body=file_cache_body)
+
+        return None
+
+
+    # Not supposed to be called
+    def _stream_count_chunks(self, iterable_byte_chunks, list_bytes_read):
+        # Pass the byte chunks on unchanged, adding their size to the first item of the list
+        for bytes_chunk in iterable_byte_chunks:
+            list_bytes_read[0] += len(bytes_chunk)
+            yield bytes_chunk
+
+        return None
+
+
+    # Not supposed to be called
+    def _stream_tee_chunks(self, iterable_byte_chunks, file_output):
+        # Pass the byte chunks on unchanged, writing each of them to the file as well
+        for bytes_chunk in iterable_byte_chunks:
+            file_output.write(bytes_chunk)
+            yield bytes_chunk
+
+        return None
+
+
+    # Analyze a webpage from an iterable of byte chunks, such as the chunks of a download still in progress, running only the
+    # given extractors (and those they need), or all of them
+    def process_webpage_stream(self, string_received_url, int_status_code, dict_header_info, iterable_byte_chunks, bool_is_verbose = False,\
+        bool_keep_plaintext = True, bool_keep_tags = True, tuple_extractors = None):
+        # Every chunk is decoded, split into tags and plaintext, and scanned for hyperlinks and emails before the
+        # next one is read. Only what was found is kept, together with the plaintext and the tags should they be needed
+        self.__log("Extract Website Data...", bool_is_verbose)
+        self._reset_webpage()
+        self.__string_provided_url = string_received_url
+        self.__string_status_code = int_status_code
+        self.__tuple_extracted = self._get_required_extractors(tuple_extractors)
+
+        # Extract the necessary header information
+        self.__log("Extract Header Data...", bool_is_verbose)
+        self.__dict_header_info = dict_header_info
+        self._get_webpage_information()
+
+        # Only look for what the extractors need. The tags are kept for the other extractors that are given them as well,
+        # and dropped at the end should they not have been asked for, as process_webpage() does
+        bool_find_tags = "html_tags" in self.__tuple_extracted
+        bool_find_text = "plaintext" in self.__tuple_extracted
+        bool_find_hyperlinks = "hyperlinks" in self.__tuple_extracted
+        bool_find_emails = "emails" in self.__tuple_extracted
+        bool_find_images = "images" in self.__tuple_extracted
+        bool_keep_tags = bool_find_tags and (bool_keep_tags or (tuple_extractors != None))
+        bool_keep_plaintext = bool_find_text and bool_keep_plaintext
+        bool_tokenize = bool_find_tags or bool_find_text or bool_find_hyperlinks or bool_find_emails
+
+        self.__log("Extract HTML, CSS, JavaScript Data, Plaintext, Hyperlinks, and Emails...", bool_is_verbose)
+        html_tokenizer = PortanHtmlTokenizer()
+
+        # Dictionaries remove duplicates while keeping the order in which things were found. The hyperlinks of the tags, and the
+        # emails of mailto: hyperlinks and of the plaintext, are kept apart and added at the end, so that everything is in the
+        # order process_webpage() finds it in
+        dict_found_hyperlinks = {}
+        dict_found_tag_hyperlinks = {}
+        dict_found_emails = {}
+        dict_found_mailto_emails = {}
+        dict_found_obfuscated_emails = {}
+        dict_found_image_sources = {}
+        list_html_tags = []
+        list_tag_parts = []
+        list_text_segments = []
+        int_num_html_tags = 0
+        int_num_text = 0
+        page_terms = None
+        if (Portan.__term_statistics != None) and (bool_find_text):
+            page_terms = PortanTermStatistics(*Portan.__term_statistics.get_settings())
+
+        # Should the webpage use up its CPU budget, the rest of it is not downloaded, keeping what was found until then
+        self.__string_current_stage = "stream"
+        self._start_cpu_budget()
+        try:
+            for string_chunk, bool_is_final in self._stream_scan_chunks(self._stream_decoded_chunks(iterable_byte_chunks, dict_header_info)):
+                self._check_cpu_budget()
+
+                # Scan the chunk for complete hyperlinks and emails
+                if (bool_find_hyperlinks):
+                    for string_hyperlink in self._scan_hyperlinks(string_chunk):
+                        dict_found_hyperlinks[self._resolve_hyperlink(string_hyperlink)] = None
+                if (bool_find_emails):
+                    for string_email in self._scan_emails(string_chunk, False):
+                        dict_found_emails[string_email] = None
+                    for string_email in self._scan_mailto_emails(string_chunk):
+                        dict_found_mailto_emails[string_email] = None
+                if (not bool_tokenize):
+                    continue
+
+                # Split the chunk into tags and plaintext, and look for the hyperlinks of the href attributes of the tags
+                for int_token_kind, string_token in html_tokenizer.feed(string_chunk, bool_is_final):
+                    if (int_token_kind == PortanHtmlTokenizer.TOKEN_TEXT):
+                        if (bool_find_text):
+                            int_num_text += len(string_token)
+                        if (bool_keep_plaintext):
+                            list_text_segments.append(string_token)
+                        if (page_terms != None):
+                            page_terms.feed(string_token)
+                        if (bool_find_emails):
+                            for string_email in self._scan_obfuscated_emails(string_token):
+                                dict_found_obfuscated_emails[string_email] = None
+                    elif (int_token_kind == PortanHtmlTokenizer.TOKEN_TAG_PART):
+                        if (bool_keep_tags):
+                            list_tag_parts.append(string_token)
+                    else:
+                        if (bool_find_tags):
+                            int_num_html_tags += 1
+                        if (bool_find_hyperlinks) and (("ref" in string_token) or ("REF" in string_token)):
+                            for string_hyperlink in self._find_tag_hyperlinks(string_token):
+                                dict_found_tag_hyperlinks[string_hyperlink] = None
+                        if (bool_find_images):
+                            for string_image_source in self._find_image_sources(string_token):
+                                dict_found_image_sources[string_image_source] = None
+                        if (bool_keep_tags):
+                            list_tag_parts.append(string_token)
+                            list_html_tags.append("".join(list_tag_parts))
+                            list_tag_parts = []
+        except PortanCpuBudgetExceeded as error:
+            self._stop_at_cpu_budget(error.string_stage, bool_is_verbose)
+        self.__float_cpu_deadline = None
+
+        # Set the tags and the plaintext, or None should they not have been kept
+        self.__int_num_html_tags = int_num_html_tags
+        self.__int_num_text = int_num_text
+        self.__list_html_tags = list_html_tags if (bool_keep_tags) else None
+        self.__string_webpage_plain_text = "".join(list_text_segments) if (bool_keep_plaintext) else None
+
+        # Look for a webpage seen before with nearly the same text, now that all of it is there
+        if (Portan.__near_duplicates != None) and (bool_find_text):
+            self._run_stage("fingerprint", self._find_near_duplicate, int_num_text, lambda: int(self.__string_near_duplicate_of != None))
+
+        # Count the words that were left for the text that was to follow, and add the terms of the webpage to the totals,
+        # unless it is a near-duplicate
+        if (page_terms != None):
+            page_terms.feed("", True)
+            self.__dict_terms = page_terms.get_totals()
+            if (self.__string_near_duplicate_of == None):
+                Portan.__term_statistics.add_totals(self.__dict_terms)
+
+        # Set the hyperlink and email information, without the hyperlinks that turned out not to be valid
+        dict_found_hyperlinks.update(dict_found_tag_hyperlinks)
+        dict_found_hyperlinks.pop(None, None)
+        dict_found_emails.update(dict_found_mailto_emails)
+        dict_found_emails.update(dict_found_obfuscated_emails)
+        if (len(dict_found_hyperlinks) > 0):
+            self.__list_hyperlinks = list(dict_found_hyperlinks)
+        self.__int_num_hyperlinks = len(dict_found_hyperlinks)
+        if (len(dict_found_emails) > 0):
+            self.__list_emails = list(dict_found_emails)
+        self.__int_num_emails = len(dict_found_emails)
+
+        # Get all images
+        if (bool_find_images):
+            self.__log("Extract Images...\n", bool_is_verbose)
+            self.__list_image_sources = list(dict_found_image_sources)
+            self._find_all_images(False)
+
+        # Run the other extractors on what was found, unless the CPU budget was used up. The webpage itself is never
+        # there as a whole, so extractors that are given it get None
+        if (self.__string_cpu_budget_stage == None):
+            for string_extractor in self.__tuple_extracted:
+                if (string_extractor not in Portan.TUPLE_EXTRACTORS):
+                    self._run_extractor(string_extractor, int_num_text, bool_is_verbose)
+        if (tuple_extractors != None) and ("html_tags" not in tuple_extractors):
+            self.__list_html_tags = None
+
+        return None
+
+
+    # Not supposed to be called
+    def _stream_decoded_chunks(self, iterable_byte_chunks, dict_header_info):
+        # Decode the byte chunks one by one, so a character split over two chunks is decoded once both have arrived,
+        # and make all newlines spaces as well, as process_webpage does. The chunks are only decoded once the first 1024
+        # bytes have arrived, as the <meta charset> is looked for in those
+        list_first_chunks = []
+        decoder = None
+        for bytes_chunk in iterable_byte_chunks:
+            if (decoder == None):
+                list_first_chunks.append(bytes_chunk)
+                bytes_chunk = b"".join(list_first_chunks)
+                if (len(bytes_chunk) < 1024):
+                    continue
+                decoder = codecs.getincrementaldecoder(self._get_charset(dict_header_info, bytes_chunk[:1024]))("replace")
+            yield decoder.decode(bytes_chunk).replace("\n", " ")
+
+        # Should the whole webpage be shorter than 1024 bytes, it is decoded at once
+        bytes_chunk = b""
+        if (decoder == None):
+            bytes_chunk = b"".join(list_first_chunks)
+            decoder = codecs.getincrementaldecoder(self._get_charset(dict_header_info, bytes_chunk))("replace")
+        yield decoder.decode(bytes_chunk, True).replace("\n", " ")
+
+        return None
+
+
+    # Decode a downloaded webpage with its charset, see _get_charset, replacing whatever can not be decoded
+    def _decode_webpage(self, bytes_webpage, dict_header_info):
+        return bytes_webpage.decode(self._get_charset(dict_header_info, bytes_webpage[:1024]), "replace")
+
+
+    # Not supposed to be called
+    def _get_charset(self, dict_header_info, bytes_webpage_start):
+        # Returns the charset given by the byte order mark, the Content-Type, or a <meta charset> or <meta http-equiv> within
+        # the first 1024 bytes of the webpage, in that order as browsers look for it, and UTF-8 should there be none
+        for bytes_mark, string_charset in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+            if (bytes_webpage_start.startswith(bytes_mark)):
+                return string_charset
+
+        if (Portan.__charset_regex == None):
+            Portan.__charset_regex = re.compile(rb"""
+                charset\s*=\s*["']?\s*                                      # The charset parameter, quoted or not
+                ([a-zA-Z0-9._:\-]+)                                         # The name of the charset
+            """, re.VERBOSE | re.IGNORECASE)
+            Portan.__meta_charset_regex = re.compile(rb"""
+                <meta\s[^>]*?                                               # A <meta charset> or <meta http-equiv="Content-Type"> tag
+                charset\s*=\s*["']?\s*                                      # The charset parameter, quoted or not
+                ([a-zA-Z0-9._:\-]+)                                         # The name of the charset
+            """, re.VERBOSE | re.IGNORECASE)
+
+        string_content_type = None if (dict_header_info == None) else dict_header_info.get("Content-Type")
+        match_charset = None
+        bool_is_meta_charset = False
+        if (string_content_type != None):
+            match_charset = Portan.__charset_regex.search(string_content_type.encode("latin-1", "replace"))
+        if (match_charset == None):
+            match_charset = Portan.__meta_charset_regex.search(bytes_webpage_start)
+            bool_is_meta_charset = True
+        if (match_charset == None):
+            return "utf-8"
+
+        # Unknown charsets, and codecs that are not text encodings such as hex or zlib, are decoded as UTF-8, and Latin-1 and
+        # ASCII as windows-1252, as browsers do. Only text encodings can encode a str, the others raise a LookupError or a
+        # TypeError. A <meta> that could be read as ASCII can not be right about UTF-16 or UTF-32, so browsers take those as
+        # UTF-8 as well
+        try:
+            string_charset = codecs.lookup(match_charset.group(1).decode("ascii")).name
+            "".encode(string_charset)
+        except (LookupError, TypeError):
+            return "utf-8"
+        if (string_charset in ("iso8859-1", "ascii")):
+            return "cp1252"
+        if (bool_is_meta_charset) and (string_charset.startswith(("utf-16", "utf-32"))):
+            return "utf-8"
+
+        return string_charset
+
+
+    # Not supposed to be called
+    def _stream_scan_chunks(self, iterable_string_chunks, int_max_carry = 65536):
+        # Hyperlinks and emails can not contain whitespace, quotes, or tag brackets, so every chunk is cut after the
+        # last of those and the rest is carried over to the next chunk. This way nothing is split in two.
+        # Yields (chunk, whether it is the last one) pairs
+        string_carry = ""
+        for string_chunk in iterable_string_chunks:
+            string_chunk = string_carry + string_chunk
+            int_cut_position = max(string_chunk.rfind(string_boundary) for string_boundary in " \t\r<>\"'") + 1
+            if (int_cut_position == 0) and (len(string_chunk) > int_max_carry):
+                int_cut_position = len(string_chunk)
+
+            string_carry = string_chunk[int_cut_position:]
+            if (int_cut_position > 0):
+                yield (string_chunk[:int_cut_position], False)
+
+        yield (string_carry, True)
+
+        return None
+
+
+    # Fetch and analyze a list of urls concurrently, reporting every webpage as soon as it is analyzed
+    def batch(self, iterable_urls, int_concurrency = 8, bool_is_verbose = False, keyword_search = None, function_on_webpage = None):
+        import asyncio
+
+        # A pool of threads with an asyncio front: every webpage is downloaded and then analyzed on a thread of the pool,
+        # so the parsing of the webpages that have arrived overlaps with the downloads that are still in flight.
+        # Should function_on_webpage be given it receives every analyzed Portan object instead of it being reported
+        if (function_on_webpage == None):
+            function_on_webpage = lambda portan_webpage: self._report(portan_webpage, keyword_search)
+
+        asyncio.run(self._batch_async(iter(iterable_urls), int_concurrency, bool_is_verbose, function_on_webpage))
+
+        return None
+
+
+    # Not supposed to be called
+    async def _batch_async(self, iterator_urls, int_concurrency, bool_is_verbose, function_on_webpage):
+        import asyncio
+        import concurrent.futures
+
+        # Start a fixed number of workers, each taking the next url as soon as it is done with its previous one.
+        # This keeps at most int_concurrency downloads in flight without queuing up every url at once
+        event_loop = asyncio.get_running_loop()
+        self._get_connection_pool()
+
+        # Should --workers be set, the webpages are analyzed by a pool of processes instead, in chunks of webpages so that
+        # every task is worth sending to another process. Only what is found is sent back, not the webpage itself
+        process_executor = None
+        if (self.__int_workers > 0) and (self.__int_stream_chunk_size == 0):
+            process_executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.__int_workers)
+        list_pending_webpages = []                      # Contains the downloaded webpages that have not been sent to the processes yet
+        list_pending_bytes = [0]                        # A list, so that the nested functions below can change it
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=int_concurrency) as executor:
+            # Pass an analyzed webpage on, once its images have been checked on a thread should --verify-images be set, so that
+            # waiting for their servers does not hold up the other workers. Near-duplicates are not checked, see _report()
+            async def batch_on_webpage(portan_webpage):
+                if (self.__int_verify_concurrency > 0) and (portan_webpage.__string_near_duplicate_of == None):
+                    await event_loop.run_in_executor(executor, portan_webpage.verify_images, self.__int_verify_concurrency)
+                function_on_webpage(portan_webpage)
+
+                return None
+
+            # Analyze a chunk of downloaded webpages in the process pool, and pass every result on
+            async def batch_process_chunk(list_chunk):
+                list_analyses, dict_stages, dict_term_totals = await event_loop.run_in_executor(process_executor, _process_webpage_chunk,\
+                    [(string_url, tuple_fetched_webpage[0], tuple_fetched_webpage[1], tuple_fetched_webpage[2]) for string_url, tuple_fetched_webpage in list_chunk],\
+                    self._is_plaintext_needed(), self.__flag_write, Portan.__profiler != None, Portan.__float_cpu_budget,\
+                    None if (Portan.__term_statistics == None) else Portan.__term_statistics.get_settings(), self.__tuple_requested_extractors)
+                if (dict_stages != None):
+                    Portan.__profiler.add_stages(dict_stages)
+                if (dict_term_totals != None):
+                    Portan.__term_statistics.add_totals(dict_term_totals)
+                for (string_url, tuple_fetched_webpage), dict_analysis in zip(list_chunk, list_analyses):
+                    if ("error" in dict_analysis):
+                        print("Error: " + string_url + ": " + dict_analysis["error"])
+                        continue
+
+                    portan_webpage = Portan()
+                    portan_webpage._set_processed_webpage(string_url, tuple_fetched_webpage, dict_analysis, self.__int_max_bytes)
+                    await batch_on_webpage(portan_webpage)
+
+                return None
+
+            async def batch_worker():
+                for string_url in iterator_urls:
+                    self.__log("Retrieve Server Data: " + string_url, bool_is_verbose)
+
+                    # Should --stream be set, download and analyze the webpage chunk by chunk on the thread
+                    if (self.__int_stream_chunk_size > 0):
+                        portan_webpage = Portan()
+                        await event_loop.run_in_executor(executor, portan_webpage.get_streamed, string_url, bool_is_verbose,\
+                            self.__int_stream_chunk_size, self.__int_max_bytes, self._is_plaintext_needed(), self.__flag_write,\
+                            self.__tuple_requested_extractors)
+                        if (portan_webpage.__string_status_code != "N/A"):
+                            await batch_on_webpage(portan_webpage)
+                        continue
+
+                    portan_webpage = Portan()
+                    try:
+                        tuple_fetched_webpage = await event_loop.run_in_executor(executor, portan_webpage._fetch_webpage, string_url, self.__int_max_bytes)
+                    except urllib.error.URLError as error:
+                        print("Error: " + string_url + ": " + str(error.reason))
+                        continue
+
+                    # Should there be a process pool, collect the webpages until there are enough for a chunk, cached analyses are only restored
+                    if (process_executor != None) and (tuple_fetched_webpage[3] == None):
+                        list_pending_webpages.append((string_url, tuple_fetched_webpage))
+                        list_pending_bytes[0] += len(tuple_fetched_webpage[2])
+                        if (len(list_pending_webpages) >= 16) or (list_pending_bytes[0] >= 4194304):
+                            list_chunk = list_pending_webpages[:]
+                            list_pending_webpages.clear()
+                            list_pending_bytes[0] = 0
+                            await batch_process_chunk(list_chunk)
+                        continue
+
+                    # Analyze the webpage on a thread of the pool as its download was, so that the event loop is free to start
+                    # the next downloads of the other workers meanwhile. The analyses share the GIL, so they overlap the downloads
+                    # rather than each other, which is what --workers is for
+                    try:
+                        await event_loop.run_in_executor(executor, portan_webpage._process_fetched_webpage, string_url, tuple_fetched_webpage,\
+                            bool_is_verbose, self.__int_max_bytes, self.__tuple_requested_extractors)
+                    except UnicodeDecodeError as error:
+                        print("Error: " + string_url + ": " + str(error))
+                        continue
+                    await batch_on_webpage(portan_webpage)
+
+                return None
+
+            try:
+                await asyncio.gather(*[batch_worker() for int_worker in range(int_concurrency)])
+                if (len(list_pending_webpages) > 0):
+                    await batch_process_chunk(list_pending_webpages)
+            finally:
+                if (process_executor != None):
+                    process_executor.shutdown()
+
+        return None
+
+
+    # Analyze the webpages of a local html file, a directory of them, or a WARC archive, as batch() would once they are downloaded,
+    # see PortanArchiveReader. Should function_on_webpage be given it receives every analyzed Portan object instead of it being reported
+    def analyze_local(self, string_path, bool_is_verbose = False, keyword_search = None, function_on_webpage = None):
+        import concurrent.futures
+
+        if (function_on_webpage == None):
+            function_on_webpage = lambda portan_webpage: self._report(portan_webpage, keyword_search)
+
+        # Should --workers be set, the webpages are analyzed by a pool of processes in chunks, as batch() does. Only a few chunks
+        # are sent at a time, so that the archive is not read much further than the processes got
+        process_executor = None
+        if (self.__int_workers > 0):
+            process_executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.__int_workers)
+        list_pending_chunks = []                        # Contains the chunks sent to the processes, with their results, in order
+        list_chunk = []
+        int_chunk_bytes = 0
+
+        # Report the webpages of the oldest chunk sent to the processes
+        def analyze_local_report_chunk():
+            list_webpages, future_analyses = list_pending_chunks.pop(0)
+            list_analyses, dict_stages, dict_term_totals = future_analyses.result()
+            if (dict_stages != None):
+                Portan.__profiler.add_stages(dict_stages)
+            if (dict_term_totals != None):
+                Portan.__term_statistics.add_totals(dict_term_totals)
+            for tuple_webpage, dict_analysis in zip(list_webpages, list_analyses):
+                if ("error" in dict_analysis):
+                    print("Error: " + tuple_webpage[0] + ": " + dict_analysis["error"])
+                    continue
+                portan_webpage = Portan()
+                portan_webpage._set_processed_webpage(tuple_webpage[0], tuple_webpage[1:] + (None,), dict_analysis, self.__int_max_bytes)
+                function_on_webpage(portan_webpage)
+
+            return None
+
+        try:
+            for string_url, int_status_code, dict_header_info, bytes_webpage in self._read_local_webpages(string_path):
+                self.__log("Read Local Data: " + string_url, bool_is_verbose)
+                if (process_executor == None):
+                    portan_webpage = Portan()
+                    try:
+                        string_webpage = portan_webpage._run_stage("decode", lambda: portan_webpage._decode_webpage(bytes_webpage, dict_header_info),\
+                            len(bytes_webpage))
+                        portan_webpage.process_webpage(string_url, int_status_code, dict_header_info, string_webpage, bool_is_verbose,\
+                            self.__tuple_requested_extractors)
+                    except UnicodeDecodeError as error:
+                        print("Error: " + string_url + ": " + str(error))
+                        continue
+                    function_on_webpage(portan_webpage)
+                    continue
+
+                list_chunk.append((string_url, int_status_code, dict_header_info, bytes_webpage))
+                int_chunk_bytes += len(bytes_webpage)
+                if (len(list_chunk) >= 16) or (int_chunk_bytes >= 4194304):
+                    list_pending_chunks.append((list_chunk, process_executor.submit(_process_webpage_chunk, list_chunk, self._is_plaintext_needed(),\
+                        self.__flag_write, Portan.__profiler != None, Portan.__float_cpu_budget,\
+                        None if (Portan.__term_statistics == None) else Portan.__term_statistics.get_settings(), self.__tuple_requested_extractors)))
+                    list_chunk = []
+                    int_chunk_bytes = 0
+                    if (len(list_pending_chunks) > self.__int_workers * 2):
+                        analyze_local_report_chunk()
+
+            if (len(list_chunk) > 0):
+                list_pending_chunks.append((list_chunk, process_executor.submit(_process_webpage_chunk, list_chunk, self._is_plaintext_needed(),\
+                    self.__flag_write, Portan.__profiler != None, Portan.__float_cpu_budget,\
+                    None if (Portan.__term_statistics == None) else Portan.__term_statistics.get_settings(), self.__tuple_requested_extractors)))
+            while (len(list_pending_chunks) > 0):
+                analyze_local_report_chunk()
+        finally:
+            if (process_executor != None):
+                process_executor.shutdown()
+
+        return None
+
+
+    # Not supposed to be called
+    def _read_local_webpages(self, string_path):
+        # Returns the webpages of PortanArchiveReader, recording the reading of every webpage as the read stage should there be a profiler
+        iterator_webpages = iter(PortanArchiveReader(string_path, self.__int_max_bytes))
+        while (True):
+            float_wall_start = time.perf_counter()
+            float_cpu_start = time.thread_time()
+            tuple_webpage = next(iterator_webpages, None)
+            if (tuple_webpage == None):
+                return None
+            if (Portan.__profiler != None):
+                Portan.__profiler.add_stage("read", time.perf_counter() - float_wall_start, time.thread_time() - float_cpu_start,\
+                    len(tuple_webpage[3]), 1)
+
+            yield tuple_webpage
+
+
+    # Poll the urls every int_interval_seconds, and report the hyperlinks, emails, images, and --search results that were added
+    # to or removed from every webpage since the previous snapshot. Webpages the server says did not change, or whose body
+    # has the same hash as before, are not analyzed again. int_rounds of 0 polls until interrupted
+    def watch(self, list_urls, int_interval_seconds = 300, int_rounds = 0, int_concurrency = 8, bool_is_verbose = False, keyword_search = None):
+        import concurrent.futures
+
+        watch_snapshots = Portan.__watch_snapshots if (Portan.__watch_snapshots != None) else PortanWatchSnapshots()
+        if (not self.__flag_search):
+            keyword_search = None
+
+        int_round = 0
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=int_concurrency) as executor:
+                while (int_rounds == 0) or (int_round < int_rounds):
+                    float_round_start = time.time()
+                    self.__log("Poll " + str(len(list_urls)) + " Webpages...", bool_is_verbose)
+                    for string_url, string_state, dict_result in executor.map(lambda string_url:\
+                        self._poll_watched_webpage(string_url, watch_snapshots, keyword_search), list_urls):
+                        self._report_changes(string_url, string_state, dict_result, bool_is_verbose)
+                    if (Portan.__ndjson_writer != None):
+                        Portan.__ndjson_writer.flush()
+
+                    # Wait for the next round, counting from the start of this one
+                    int_round += 1
+                    if (int_rounds == 0) or (int_round < int_rounds):
+                        time.sleep(max(0.0, float_round_start + int_interval_seconds - time.time()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if (watch_snapshots != Portan.__watch_snapshots):
+                watch_snapshots.close()
+
+        return None
+
+
+    # Not supposed to be called
+    def _poll_watched_webpage(self, string_url, watch_snapshots, keyword_search):
+        # Returns the url, whether it is "new", "unchanged", "changed", or an "error", and what was found on it, what changed,
+        # or the error
+        dict_snapshot = watch_snapshots.lookup(string_url)
+        portan_webpage = Portan()
+        try:
+            tuple_fetched_webpage = portan_webpage._fetch_webpage(string_url, self.__int_max_bytes, watch_snapshots.get_conditional_headers(dict_snapshot))
+        except urllib.error.URLError as error:
+            return string_url, "error", {"error": str(error.reason)}
+
+        # The server answers 304 should the webpage not have changed, otherwise its hash tells
+        int_status_code, dict_header_info, bytes_webpage, dict_cache_entry = tuple_fetched_webpage
+        if (dict_snapshot != None) and (int_status_code == 304) and (dict_cache_entry == None):
+            return string_url, "unchanged", None
+        bytes_body_hash = b""
+        if (bytes_webpage != None):
+            bytes_body_hash = hashlib.blake2b(bytes_webpage, digest_size=16).digest()
+            if (dict_snapshot != None) and (bytes_body_hash == dict_snapshot["body_hash"]):
+                return string_url, "unchanged", None
+
+        try:
+            portan_webpage._process_fetched_webpage(string_url, tuple_fetched_webpage, False, self.__int_max_bytes)
+        except UnicodeDecodeError as error:
+            return string_url, "error", {"error": str(error)}
+        page_result = portan_webpage.get_result()
+        dict_found = {"hyperlinks": page_result.hyperlinks, "emails": page_result.emails, "images": page_result.images}
+        if (keyword_search != None):
+            portan_webpage.display_search(keyword_search, True)
+            dict_found["search"] = [string_found for string_found in (portan_webpage.__list_found_searched_strings or []) if (string_found != "None")]
+
+        dict_changes = watch_snapshots.store(string_url, bytes_body_hash, dict_header_info, dict_found)
+        if (dict_changes == None):
+            return string_url, "new", dict_found
+
+        return string_url, "changed", dict_changes
+
+
+    # Not supposed to be called
+    def _report_changes(self, string_url, string_state, dict_result, bool_is_verbose):
+        # Shows what was added to and removed from the webpage, or how much was found on it the first time, and writes it
+        # to the --ndjson records. Webpages that did not change are only shown with --verbose
+        if (string_state == "error"):
+            print("Error: " + string_url + ": " + dict_result["error"])
+            return None
+        if (string_state == "new"):
+            dict_result = {"added": dict_result, "removed": dict([(string_kind, []) for string_kind in dict_result])}
+        bool_has_changes = (string_state == "changed") and (max([len(list_items) for list_items in dict_result["added"].values()] +\
+            [len(list_items) for list_items in dict_result["removed"].values()]) > 0)
+        if (string_state == "unchanged") or ((string_state == "changed") and (not bool_has_changes)):
+            self.__log("Unchanged: " + string_url, bool_is_verbose)
+            return None
+
+        if (not self.__flag_no_output) and (string_state == "new"):
+            print("\nWATCHING: \t\t" + string_url + " (" + ", ".join([str(len(list_items)) + " " + string_kind\
+                for string_kind, list_items in dict_result["added"].items()]) + ")")
+        elif (not self.__flag_no_output):
+            print("\nCHANGES: \t\t" + string_url)
+            print("--------")
+            for string_sign, string_change in (("+", "added"), ("-", "removed")):
+                for string_kind, list_items in dict_result[string_change].items():
+                    for string_item in list_items:
+                        print(string_sign + " " + string_kind.upper().rstrip("S") + "\t" + string_item)
+
+        if (Portan.__ndjson_writer != None):
+            Portan.__ndjson_writer.write({"url": string_url, "state": string_state, "checked_at": time.time(), "added": dict_result["added"],\
+                "removed": dict_result["removed"]})
+
+        return None
+
+
+    # Answer requests to analyze urls, or html, with their json records on the address, a port, host:port, or unix:path,
+    # until interrupted. See PortanServer
+    def serve(self, string_address = "127.0.0.1:8750", int_concurrency = 8, int_queue_size = 64, bool_is_verbose = False):
+        # The server records the stages in a profiler of its own for /metrics, unless --profile set one already
+        profiler = Portan.__profiler
+        try:
+            PortanServer(int_concurrency, int_queue_size, self.__int_workers, self.__int_max_bytes, Portan.__float_cpu_budget,\
+                bool_is_verbose, profiler).serve_forever(string_address)
+        except OSError as error:
+            print("Error: " + string_address + ": " + str(error))
+        self.set_profiler(profiler)
+
+        return None
+
+
+    # Analyze the url, and follow its hyperlinks breadth-first to analyze the webpages they lead to
+    def crawl(self, string_seed_url, int_max_depth = 2, int_max_pages = 100, bool_same_host = True, int_concurrency = 8,\
+        bool_is_verbose = False, keyword_search = None):
+        # Every depth is downloaded as one batch, during which the hyperlinks found are added to the end of the
+        # frontier for the next depth. Only fingerprints of the visited urls are kept and the frontier moves to
+        # disk once it grows large, so the memory used stays small even after hundreds of thousands of urls
+        string_seed_host = urllib.parse.urlsplit(string_seed_url).hostname
+        crawl_frontier = PortanCrawlFrontier()
+        set_visited_fingerprints = set()
+        list_pages_started = [0]                # A list, so that the nested functions below can change it
+
+        # Add a url to the frontier, should it not have been seen before and be allowed by the limits
+        def crawl_enqueue(string_url, int_depth):
+            string_url = urllib.parse.urldefrag(string_url)[0]
+            parse_result = urllib.parse.urlsplit(string_url)
+            if (parse_result.scheme not in ("http", "https")):
+                return None
+            if (bool_same_host) and (parse_result.hostname != string_seed_host):
+                return None
+
+            int_fingerprint = self._get_url_fingerprint(string_url)
+            if (int_fingerprint not in set_visited_fingerprints):
+                set_visited_fingerprints.add(int_fingerprint)
+                crawl_frontier.push(int_depth, string_url)
+
+            return None
+
+        # Take the urls of a single depth from the frontier, until the page limit is reached
+        def crawl_depth_urls(int_depth):
+            while (list_pages_started[0] < int_max_pages) and (crawl_frontier.peek_depth() == int_depth):
+                list_pages_started[0] += 1
+                yield crawl_frontier.pop()[1]
+
+            return None
+
+        crawl_enqueue(string_seed_url, 0)
+        for int_depth in range(int_max_depth + 1):
+            # Report every webpage, and add the hyperlinks it contains for the next depth, but not its images
+            def crawl_on_webpage(portan_webpage):
+                self._report(portan_webpage, keyword_search)
+                if (int_depth < int_max_depth):
+                    set_image_hyperlinks = set(portan_webpage.__list_image_hyperlinks)
+                    for string_hyperlink in portan_webpage.__list_hyperlinks:
+                        if (string_hyperlink not in set_image_hyperlinks):
+                            crawl_enqueue(string_hyperlink, int_depth + 1)
+
+                return None
+
+            self.__log("Crawl Depth " + str(int_depth) + "...", bool_is_verbose)
+            self.batch(crawl_depth_urls(int_depth), int_concurrency, bool_is_verbose, keyword_search, crawl_on_webpage)
+            if (crawl_frontier.peek_depth() == None) or (list_pages_started[0] >= int_max_pages):
+                break
+
+        crawl_frontier.close()
+
+        return None
+
+
+    # Return the urls listed in the sitemaps of the website of the url, those its robots.txt names or else /sitemap.xml, leaving out
+    # the urls robots.txt does not allow. Should the url, or local file, be a sitemap itself, only it and the sitemaps it lists are read.
+    # The urls are read while they are being used, see PortanSitemapReader, so that batch() can start on the first of them right away
+    def discover(self, string_url, bool_is_verbose = False):
+        robots_rules = Portan.__robots_rules if (Portan.__robots_rules != None) else PortanRobotsRules()
+
+        string_path = urllib.parse.urlsplit(string_url).path.lower()
+        if (os.path.isfile(string_url)) or ((string_path != "/robots.txt") and (string_path.endswith((".xml", ".xml.gz", ".txt", ".txt.gz")))):
+            list_sitemaps = [string_url]
+        else:
+            list_sitemaps = robots_rules.get_sitemaps(string_url) or [urllib.parse.urljoin(string_url, "/sitemap.xml")]
+        self.__log("Read Sitemaps: " + ", ".join(list_sitemaps), bool_is_verbose)
+
+        return iter(PortanSitemapReader(list_sitemaps, robots_rules))
+
+
+    # Not supposed to be called
+    def _get_url_fingerprint(self, string_url):
+        # A 64 bit hash of the url takes far less memory than the url itself when remembering which urls were seen
+        return int.from_bytes(hashlib.blake2b(string_url.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+
+
+    # Not supposed to be called
+    def _get_connection_pool(self):
+        # Create the connection pool shared by all Portan objects the first time it is needed
+        with Portan.__lock_connection_pool:
+            if (Portan.__connection_pool == None):
+                Portan.__connection_pool = PortanConnectionPool()
+
+        return Portan.__connection_pool
+
+
+    # Read the list of urls used by --batch, ignoring empty lines and lines starting with #
+    def _read_url_list(self, string_file_path):
+        # The urls are read lazily, so very long lists are never held in memory all at once
+        file_urls = sys.stdin if (string_file_path == "-") else open(string_file_path, 'r')
+
+        for string_line in file_urls:
+            string_line = string_line.strip()
+            if (string_line != "") and (not string_line.startswith("#")):
+                yield string_line
+
+        if (file_urls is not sys.stdin):
+            file_urls.close()
+
+        return None
+
+
+    # Not supposed to be called
+    def _get_webpage_information(self):
+        # Html given to analyze() has no headers, and missing headers are None
+        if (self.__dict_header_info == None):
+            self.__dict_header_info = {}
+
+        # Parse the webpage information into the required variables
+        self.__string_last_modified = self.__dict_header_info.get("Last-Modified")
+        self.__string_content_language = self.__dict_header_info.get("Content-language")
+        self.__string_current_date = self.__dict_header_info.get("Date")
+        self.__string_content_type = self.__dict_header_info.get("Content-Type")
+        self.__string_content_length_bytes = self.__dict_header_info.get("Content-Length")
+
+        return None
+
+
+    # print the details to the screen
+    def display_details(self, bool_no_output = False):
+        # Print the required data to the screen if allowed
+        if(bool_no_output):
+            return None
+
+        # Print the URL Accessed & Header information
+        print("\n\nACCESSED: \t\t%s\nSTATUS CODE: \t\t%s\nLAST MODIFIED: \t\t%s\nDATE ACCESSED: \t\t%s\nCONTENT TYPE: \t\t%s\nCONTENT LANGUAGE: \t%s\nRECEIVED BYTES: \t%s\n\n" \
+            % (self.__string_provided_url, self.__string_status_code, self.__string_last_modified, self.__string_current_date, self.__string_content_type, self.__string_content_language,self.__string_content_length_bytes))
+
+        # Print the status information on found emails and hyperlinks TODO (Add in text size, reduced text_size, image links)
+        # The counts of the extractors that were not run are N/A
+        print("EMAILS: \t\t%s\nHYPERLINKS: \t\t%s\nTAGS: \t\t\t%s\nSEARCHABLE TEXT: \t%s BYTES" \
+            % tuple([int_count if (string_extractor in self.__tuple_extracted) else "N/A" for string_extractor, int_count in\
+            (("emails", self.__int_num_emails), ("hyperlinks", self.__int_num_hyperlinks), ("html_tags", self.__int_num_html_tags),\
+            ("plaintext", self.__int_num_text))]))
+
+        return None
+
+
+    # Find all the emails in the text
+    def _find_all_emails(self):
+        # Search the member variable for emails, and its plaintext for the emails written so that only people can read them.
+        # The webpage is split into the plaintext here should no other extractor have done so, so that the same emails are
+        # found whichever extractors run. Its segments are kept apart, as the end of one is not part of the next
+        list_found_emails = self._scan_emails(self.__string_returned_webpage)
+        list_found_emails.extend(self._scan_obfuscated_emails("\n".join(self._tokenize_webpage()[2])))
+
+        # Remove any duplicates
+        list_found_emails = self._remove_list_duplicates(list_found_emails)
+
+        # With some creative (&& Repetive coding - should improve this later)
+        # it is possible to remove any urls that were incorrectly recognized as emails
+        # thanks to the existence of sets. Not implemented here, though
+
+        # Determine whether any information was found
+        if (len(list_found_emails) > 0):
+            self.__list_emails = list_found_emails
+
+        # Set the email information
+        self.__int_num_emails = len(list_found_emails)
+
+        return None
+
+
+    # Find the emails in the text in a single pass, starting from every @ rather than from every character, followed by
+    # the percent-encoded addresses of mailto: hyperlinks unless bool_find_mailto is False
+    def _scan_emails(self, string_text, bool_find_mailto = True):
+        # An email is the run of name characters right before an @, without the special characters it can not start with,
+        # followed by a mail-server and at least one top-level domain. Only the 64 characters a name can have before every @,
+        # and the 255 a domain can have after it, are looked at, so text without any @ costs no more than a find()
+        email_name_start_regex, email_first_character_regex, email_domain_regex = self._get_email_regexes()
+        list_found_emails = []
+        int_name_search_start = 0                       # An email can not start before the end of the previous one, or the previous @
+        int_at_position = string_text.find("@")
+        int_emails_checked = 0
+        while (int_at_position != -1):
+            int_emails_checked += 1
+            if (int_emails_checked % 256 == 0):
+                self._check_cpu_budget()
+
+            # The name starts after the last character before the @ that can not be part of a name, as in _find_email_name_start(),
+            # which is not called here as this runs once for every @
+            int_window_start = int_at_position - 65 if (int_at_position - 65 > int_name_search_start) else int_name_search_start
+            match_name_start = email_name_start_regex.match(string_text, int_window_start, int_at_position)
+            if (match_name_start != None) or (int_window_start == int_name_search_start):
+                int_name_start = int_window_start if (match_name_start == None) else match_name_start.end()
+                match_first_character = email_first_character_regex.search(string_text, int_name_start, int_at_position)
+                match_domain = email_domain_regex.match(string_text, int_at_position + 1, int_at_position + 257)\
+                    if (match_first_character != None) else None
+                if (match_domain != None) and (match_domain.end() - int_at_position <= 256):
+                    list_found_emails.append(string_text[match_first_character.start():match_domain.end()])
+                    int_name_search_start = match_domain.end()
+
+            int_name_search_start = max(int_name_search_start, int_at_position + 1)
+            int_at_position = string_text.find("@", int_name_search_start)
+
+        if (bool_find_mailto):
+            list_found_emails.extend(self._scan_mailto_emails(string_text))
+
+        return list_found_emails
+
+
+    # Find the addresses of the mailto: hyperlinks in the text whose @ is percent-encoded
+    def _scan_mailto_emails(self, string_text):
+        # The @ of a mailto: hyperlink may be percent-encoded, such as in mailto:name%40host.com?subject=..., which is
+        # decoded before its addresses, separated by commas, are looked for
+        list_found_emails = []
+        if ("%40" in string_text):
+            email_mailto_regex, tuple_email_obfuscated_at_regexes, email_obfuscated_domain_regex, email_obfuscated_dot_regex = self._get_obfuscated_email_regexes()
+            for match_mailto in email_mailto_regex.finditer(string_text):
+                list_found_emails.extend(self._scan_emails(urllib.parse.unquote(match_mailto.group(1)).partition("?")[0].replace(",", " ")))
+
+        return list_found_emails
+
+
+    # Find the emails written as "name [at] host [dot] com", with (at), {at}, or &#64; instead of the @, in plaintext. These are
+    # written for people to read, so only the plaintext is scanned for them, rather than the scripts and styles, which are
+    # full of brackets
+    def _scan_obfuscated_emails(self, string_text):
+        # The name before every [at] is found as for an @, and the domain after it may have its periods written as [dot],
+        # (dot), {dot}, or " dot ", which are made periods again. To avoid false positives, such as "look [at] page 3.5",
+        # the last top-level domain has to consist of at least two letters
+        int_emails_checked = 0
+        email_name_start_regex, email_first_character_regex, email_domain_regex = self._get_email_regexes()
+        email_mailto_regex, tuple_email_obfuscated_at_regexes, email_obfuscated_domain_regex, email_obfuscated_dot_regex = self._get_obfuscated_email_regexes()
+        list_found_emails = []
+        int_name_search_start = 0
+        # Every way of writing the @ starts with a character of its own, which the regexes skip to far faster than to any of them
+        for match_at in sorted([match_at for regex_at in tuple_email_obfuscated_at_regexes for match_at in regex_at.finditer(string_text)],\
+            key=lambda match_at: match_at.start()):
+            int_emails_checked += 1
+            if (int_emails_checked % 256 == 0):
+                self._check_cpu_budget()
+            if (match_at.start() < int_name_search_start):
+                continue
+
+            # The name ends before the whitespace in front of the [at]
+            int_name_end = match_at.start()
+            while (int_name_end > int_name_search_start) and (string_text[int_name_end - 1] in " \t"):
+                int_name_end -= 1
+            int_name_start = self._find_email_name_start(string_text, int_name_search_start, int_name_end)
+            match_domain = email_obfuscated_domain_regex.match(string_text, match_at.end(), match_at.end() + 512)
+            if (int_name_start != None) and (match_domain != None):
+                string_domain = email_obfuscated_dot_regex.sub(".", match_domain.group().lstrip())
+                string_top_level_domain = string_domain.rpartition(".")[2]
+                if (len(string_domain) <= 255) and (email_domain_regex.fullmatch(string_domain) != None) and\
+                    (len(string_top_level_domain) >= 2) and (string_top_level_domain.isalpha()):
+                    list_found_emails.append(string_text[int_name_start:int_name_end] + "@" + string_domain)
+                    int_name_search_start = match_domain.end()
+
+            int_name_search_start = max(int_name_search_start, match_at.end())
+
+        return list_found_emails
+
+
+    # Not supposed to be called
+    def _find_email_name_start(self, string_text, int_name_search_start, int_name_end):
+        # The name starts after the last character before int_name_end that can not be part of a name, and is at most 64
+        # characters long. Returns the position of its first character, or None should there be no name, or should the
+        # run of name characters be longer than a name can be
+        email_name_start_regex, email_first_character_regex, email_domain_regex = self._get_email_regexes()
+        int_window_start = max(int_name_search_start, int_name_end - 65)
+        match_name_start = email_name_start_regex.match(string_text, int_window_start, int_name_end)
+        if (match_name_start == None) and (int_window_start > int_name_search_start):
+            return None
+
+        int_name_start = int_window_start if (match_name_start == None) else match_name_start.end()
+        match_first_character = email_first_character_regex.search(string_text, int_name_start, int_name_end)
+        if (match_first_character == None):
+            return None
+
+        return match_first_character.start()
+
+
+    # Create the regexes used to find emails
+    def _get_email_regexes(self):
+        if (Portan.__email_domain_regex != None):
+            return Portan.__email_name_start_regex, Portan.__email_first_character_regex, Portan.__email_domain_regex
+
+        Portan.__email_name_start_regex = re.compile(r"""
+        (?s:.*)                                                         # Everything up to the last character that can not be part of a name
+        [^a-zA-Z0-9\u00a1-\uffff.!#$%&’*+\/=?\^_`\{\|\}~\-]              # Character class that matches most nicknames, negated
+        """, re.VERBOSE)
+        Portan.__email_first_character_regex = re.compile(r"""
+        [^@.,%&#\-\/*{}]                                                # To avoid false positives, such as }@font-face, avoid certain special characters
+        """, re.VERBOSE)
+        Portan.__email_domain_regex = re.compile(r"""
+        ([a-zA-Z0-9\u00a1-\uffff\-]+)                                   # Character class that matches most mail-servers
+        (\.[a-zA-Z0-9\-]+)+                                             # Character class that matches most top-level domains
+        """, re.VERBOSE)
+
+        return Portan.__email_name_start_regex, Portan.__email_first_character_regex, Portan.__email_domain_regex
+
+
+    # Create the regexes used to find the emails of mailto: hyperlinks and the emails written as "name [at] host [dot] com"
+    def _get_obfuscated_email_regexes(self):
+        if (Portan.__email_obfuscated_dot_regex != None):
+            return Portan.__email_mailto_regex, Portan.__tuple_email_obfuscated_at_regexes, Portan.__email_obfuscated_domain_regex,\
+                Portan.__email_obfuscated_dot_regex
+
+        Portan.__email_mailto_regex = re.compile(r"""
+        mailto:                                                         # The scheme of the hyperlink
+        ([^"'\s<>]+)                                                    # The addresses, which end where the hyperlink ends
+        """, re.VERBOSE | re.IGNORECASE)
+        Portan.__tuple_email_obfuscated_at_regexes = tuple([re.compile(string_at) for string_at in\
+            ("\\[\\s*[aA][tT]\\s*\\]",                  # [at]
+            "\\(\\s*[aA][tT]\\s*\\)",                   # (at)
+            "\\{\\s*[aA][tT]\\s*\\}",                   # {at}
+            "&#(0*64|[xX]0*40);")])                     # An @ written as an html entity
+        Portan.__email_obfuscated_domain_regex = re.compile(r"""
+        \s*([a-zA-Z0-9\u00a1-\uffff\-]+)                                # Character class that matches most mail-servers
+        ((\.|\s*[\[\(\{]\s*dot\s*[\]\)\}]\s*|\s+dot\s+)                 # Followed by a period, [dot], (dot), {dot}, or " dot "
+        [a-zA-Z0-9\-]+)+                                                # And the top-level domain, at least once
+        """, re.VERBOSE | re.IGNORECASE)
+        Portan.__email_obfuscated_dot_regex = re.compile(r"""
+        \s*[\[\(\{]\s*dot\s*[\]\)\}]\s*|\s+dot\s+                       # [dot], (dot), {dot}, or " dot ", with its whitespace
+        """, re.VERBOSE | re.IGNORECASE)
+
+        return Portan.__email_mailto_regex, Portan.__tuple_email_obfuscated_at_regexes, Portan.__email_obfuscated_domain_regex,\
+            Portan.__email_obfuscated_dot_regex
+
+
+    # Find all the hyperlinks in the text
+    def _find_all_hyperlinks(self):
+        # Identify nearly all hyperlinks, not only in the text, but also in the href attributes of the tags, resolved against
+        # the base url of the webpage. Every hyperlink is normalized, so that a dictionary removes the duplicates while keeping
+        # the order in which they were found
+        dict_found_hyperlinks = {}
+        for string_hyperlink in self._scan_hyperlinks(self.__string_returned_webpage):
+            dict_found_hyperlinks[self._resolve_hyperlink(string_hyperlink)] = None
+
+        # Most tags have no href at all, which is far cheaper to rule out than to look for. The first <base href> replaces the
+        # base url of the whole webpage, so the hrefs are only resolved once every tag was looked at
+        list_href_tags = []
+        for int_tag, string_tag in enumerate(self.__list_html_tags):
+            if (int_tag % 4096 == 4095):
+                self._check_cpu_budget()
+            if ("ref" in string_tag) or ("REF" in string_tag):
+                if (string_tag[1] in "bB") and (string_tag[:5].lower() == "<base"):
+                    self._find_tag_hyperlinks(string_tag)
+                else:
+                    list_href_tags.append(string_tag)
+
+        # The hrefs of all those tags are found at once, and most of them were resolved before
+        host_regex, path_regex, a_href_regex = self._get_hyperlink_regexes()
+        for tuple_href in a_href_regex.findall("\n".join(list_href_tags)):
+            string_href = tuple_href[0] or tuple_href[1] or tuple_href[2]
+            string_hyperlink = self.__dict_resolved_hyperlinks.get(string_href, False)
+            if (string_hyperlink is False):
+                string_hyperlink = self._resolve_hyperlink(string_href)
+            dict_found_hyperlinks[string_hyperlink] = None
+        dict_found_hyperlinks.pop(None, None)
+
+        # Determine whether any hyperlinks were found and update the member variables accordingly
+        if (len(dict_found_hyperlinks) > 0):
+            self.__list_hyperlinks = list(dict_found_hyperlinks)
+
+        # Set the hyperlink information
+        self.__int_num_hyperlinks = len(dict_found_hyperlinks)
+
+        return None
+
+
+    # Find the hyperlinks of the href attributes of a tag, resolved against the base url of the webpage. A <base href> tag
+    # replaces the base url for the tags after it, which it has to come before
+    def _find_tag_hyperlinks(self, string_tag):
+        host_regex, path_regex, a_href_regex = self._get_hyperlink_regexes()
+        list_tag_hyperlinks = []
+        for tuple_href in a_href_regex.findall(string_tag):
+            string_href = tuple_href[0] or tuple_href[1] or tuple_href[2]
+            if (string_tag[1] in "bB") and (string_tag[:5].lower() == "<base"):
+                # Only the first <base href> counts, and the hrefs resolved until then no longer apply
+                if (not self.__bool_has_base_tag):
+                    self.__bool_has_base_tag = True
+                    self.__tuple_base_url = self._split_base_url(urllib.parse.urljoin(self._get_base_url()[0] or "", string_href.strip()))
+                    self.__dict_resolved_hyperlinks = {}
+                break
+
+            # Most hrefs were resolved before, which is checked here as this runs once for every href
+            string_hyperlink = self.__dict_resolved_hyperlinks.get(string_href, False)
+            if (string_hyperlink is False):
+                string_hyperlink = self._resolve_hyperlink(string_href)
+            if (string_hyperlink != None):
+                list_tag_hyperlinks.append(string_hyperlink)
+
+        return list_tag_hyperlinks
+
+
+    # Find the hyperlinks starting with http:// or https:// in the text in a single pass
+    def _scan_hyperlinks(self, string_text):
+        # URLS are very peculiar and quite a few have been made. We can't just match www.google.com, as github.com also exits.
+        # A hyperlink is the longest run of url characters after the protocol whose host has at least three parts separated by
+        # periods, is not followed by an @ (to prevent recognizing emails), and does not end on .,?!- (see _find_hyperlink_end).
+        # Hyperlinks found in the same run of url characters share where the run ends, so that a run full of "http://" that
+        # are not hyperlinks can no longer take quadratic time
+        host_regex, path_regex, a_href_regex = self._get_hyperlink_regexes()
+        list_found_hyperlinks = []
+        int_host_end = -1                               # Contains where the host characters last looked at end
+        int_path_end = -1                               # Contains where the url characters last looked at end
+        int_first_period = -1                           # Contains the first period after the position last looked at
+        tuple_checked = (-1, -1, -1)                    # Contains the first period and host end last checked, and where that hyperlink ends
+        int_position = string_text.find("http")
+        int_hyperlinks_checked = 0
+        while (int_position != -1):
+            int_hyperlinks_checked += 1
+            if (int_hyperlinks_checked % 256 == 0):
+                self._check_cpu_budget()
+
+            # Hyperlinks start with the protocol and "://"
+            if (string_text.startswith("://", int_position + 4)):
+                int_host_start = int_position + 7
+            elif (string_text.startswith("s://", int_position + 4)):
+                int_host_start = int_position + 8
+            else:
+                int_position = string_text.find("http", int_position + 1)
+                continue
+
+            # Only look for the ends of the runs, and the first period, again once the hyperlink starts beyond them
+            if (int_host_start > int_host_end):
+                int_host_end = host_regex.match(string_text, int_host_start).end()
+            if (int_host_start > int_path_end):
+                int_path_end = path_regex.match(string_text, int_host_end).end()
+            if (int_first_period < int_host_start + 1):
+                int_first_period = string_text.find(".", int_host_start + 1)
+                if (int_first_period == -1):
+                    int_first_period = len(string_text)
+            if (tuple_checked[0] != int_first_period) or (tuple_checked[1] != int_host_end):
+                tuple_checked = (int_first_period, int_host_end, self._find_hyperlink_end(string_text, int_first_period, int_host_end, int_path_end))
+
+            # Continue after the hyperlink, or after the "http" should it not have been one
+            int_hyperlink_end = tuple_checked[2]
+            if (int_hyperlink_end == -1):
+                int_position = string_text.find("http", int_position + 1)
+            else:
+                list_found_hyperlinks.append(string_text[int_position:int_hyperlink_end])
+                int_position = string_text.find("http", int_hyperlink_end)
+
+        return list_found_hyperlinks
+
+
+    # Not supposed to be called
+    def _find_hyperlink_end(self, string_text, int_first_period, int_host_end, int_path_end):
+        # Returns where the hyperlink whose host has its first period at int_first_period ends, or -1 should it not be one.
+        # Host names must be at least one character long, but will be separated by periods
+        if (int_first_period >= int_host_end):
+            return -1
+        int_second_period = string_text.find(".", int_first_period + 2, int_host_end)
+        if (int_second_period == -1) or (int_second_period + 2 > int_host_end):
+            return -1
+
+        # Matches only if the next character is not @; prevent recognizing emails
+        int_path_start = int_second_period + 2
+        while (int_path_start < len(string_text)) and (string_text[int_path_start] == "@"):
+            int_path_start += 1
+
+        # The path of the url can contain any number of special characters, but cannot end on .,?!-
+        int_hyperlink_end = int_path_end
+        if (int_path_end < len(string_text)) and (string_text[int_path_end] == "!"):
+            int_hyperlink_end = int_path_start + len(string_text[int_path_start + 1:int_path_end].rstrip(".,?-"))
+        if (int_hyperlink_end <= int_path_start):
+            return -1
+
+        return int_hyperlink_end
+
+
+    # Create the regexes used to find hyperlinks
+    def _get_hyperlink_regexes(self):
+        if (Portan.__a_href_regex != None):
+            return Portan.__host_regex, Portan.__path_regex, Portan.__a_href_regex
+
+        # Create regexes to find where the host, and the path, of a hyperlink containing http or https end
+        Portan.__host_regex = re.compile(r"""
+            [a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,$+_~]*                      # Host names, and the periods separating them
+        """, re.VERBOSE | re.UNICODE)
+        Portan.__path_regex = re.compile(r"""
+            [a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,\/$+_~]*                    # The path of the url can contain any number of special characters
+        """, re.VERBOSE | re.UNICODE)
+
+        # Create regex to find the href attributes of tags, such as <a href="...">, quoted or not
+        Portan.__a_href_regex = re.compile(r"""
+            \shref\s*=\s*                                                    # Find only the text within the href="" parts of the tag
+            (?:"([^"]*)"|'([^']*)'|([^\s"'>]+))                             # Which is quoted with " or ', or not at all
+        """, re.VERBOSE | re.IGNORECASE)
+
+        return Portan.__host_regex, Portan.__path_regex, Portan.__a_href_regex
+
+
+    # Find the base url partial hyperlinks are resolved against, as (base url, scheme and host, directory), all of which are
+    # None should there be no base url, such as for html given to analyze() without one
+    def _get_base_url(self):
+        # Split once per webpage, from the provided url, until a <base href> replaces it
+        if (self.__tuple_base_url == None):
+            self.__tuple_base_url = self._split_base_url(self.__string_provided_url)
+
+        return self.__tuple_base_url
+
+
+    # Not supposed to be called
+    def _split_base_url(self, string_base_url):
+        # Splits the normalized base url into the parts the hrefs are added to, as http and https urls only
+        if (string_base_url == None) or (not string_base_url.lower().startswith(("http://", "https://"))):
+            return (None, None, None)
+        string_base_url = self._normalize_hyperlink(string_base_url)
+        if (string_base_url == None):
+            return (None, None, None)
+
+        split_result = urllib.parse.urlsplit(string_base_url)
+        string_origin = split_result.scheme + "://" + split_result.netloc
+
+        return (string_base_url, string_origin, string_origin + split_result.path[:split_result.path.rfind("/") + 1])
+
+
+    # Not supposed to be called
+    def _resolve_hyperlink(self, string_href):
+        # Returns the href as a complete and normalized hyperlink, or None should it not lead to a webpage over http or https.
+        # Every href is only resolved once per webpage, as the menus and footers of most webpages repeat the same ones. The
+        # common hrefs are added to the parts of the base url, and only those with ./ or ../ or a ?query of their own are
+        # joined by urllib
+        string_hyperlink = self.__dict_resolved_hyperlinks.get(string_href, False)
+        if (string_hyperlink is not False):
+            return string_hyperlink
+
+        string_base_url, string_origin, string_directory = self._get_base_url()
+        url_scheme_regex, url_authority_regex = self._get_url_regexes()
+        string_value = string_href.strip()
+        if ("&" in string_value):
+            import html
+            string_value = html.unescape(string_value)
+        match_scheme = url_scheme_regex.match(string_value)
+
+        if (match_scheme != None):
+            # Hyperlinks with a scheme are complete, but only those over http and https lead to webpages
+            string_hyperlink = self._normalize_hyperlink(string_value) if (match_scheme.group(1).lower() in ("http", "https")) else None
+        elif (string_base_url == None) or (string_value == "") or (string_value.startswith("#")):
+            # Nothing can be completed without a base url, and empty hrefs and fragments lead to the webpage itself
+            string_hyperlink = None
+        elif ("./" in string_value) or (string_value.startswith("?")) or (string_value.endswith(".") and\
+            (string_value.rstrip(".") == "" or string_value.rstrip(".").endswith("/"))):
+            string_hyperlink = self._normalize_hyperlink(urllib.parse.urljoin(string_base_url, string_value))
+        else:
+            # The parts of the base url are normalized already, so only a fragment has to be removed
+            if (string_value.startswith("//")):
+                string_hyperlink = self._normalize_hyperlink(string_origin[:string_origin.find(":") + 1] + string_value)
+            elif (string_value.startswith("/")):
+                string_hyperlink = string_origin + string_value
+            else:
+                string_hyperlink = string_directory + string_value
+            if ("#" in string_hyperlink):
+                string_hyperlink = string_hyperlink[:string_hyperlink.find("#")]
+        self.__dict_resolved_hyperlinks[string_href] = string_hyperlink
+
+        return string_hyperlink
+
+
+    # Not supposed to be called
+    def _normalize_hyperlink(self, string_hyperlink):
+        # Hyperlinks leading to the same webpage are written the same way, so that they are only kept once: the scheme and
+        # host are made lowercase, the default port and the fragment are removed, and an empty path becomes /. Returns None
+        # should the hyperlink not be valid. Most hyperlinks already are normalized, which is checked without splitting them
+        url_scheme_regex, url_authority_regex = self._get_url_regexes()
+        int_host_start = string_hyperlink.find("://") + 3
+        int_host_end = url_authority_regex.match(string_hyperlink, int_host_start).end()
+        if (int_host_end > int_host_start) and (string_hyperlink.startswith("/", int_host_end)) and ("#" not in string_hyperlink) and\
+            (string_hyperlink.find(":", int_host_start, int_host_end) == -1) and (string_hyperlink[:int_host_end].islower()):
+            return string_hyperlink
+
+        try:
+            split_result = urllib.parse.urlsplit(string_hyperlink)
+            split_result.port
+        except ValueError:
+            return None
+        if (not split_result.hostname):
+            return None
+
+        string_netloc = split_result.netloc.lower().rstrip(":")
+        if ((split_result.scheme == "http") and (string_netloc.endswith(":80"))) or ((split_result.scheme == "https") and (string_netloc.endswith(":443"))):
+            string_netloc = string_netloc.rpartition(":")[0]
+
+        return urllib.parse.urlunsplit((split_result.scheme, string_netloc, split_result.path or "/", split_result.query, ""))
+
+
+    # Create the regexes used to resolve and normalize hyperlinks
+    def _get_url_regexes(self):
+        if (Portan.__url_authority_regex != None):
+            return Portan.__url_scheme_regex, Portan.__url_authority_regex
+
+        Portan.__url_scheme_regex = re.compile(r"""
+        ([a-zA-Z][a-zA-Z0-9+.\-]*):                                     # The scheme of a complete url, such as http: or mailto:
+        """, re.VERBOSE)
+        Portan.__url_authority_regex = re.compile(r"""
+        [^\/?\#]*                                                       # The user, host, and port, up to the path, query, or fragment
+        """, re.VERBOSE)
+
+        return Portan.__url_scheme_regex, Portan.__url_authority_regex
+
+
+    # Find all images
+    def _find_all_images(self, bool_find_sources = True):
+        # Search the hyperlinks
+        list_images = self._scan_images(self.__list_hyperlinks)
+
+        # Remove any duplicates
+        list_images = self._remove_list_duplicates(list_images)
+
+        # Set the image lists, and the number of images found
+        self.__list_image_hyperlinks = list_images
+        self.__int_num_images = len(list_images)
+
+        # Remember the targets of the <img src> tags as well, which have no image extension on many CDNs. The stream
+        # finds them while it reads the tags instead
+        if (bool_find_sources):
+            self.__list_image_sources = self._remove_list_duplicates(self._find_image_sources(\
+                "".join([string_tag for string_tag in self.__list_html_tags if (string_tag[:4].lower() == "<img")])))
+
+        return None
+
+
+    # Find the targets of the <img src> tags in the text of tags, as complete hyperlinks
+    def _find_image_sources(self, string_tags):
+        if (Portan.__image_source_regex == None):
+            Portan.__image_source_regex = re.compile(r"""
+                <img(?=\s)[^>]*?                                        # Only <img> tags
+                \ssrc\s*=\s*["']?                                       # The src attribute, quoted or not
+                ([^"'\s>]+)                                             # The target of the image
+            """, re.VERBOSE | re.IGNORECASE)
+
+        # Partial targets are completed with the base url, should there be one
+        list_image_sources = []
+        for string_source in Portan.__image_source_regex.findall(string_tags):
+            string_source = self._resolve_hyperlink(string_source)
+            if (string_source != None):
+                list_image_sources.append(string_source)
+
+        return list_image_sources
+
+
+    # Check the images found, and the targets of the <img src> tags, by asking their servers for their Content-Type and size,
+    # at most int_concurrency at the same time. Only what turns out to be an image is kept, together with the images that could
+    # not be checked but have an image extension
+    #   NOTE: what was found out about every image is kept in the PortanImageProbeCache, so the same image is not checked twice
+    def verify_images(self, int_concurrency = 8):
+        import concurrent.futures
+
+        list_candidates = list(dict.fromkeys((self.__list_image_hyperlinks if (self.__int_num_images > 0) else []) + self.__list_image_sources))
+        set_extension_images = set(self.__list_image_hyperlinks)
+        self.__dict_image_probes = {}
+        if (len(list_candidates) == 0):
+            return None
+
+        def verify_images_probe_all():
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(int_concurrency, len(list_candidates))) as executor:
+                return list(executor.map(self._probe_image, list_candidates))
+
+        list_images = []
+        for string_candidate, tuple_probe in zip(list_candidates, self._run_stage("verify", verify_images_probe_all, len(list_candidates),\
+            lambda: len(list_images))):
+            if (tuple_probe == None):
+                if (string_candidate in set_extension_images):
+                    list_images.append(string_candidate)
+            elif (tuple_probe[0].startswith("image/")):
+                list_images.append(string_candidate)
+                self.__dict_image_probes[string_candidate] = tuple_probe
+
+        self.__list_image_hyperlinks = list_images
+        self.__int_num_images = len(list_images)
+
+        return None
+
+
+    # Not supposed to be called
+    def _probe_image(self, string_url):
+        # Returns the Content-Type and the size of the url, or None should its server not be reachable. A HEAD request is
+        # sent first, and a GET of only the first byte should the server not allow HEAD
+        image_probe_cache = self._get_image_probe_cache()
+        tuple_probe = image_probe_cache.lookup(string_url)
+        if (tuple_probe != None):
+            return tuple_probe
+
+        connection_pool = self._get_connection_pool()
+        try:
+            try:
+                pooled_response = connection_pool.open(string_url, string_method="HEAD")
+            except urllib.error.HTTPError as error:
+                if (error.code not in (403, 405, 501)):
+                    raise
+                pooled_response = connection_pool.open(string_url, {"Range": "bytes=0-0"})
+        except urllib.error.HTTPError as error:
+            # The server answered, so the url is known not to be an image
+            image_probe_cache.store(string_url, "error/" + str(error.code), 0, error.headers)
+            return ("error/" + str(error.code), 0)
+        except urllib.error.URLError:
+            return None
+
+        # The size is the Content-Length, or the total given by the Content-Range of a GET of the first byte
+        string_content_type = (pooled_response.msg["Content-Type"] or "").split(";")[0].strip().lower()
+        string_size = pooled_response.msg["Content-Length"] or "0"
+        string_content_range = pooled_response.msg["Content-Range"]
+        if (pooled_response.status == 206) and (string_content_range != None) and ("/" in string_content_range):
+            string_size = string_content_range.rsplit("/", 1)[1]
+            pooled_response.discard()
+        else:
+            pooled_response.close()
+
+        tuple_probe = (string_content_type, int(string_size) if (string_size.strip().isdigit()) else 0)
+        image_probe_cache.store(string_url, tuple_probe[0], tuple_probe[1], pooled_response.msg)
+
+        return tuple_probe
+
+
+    # Not supposed to be called
+    def _get_image_probe_cache(self):
+        # Use the cache set by --probe-cache, or keep what was found out about the images in memory
+        if (Portan.__image_probe_cache == None):
+            with Portan.__lock_image_probe_cache:
+                if (Portan.__image_probe_cache == None):
+                    Portan.__image_probe_cache = PortanImageProbeCache()
+
+        return Portan.__image_probe_cache
+
+
+    # Find the images in a list of hyperlinks, by looking for their extensions rather than trying every position of every hyperlink
+    def _scan_images(self, list_hyperlinks):
+        # An image is a hyperlink, or its start, up to the first extension found that has at least two characters in front of it.
+        # The extensions are tried in this order, so a .jpg anywhere is found before a .png. Should a hyperlink contain no extension
+        # after where the previous image ended, it contains no more images at all
+        any_extension_regex, tuple_extension_regexes = self._get_image_regexes()
+        list_images = []
+        for int_hyperlink, string_hyperlink in enumerate(list_hyperlinks):
+            if (int_hyperlink % 256 == 255):
+                self._check_cpu_budget()
+
+            int_position = 0
+            while (any_extension_regex.search(string_hyperlink, int_position + 2) != None):
+                for extension_regex in tuple_extension_regexes:
+                    match_extension = extension_regex.search(string_hyperlink, int_position + 2)
+                    if (match_extension != None):
+                        break
+                list_images.append(string_hyperlink[int_position:match_extension.end()])
+                int_position = match_extension.end()
+
+        return list_images
+
+
+    # Create the regexes used to find images
+    def _get_image_regexes(self):
+        if (Portan.__any_image_extension_regex != None):
+            return Portan.__any_image_extension_regex, Portan.__tuple_image_extension_regexes
+
+        Portan.__tuple_image_extension_regexes = tuple([re.compile(string_extension, re.UNICODE | re.IGNORECASE) for string_extension in\
+            ("jpg",                                         # JPEGS
+            "jpeg",                                         # JPEGS
+            "gif",                                          # GIFS
+            "png",                                          # PNGS
+            "tiff",                                         # TIFF
+            "bmp")])                                        # BMP
+        Portan.__any_image_extension_regex = re.compile("jpg|jpeg|gif|png|tiff|bmp", re.UNICODE | re.IGNORECASE)
+
+        return Portan.__any_image_extension_regex, Portan.__tuple_image_extension_regexes
+
+
+    # Display all emails
+    def display_emails(self, bool_no_output = False):
+        if (not bool_no_output):
+            # Display a list of the emails and a menu
+            print("\n\nEMAILS:\n-------")
+
+            # Cycle through the image list
+            for element in self.__list_emails:
+                print(element)
+
+        return None
+
+
+    # Display all hyperlinks
+    def display_hyperlinks(self, bool_no_output = False):
+        if (not bool_no_output):
+            # Display a list of the emails and a menu
+            print("\n\nHYPERLINKS:\n-----------")
+
+            # Cycle through the image list
+            for element in self.__list_hyperlinks:
+                print(element)
+
+        return None
+
+
+    # Display all images
+    def display_images(self, bool_no_output = False):
+        if (not bool_no_output):
+            # Display a list of the emails and a menu
+            print("\n\nIMAGES:\n-------")
+
+            # Cycle through the image list, with the Content-Type and size of the images checked by --verify-images
+            for element in self.__list_image_hyperlinks:
+                if (self.__dict_image_probes != None) and (element in self.__dict_image_probes):
+                    print(element + "\t(" + self.__dict_image_probes[element][0] + ", " + str(self.__dict_image_probes[element][1]) + " bytes)")
+                else:
+                    print(element)
+        return None
+
+    # Display all plaintext
+    def display_plaintext(self, bool_no_output = False):
+        if (not bool_no_output):
+	        # Display the plaintext found on the webpage
+	        print("\n\nPLAINTEXT:\n---------")
+	        print(self.__string_webpage_plain_text)
+	
+        return None
+
+    # Display what the extractors of --extract found, under their names
+    def display_extracted(self, bool_no_output = False):
+        if (bool_no_output):
+            return None
+
+        for string_extractor, value_extracted in self.__dict_extracted.items():
+            print("\n\n" + string_extractor.upper() + ":\n" + "-" * (len(string_extractor) + 1))
+            if (isinstance(value_extracted, dict)):
+                for string_key, value in value_extracted.items():
+                    print(str(string_key) + ":\t" + str(value))
+            elif (isinstance(value_extracted, (list, tuple, set))):
+                for element in value_extracted:
+                    print(element)
+            else:
+                print(value_extracted)
+
+        return None
+
+    # Split the downloaded webpage into html tags and plaintext in a single pass
+    def _tokenize_webpage(self):
+        # This function walks the member variable containing the body of the html text once from left to right
+        # and sorts every part of it into either a tag or a plaintext segment, see PortanHtmlTokenizer
+        string_webpage = self.__string_returned_webpage
+
+        # Return the previous result should the webpage already have been split
+        if (self.__tuple_tokenized_webpage[0] is string_webpage):
+            return self.__tuple_tokenized_webpage
+
+        list_html_tags = []
+        list_text_segments = []
+
+        # The whole webpage is given at once, so every tag arrives complete
+        for int_token, (int_token_kind, string_token) in enumerate(PortanHtmlTokenizer().feed(string_webpage, True)):
+            if (int_token % 4096 == 4095):
+                self._check_cpu_budget()
+            if (int_token_kind == PortanHtmlTokenizer.TOKEN_TEXT):
+                list_text_segments.append(string_token)
+            else:
+                list_html_tags.append(string_token)
+
+        # Remember the result so the tags and the plaintext can share it
+        self.__tuple_tokenized_webpage = (string_webpage, list_html_tags, list_text_segments)
+
+        return self.__tuple_tokenized_webpage
+
+
+    # Separate the html tags from the normal text
+    def _find_html_tags(self):
+        # This function will take in the member variable containing the body of the html text
+        # and return all the tags. These can be searched for links later
+        string_webpage, list_html_tags, list_text_segments = self._tokenize_webpage()
+
+        return list_html_tags
+
+    
+    # Separate the normal text from the html tags
+    def _find_html_text(self):
+        # This function will take in the member variable containing the body of the html text
+        # and return all the normal text. This bundle of text will be reduced and can be searched for links later
+        string_webpage, list_html_tags, list_text_segments = self._tokenize_webpage()
+
+        return "".join(list_text_segments)
+
+
+    # Find a list of all tags
+    def _find_all_tags(self):
+        # This function uses the _find_html_tags function to return a list of html tags that 
+        # can be perused and scanned to add more hyperlinks and emails which weren't previously found
+        self.__list_html_tags = self._find_html_tags()
+        self.__int_num_html_tags = len(self.__list_html_tags)
+
+        return None
+
+
+    # Find the html text reduced to normal plain text
+    def _find_all_text(self):
+        # This function uses the _find_html_text function to return a string of plain website text
+        # that can be perused and scanned for information.
+        self.__string_webpage_plain_text = self._find_html_text()
+        self.__int_num_text = len(self.__string_webpage_plain_text)
+
+        return None
+
+
+    # Count the words, terms, and n-grams of the normal text, and add them to the PortanTermStatistics
+    def _find_all_terms(self):
+        # The text is fed in parts, so that a webpage that uses up its CPU budget is stopped while its terms are counted.
+        # Only the terms of webpages that were counted completely are added to the totals
+        page_terms = PortanTermStatistics(*Portan.__term_statistics.get_settings())
+        string_text = self.__string_webpage_plain_text
+        for int_start in range(0, len(string_text), 65536):
+            self._check_cpu_budget()
+            page_terms.feed(string_text[int_start:int_start + 65536])
+        page_terms.feed("", True)
+
+        self.__dict_terms = page_terms.get_totals()
+        Portan.__term_statistics.add_totals(self.__dict_terms)
+
+        return None
+
+
+    # Find the canonical url of the webpage, given by its <link rel="canonical" href>, or None should it have none
+    def _find_canonical_url(self, list_html_tags):
+        # Only the <link> tags that mention canonical are split into their attributes, and the url is resolved as the hrefs are
+        for string_tag in list_html_tags:
+            if (string_tag[:5].lower() != "<link") or ("canonical" not in string_tag.lower()):
+                continue
+
+            dict_attributes = self._find_tag_attributes(string_tag)
+            if ("canonical" in dict_attributes.get("rel", "").lower().split()) and ("href" in dict_attributes):
+                return self._resolve_hyperlink(dict_attributes["href"])
+
+        return None
+
+
+    # Find the content of every <meta> tag by its name, property, or http-equiv, and the charset should one be given
+    def _find_meta_tags(self, list_html_tags):
+        import html
+
+        # The first of the tags with the same name is kept, as browsers do
+        dict_meta_tags = {}
+        for string_tag in list_html_tags:
+            if (string_tag[:5].lower() != "<meta") or (not string_tag[5:6].isspace()):
+                continue
+
+            dict_attributes = self._find_tag_attributes(string_tag)
+            if ("charset" in dict_attributes):
+                dict_meta_tags.setdefault("charset", dict_attributes["charset"])
+            string_name = dict_attributes.get("name") or dict_attributes.get("property") or dict_attributes.get("http-equiv")
+            if (string_name != None) and ("content" in dict_attributes):
+                dict_meta_tags.setdefault(string_name.lower(), html.unescape(dict_attributes["content"]))
+
+        return dict_meta_tags
+
+
+    # Not supposed to be called
+    def _find_tag_attributes(self, string_tag):
+        # Returns the attributes of a tag by their name in lowercase, the first of any attribute given twice
+        if (Portan.__tag_attribute_regex == None):
+            Portan.__tag_attribute_regex = re.compile(r"""
+            \s([a-zA-Z_:][a-zA-Z0-9_:.\-]*)                             # The name of an attribute
+            \s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))                  # Followed by its value, quoted or not
+            """, re.VERBOSE)
+
+        dict_attributes = {}
+        for string_name, string_double_quoted, string_single_quoted, string_unquoted in Portan.__tag_attribute_regex.findall(string_tag):
+            dict_attributes.setdefault(string_name.lower(), string_double_quoted or string_single_quoted or string_unquoted)
+
+        return dict_attributes
+
+
+    # Remove any duplicates from a passed list, keeping the order in which things were found
+    def _remove_list_duplicates(self, list_input):
+        # This function uses the keys of a dictionary, which remove duplicate information
+        # as a set would, but keep the order in which things were found, so that the
+        # results are the same on every run, and with or without --stream
+        list_to_return = []
+
+        # convert the list to a dictionary, and return its keys immediately
+        list_to_return = list(dict.fromkeys(list_input))
+
+        return list_to_return
+
+
+    # Find an argument in a list of arguments passed to the program
+    def _find_argument(self, list_arguments, string_item_to_find):
+        # This function takes a list of arguments passed to the program and looks to find a specified
+        # argument. Returns true if it is found, and false if not
+        bool_argument_found = False
+        
+        # Look for the argument, which may also be the very first one, such as in "--batch urls.txt"
+        try:
+            list_arguments.index(string_item_to_find)
+            bool_argument_found = True
+        except ValueError:
+            bool_argument_found = False
+
+        return bool_argument_found
+
+
+    # Find the positive number following an argument in a list of arguments passed to the program
+    def _find_argument_number(self, list_arguments, string_item_to_find, int_default, int_minimum):
+        # Returns int_default should the argument not be present, and None, with an error message,
+        # should the value not be a number of at least int_minimum
+        string_value = self._find_argument_value(list_arguments, string_item_to_find)
+        if (string_value == None):
+            return int_default
+
+        if (not string_value.isdigit()) or (int(string_value) < int_minimum):
+            print("Error: " + string_item_to_find + " requires a number of at least " + str(int_minimum) + "...")
+            return None
+
+        return int(string_value)
+
+
+    # Find the value following an argument in a list of arguments passed to the program
+    def _find_argument_value(self, list_arguments, string_item_to_find):
+        # This function returns the argument after the specified one, such as the file in "--batch urls.txt".
+        # Returns None should the argument not be present, or should it be followed by another argument
+        string_value = None
+
+        try:
+            string_value = list_arguments[list_arguments.index(string_item_to_find) + 1]
+            if (string_value in self.__list_possible_arguments):
+                string_value = None
+        except (ValueError, IndexError):
+            string_value = None
+
+        return string_value
 
 
     # Displays the help menu
@@ -573,155 +2797,3080 @@ class Portan:
     Portan will require a URL to search. Should none be present
     Portan will cease to execute and display an error.
 
-        >> portan.py [url] [arguments]
-    
-     --verbose                  Shows all steps Portan takes. 
-     --version                  Displays the version of Portan. 
-     --help                     Displays help information. 
-     --minimal                  Shows basic information. Used 
-                                by default. 
-     --no-output                Displays nothing except success 
-                                or failure. 
-     --license                  Displays the license under which 
-                                Portan was published together with
-                                any additional information.
-     --write                    Creates files containing the 
-                                information found in the provided
-                                hyperlink
-     --emails                   Displays the emails found
-     --hyperlinks               Displays the hyperlinks found
-     --images                   Displays the hyperlinks that refer
-                                to images.
-     --plain-text               Displays the obtained plaintext
-     --search ["to_search"]     Searches for the text "to_search" in 
-                                the plaintext found on the website. 
-                                Should the text be more than one word
-                                enclose it in double quotes, i.e. 
-                                --search "words to search" """
+        >> portan.py [url] [arguments]
+    
+     --verbose                  Shows all steps Portan takes. 
+     --version                  Displays the version of Portan. 
+     --help                     Displays help information. 
+     --minimal                  Shows basic information. Used 
+                                by default. 
+     --no-output                Displays nothing except success 
+                                or failure. 
+     --license                  Displays the license under which 
+                                Portan was published together with
+                                any additional information.
+     --write                    Creates files containing the 
+                                information found in the provided
+                                hyperlink
+     --emails                   Displays the emails found, including
+                                those of mailto: hyperlinks, and those
+                                written as name [at] host [dot] com.
+     --hyperlinks               Displays the hyperlinks found
+     --images                   Displays the hyperlinks that refer
+                                to images.
+     --plain-text               Displays the obtained plaintext
+     --extract [names]          Also runs the extractors named, separated
+                                by commas, such as canonical,meta_tags,
+                                and displays what they found. Only what
+                                the flags ask for is extracted, so that
+                                --emails alone does not find the tags.
+                                Not used with --stream.
+     --search ["to_search"]     Searches for the text "to_search" in 
+                                the plaintext found on the website. 
+                                Should the text be more than one word
+                                enclose it in double quotes, i.e. 
+                                --search "words to search" 
+                                Repeat it to search for more than one
+                                text, all of them at the same time.
+     --search-file [file]       Searches for every line of the file as
+                                well, as if each followed a --search.
+     --context [characters]     The number of characters --search shows
+                                before and after the text. 40 by default.
+     --batch [file]             Analyzes every url listed in the file,
+                                one per line, instead of a single url.
+                                Use - to read the urls from stdin, i.e.
+                                portan.py --batch urls.txt --emails
+     --concurrency [number]     The number of webpages --batch and --crawl
+                                download at the same time. 8 by default.
+     --crawl                    Analyzes the url, and then the webpages
+                                its hyperlinks lead to, depth by depth.
+     --depth [number]           How many hyperlinks deep --crawl goes.
+                                2 by default.
+     --max-pages [number]       The most webpages --crawl analyzes.
+                                100 by default.
+     --all-hosts                Lets --crawl follow hyperlinks to other
+                                hosts than the one of the url.
+     --sitemap                  Analyzes every url listed in the sitemaps
+                                of the website of the url, found in its
+                                robots.txt or at /sitemap.xml, or in the
+                                sitemap (.xml, .xml.gz, or .txt) the url
+                                leads to, as they download. Obeys the
+                                robots.txt of every host, and analyzes
+                                no more than --max-pages if given.
+     --robots                   Skips the urls the robots.txt of their
+                                host does not allow Portan to download.
+     --near-duplicates [bits]   Only names the webpages whose plaintext
+                                is nearly the same as that of a webpage
+                                analyzed before, such as print views and
+                                urls with session ids, instead of finding
+                                and showing anything more on them. The
+                                fingerprints of the texts may differ in
+                                this many of their 64 bits. 3 by default.
+     --stream                   Analyzes the webpages chunk by chunk
+                                while they download, keeping only what
+                                is found rather than the whole webpage.
+     --chunk-size [bytes]       The size of the chunks --stream reads.
+                                65536 by default.
+     --max-bytes [bytes]        Stops downloading a webpage after this
+                                many bytes. No limit by default.
+     --cache [directory]        Keeps the webpages and what was found on
+                                them in the directory, and only downloads
+                                and analyzes them again once they change.
+     --cache-size [megabytes]   The most space --cache uses, removing the
+                                least recently used webpages first.
+                                256 by default.
+     --cache-ttl [seconds]      How long a cached webpage is used without
+                                asking the server whether it changed.
+                                0 by default.
+     --index [file]             Adds the plaintext of every webpage
+                                analyzed to a full-text index in the file.
+     --query ["words"]          Searches the --index for the webpages
+                                containing all the words, best matches
+                                first, instead of analyzing a url, i.e.
+                                portan.py --index pages.db --query "web crawler"
+     --limit [number]           The most webpages --query shows.
+                                10 by default.
+     --workers [number]         The number of processes that analyze the
+                                webpages --batch and --crawl download,
+                                to use more than one core. Not used with
+                                --stream. None by default.
+     --ndjson [file]            Appends one json record per webpage, with
+                                the headers, counts, hyperlinks, emails,
+                                images, and --search results, to the file.
+                                Use - to write the records to stdout.
+     --gzip                     Gzips the records of --ndjson.
+     --profile [format]         Records the calls, wall time, CPU time,
+                                input, and matches of every stage, from
+                                the download to the images, and shows
+                                them at the end as a table, json, or
+                                prometheus text. table by default.
+     --profile-file [file]      Writes the --profile to the file instead.
+     --cpu-budget [ms]          Stops analyzing a webpage once it used
+                                this many milliseconds of CPU time, and
+                                reports the stage it was stopped in,
+                                keeping what was found until then.
+                                No limit by default.
+     --verify-images            Checks the images, and the targets of the
+                                <img src> tags, by asking their servers
+                                for their Content-Type and size, up to
+                                --concurrency at a time, keeping only
+                                what turns out to be an image.
+     --probe-cache [file]       Keeps what --verify-images found out in
+                                the file, so that no image is checked
+                                twice. Only kept in memory by default.
+     --terms                    Counts the words of the plaintext, and
+                                shows the most common terms, which leave
+                                out the articles, prepositions, and other
+                                stopwords, and n-grams of every webpage,
+                                and of all of them for --batch and --crawl.
+     --top [number]             The most common terms --terms shows.
+                                10 by default.
+     --ngram [number]           The number of terms in the n-grams of
+                                --terms, 1 for none. 2 by default.
+     --keep-stopwords           Counts the stopwords as terms as well.
+     --terms-file [file]        Writes the totals of --terms to the file
+                                as json.
+     --serve [address]          Answers requests to analyze urls, or html,
+                                with their json records instead, on a
+                                port, host:port, or unix:path, keeping
+                                everything warm between the requests.
+                                POST /analyze {"url": ...} or {"html": ...},
+                                GET /analyze?url=..., /health, /metrics.
+                                127.0.0.1:8750 by default.
+     --queue [number]           The most requests --serve lets wait while
+                                --concurrency are analyzed, answering 503
+                                to the rest. 64 by default.
+     --watch [seconds]          Polls the url, or every url of --batch,
+                                every this many seconds, and shows the
+                                hyperlinks, emails, images, and --search
+                                results added or removed since the last
+                                snapshot. Webpages that did not change
+                                are not analyzed again. 300 by default.
+     --rounds [number]          How often --watch polls the webpages.
+                                Until interrupted by default.
+     --snapshot [file]          Keeps the snapshots of --watch in the file,
+                                to compare with on the next run. Only
+                                kept in memory by default.
+     --local [path]             Analyzes a local html file, a directory
+                                of them, or a WARC archive (.warc or
+                                .warc.gz) instead of downloading the
+                                webpages, reading one webpage at a time. """
+
+        # Display the help string
+        print(string_help_data)
+        return None
+
+
+    # Displays the Portan Version
+    def version_menu(self):
+        print("Portan v1.0.0\n")
+        return None
+
+
+    # Display the license under which Portan is published
+    def license_menu(self, bool_no_output):
+        string_license = """\n# Portan is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Portan is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program.  If not, see <http://www.gnu.org/licenses/>."""
+
+        if (not bool_no_output):
+            print(string_license)
+        return None
+
+
+    # Search the plaintext of the webpage for all the strings to search for in a single pass, ignoring case, and display
+    # every occurrence as soon as it is found, together with the characters before and after it. keyword_search is the
+    # PortanKeywordSearch of --search, or the string, or list of strings, to search for
+    def display_search(self, keyword_search, bool_no_output):
+        # Searching for a string of its own builds the automaton for it first
+        if (not isinstance(keyword_search, PortanKeywordSearch)):
+            keyword_search = PortanKeywordSearch([keyword_search] if (isinstance(keyword_search, str)) else keyword_search)
+
+        # Display the results in order, as they are found, rather than once the whole plaintext was searched
+        if (not bool_no_output):
+            string_terms = ", ".join(keyword_search.get_terms())
+            print("\nSEARCH RESULTS FOR: " + string_terms)
+            print("--------------------" + "-"*len(string_terms))
+        list_found_strings = []
+        for string_term, string_found in keyword_search.find(self.__string_webpage_plain_text):
+            list_found_strings.append(string_found)
+            if (not bool_no_output):
+                print(string_term + "\t<..." + string_found + "...>")
+
+        # Set the required memeber variable for writing if necessary
+        self.__list_found_searched_strings = list_found_strings
+
+        return None
+
+
+    # Display the most common terms and n-grams of the webpage
+    def display_terms(self, bool_no_output = False):
+        if (not bool_no_output) and (self.__dict_terms != None):
+            dict_top = Portan.__term_statistics.get_top(self.__dict_terms)
+            print("\nTERMS: \t\t\t" + str(len(self.__dict_terms["terms"])) + " DIFFERENT IN " + str(dict_top["words"]) + " WORDS")
+            print("------")
+            for string_term, int_count in dict_top["terms"]:
+                print(string_term + "\t" + str(int_count))
+            if (len(dict_top["ngrams"]) > 0):
+                print("\nN-GRAMS:")
+                print("--------")
+                for string_ngram, int_count in dict_top["ngrams"]:
+                    print(string_ngram + "\t" + str(int_count))
+
+        return None
+
+
+    # Search the --index for the webpages that best match the query, and display them with the text around the words found
+    def display_query(self, string_query, int_limit = 10, bool_no_output = False):
+        float_start_time = time.perf_counter()
+        list_hits = Portan.__search_index.search(string_query, int_limit)
+        float_milliseconds = (time.perf_counter() - float_start_time) * 1000
+
+        if (not bool_no_output):
+            print("\nQUERY RESULTS FOR: " + string_query)
+            print("-------------------" + "-"*len(string_query))
+            for int_position, (string_url, float_score, string_snippet) in enumerate(list_hits):
+                print(str(int_position + 1) + ". " + string_url + " (" + format(float_score, ".2f") + ")")
+                print("   <" + string_snippet + ">")
+            print("\nFOUND: \t\t\t" + str(len(list_hits)) + " OF " + str(Portan.__search_index.count()) + " WEBPAGES IN " +\
+                format(float_milliseconds, ".1f") + " MS")
+
+        return None
+
+
+    # Display the stages recorded by --profile as a table, json, or Prometheus text, or write them to a file
+    def display_profile(self, string_format = "table", string_file_path = None):
+        if (string_format == "json"):
+            string_profile = Portan.__profiler.format_json()
+        elif (string_format == "prometheus"):
+            string_profile = Portan.__profiler.format_prometheus()
+        else:
+            string_profile = Portan.__profiler.format_table()
+
+        if (string_file_path == None):
+            print(string_profile)
+            return None
+
+        try:
+            with open(string_file_path, "w") as file_profile:
+                file_profile.write(string_profile)
+        except OSError as error:
+            print("Error: " + string_file_path + ": " + str(error))
+
+        return None
+
+
+    # Display the terms of all the webpages counted by --terms, and write their totals as json should string_file_path be given
+    def display_corpus_terms(self, string_file_path = None, bool_no_output = False):
+        if (not bool_no_output):
+            print(Portan.__term_statistics.format_table())
+
+        if (string_file_path == None):
+            return None
+
+        try:
+            with open(string_file_path, "w") as file_terms:
+                json.dump(Portan.__term_statistics.get_totals(), file_terms, ensure_ascii=False)
+        except OSError as error:
+            print("Error: " + string_file_path + ": " + str(error))
+
+        return None
+
+
+    # This function will create files containing the information found in the hyperlink
+    def write_files(self):
+        # Create the file to strore the general data
+        file_general_data = open(os.getcwd() + "/../general_output.txt", 'w')
+        file_general_data.write("\n\nACCESSED: \t\t%s\nSTATUS CODE: \t\t%s\nLAST MODIFIED: \t\t%s\nDATE ACCESSED: \t\t%s\nCONTENT TYPE: \t\t%s\nCONTENT LANGUAGE: \t%s\nRECEIVED BYTES: \t%s\n\n" \
+            % (self.__string_provided_url, self.__string_status_code, self.__string_last_modified, self.__string_current_date, self.__string_content_type, self.__string_content_language,self.__string_content_length_bytes))
+        file_general_data.write("EMAILS: \t\t%s\nHYPERLINKS: \t\t%s\nTAGS: \t\t\t%s\nSEARCHABLE TEXT: \t%s BYTES" \
+            % (self.__int_num_emails, self.__int_num_hyperlinks, self.__int_num_html_tags, self.__int_num_text))
+        file_general_data.close()
+
+        # Create the file to store the image links
+        file_image_data = open(os.getcwd() + "/../image_output.txt", 'w')
+        file_image_data.write("\n".join(self.__list_image_hyperlinks))
+        file_image_data.close()
+
+        # create the file to store the hypelinks
+        file_hyperlink_data = open(os.getcwd() + "/../hyperlink_output.txt", 'w')
+        file_hyperlink_data.write("\n".join(self.__list_hyperlinks))
+        file_hyperlink_data.close()
+
+        # Create the file to store the emails
+        file_email_data = open(os.getcwd() + "/../email_output.txt", 'w')
+        file_email_data.write("\n".join(self.__list_emails))
+        file_email_data.close()
+
+        # Create the file to store the plaintext
+        file_plaintext_data = open(os.getcwd() + "/../plaintext_output.txt", 'w')
+        file_plaintext_data.write(self.__string_webpage_plain_text)
+        file_plaintext_data.close()
+
+        # Create the file to store the tags
+        file_tag_data = open(os.getcwd() + "/../tag_output.txt", 'w')
+        file_tag_data.write("\n".join(self.__list_html_tags))
+        file_tag_data.close()
+
+        # Create the file to store the searched text
+        file_searched_data = open(os.getcwd() + "/../searched_output.txt", 'w')
+        file_searched_data.write("\n".join(self.__list_found_searched_strings))
+        file_searched_data.close()
+
+        return None
+
+
+    # Displays a message for use when using the flag --verbose
+    def __log(self, string_to_display, bool_display_condition):
+        # This function will only display a message should bool_display_condition is ture
+        if (bool_display_condition):
+            print("<<verbose>> " + string_to_display)
+
+        return None
+
+
+
+# Keeps connections open to every host, so that more webpages from the same host do not each need a new connection
+class PortanConnectionPool:
+    # Constructor taking the number of connections to keep open to each host
+    def __init__(self, int_connections_per_host = 4, float_timeout = 30.0):
+        import ssl
+
+        self.__int_connections_per_host = int_connections_per_host
+        self.__float_timeout = float_timeout
+        self.__lock = threading.Lock()
+        self.__dict_idle_connections = {}               # Contains the open connections not in use, per host
+        self.__dict_host_semaphores = {}                # Limits the number of connections in use, per host
+        self.__ssl_context = ssl.create_default_context()
+
+        return None
+
+
+    # Download a url, following any redirects, and return the status code, the headers, and the body in bytes
+    def fetch(self, string_url, dict_request_headers = None, int_max_redirects = 5, int_max_bytes = 0, bool_text_only = False):
+        # Errors are raised as urllib.error.URLError and urllib.error.HTTPError, as urllib.request.urlopen would.
+        # Should int_max_bytes be given, no more than that many bytes of the body are read
+        pooled_response = self.open(string_url, dict_request_headers, int_max_redirects, bool_text_only)
+        try:
+            bytes_body = b"".join(pooled_response.iterate_chunks(65536, int_max_bytes))
+        finally:
+            pooled_response.close()
+
+        return pooled_response.status, pooled_response.msg, bytes_body
+
+
+    # Request a url, following any redirects, and return the response so that its body can be read in chunks
+    #   NOTE: should bool_text_only be set, a URLError is raised instead for a response whose Content-Type is not text,
+    #         such as an image, without reading its body
+    def open(self, string_url, dict_request_headers = None, int_max_redirects = 5, bool_text_only = False, string_method = "GET"):
+        import http.client
+
+        # The returned PortanPooledResponse has to be closed, which gives its connection back to the pool
+        for int_redirect in range(int_max_redirects + 1):
+            pooled_response = self._open(string_url, dict_request_headers, string_method)
+
+            # Follow the redirect to the new location of the webpage
+            string_location = pooled_response.msg["Location"]
+            if (pooled_response.status in (301, 302, 303, 307, 308)) and (string_location != None):
+                pooled_response.discard()
+                string_url = urllib.parse.urljoin(string_url, string_location)
+                continue
+
+            if (pooled_response.status >= 400):
+                pooled_response.discard()
+                raise urllib.error.HTTPError(string_url, pooled_response.status, http.client.responses.get(pooled_response.status, "Error"),\
+                    pooled_response.msg, None)
+
+            # Close the connection rather than download a body that can not be analyzed
+            string_content_type = pooled_response.msg["Content-Type"]
+            if (bool_text_only) and (not self._is_text_content_type(string_content_type)):
+                pooled_response.close()
+                raise urllib.error.URLError("Not text, but " + string_content_type.split(";")[0].strip())
+
+            return pooled_response
+
+        raise urllib.error.URLError("Too many redirects: " + string_url)
+
+
+    # Not supposed to be called
+    def _open(self, string_url, dict_request_headers, string_method = "GET"):
+        import http.client
+
+        # Send a single request, GET unless asked otherwise, over a pooled connection to the host of the url
+        parse_result = urllib.parse.urlsplit(string_url)
+        if (parse_result.scheme not in ("http", "https")) or (parse_result.hostname == None):
+            raise urllib.error.URLError("unknown url type: " + string_url)
+
+        tuple_host = (parse_result.scheme, parse_result.hostname, parse_result.port)
+        string_path = urllib.parse.urlunsplit(("", "", parse_result.path or "/", parse_result.query, ""))
+        dict_headers = {"User-Agent": "Portan/1.0.0", "Accept-Encoding": "gzip, deflate"}
+        dict_headers.update(dict_request_headers or {})
+
+        # The connection to the host stays in use, and counts towards its limit, until the response is closed
+        semaphore_host = self._get_host_semaphore(tuple_host)
+        semaphore_host.acquire()
+
+        # A kept-alive connection may have been closed by the server in the meantime, so try a new one once
+        for int_attempt in range(2):
+            connection, bool_reused = self._get_connection(tuple_host)
+            try:
+                connection.request(string_method, string_path, headers=dict_headers)
+                response = connection.getresponse()
+            except (http.client.HTTPException, OSError) as error:
+                connection.close()
+                if (bool_reused):
+                    continue
+                semaphore_host.release()
+                raise urllib.error.URLError(error)
+
+            return PortanPooledResponse(self, tuple_host, connection, response, semaphore_host)
+
+        semaphore_host.release()
+        raise urllib.error.URLError("Connection failed: " + string_url)
+
+
+    # Not supposed to be called
+    def _is_text_content_type(self, string_content_type):
+        # Responses without a Content-Type are taken to be text, as are the xml and json types
+        if (string_content_type == None):
+            return True
+
+        string_media_type = string_content_type.split(";")[0].strip().lower()
+        return (string_media_type == "") or string_media_type.startswith("text/") or string_media_type.endswith(("+xml", "+json")) or\
+            (string_media_type in ("application/xml", "application/json", "application/javascript", "application/ecmascript"))
+
+
+    # Not supposed to be called
+    def _get_host_semaphore(self, tuple_host):
+        with self.__lock:
+            if (tuple_host not in self.__dict_host_semaphores):
+                self.__dict_host_semaphores[tuple_host] = threading.BoundedSemaphore(self.__int_connections_per_host)
+
+            return self.__dict_host_semaphores[tuple_host]
+
+
+    # Not supposed to be called
+    def _get_connection(self, tuple_host):
+        import http.client
+
+        # Reuse an idle connection to the host should there be one, otherwise open a new one
+        with self.__lock:
+            list_idle_connections = self.__dict_idle_connections.get(tuple_host)
+            if (list_idle_connections):
+                return list_idle_connections.pop(), True
+
+        string_scheme, string_hostname, int_port = tuple_host
+        if (string_scheme == "https"):
+            connection = http.client.HTTPSConnection(string_hostname, int_port, timeout=self.__float_timeout, context=self.__ssl_context)
+        else:
+            connection = http.client.HTTPConnection(string_hostname, int_port, timeout=self.__float_timeout)
+
+        return connection, False
+
+
+    # Give a connection back to the pool once its response has been read
+    def _release_connection(self, tuple_host, connection):
+        with self.__lock:
+            list_idle_connections = self.__dict_idle_connections.setdefault(tuple_host, [])
+            if (len(list_idle_connections) < self.__int_connections_per_host):
+                list_idle_connections.append(connection)
+                connection = None
+
+        # Close the connection should there already be enough open to the host
+        if (connection != None):
+            connection.close()
+
+        return None
+
+
+    # Close all the idle connections
+    def close(self):
+        with self.__lock:
+            for list_idle_connections in self.__dict_idle_connections.values():
+                for connection in list_idle_connections:
+                    connection.close()
+            self.__dict_idle_connections = {}
+
+        return None
+
+
+
+# Keeps downloaded webpages, their validators, and their analysis on disk, so that webpages that have not changed
+# since the last time are neither downloaded nor analyzed again
+class PortanHttpCache:
+    # Constructor taking the directory to keep the webpages in, the most bytes to use, and the seconds a webpage is
+    # used without asking the server whether it has changed
+    def __init__(self, string_directory, int_max_bytes = 268435456, int_ttl_seconds = 0):
+        self.__string_directory = string_directory
+        self.__int_max_bytes = int_max_bytes
+        self.__int_ttl_seconds = int_ttl_seconds
+        self.__lock = threading.Lock()
+        self.__dict_entry_bytes = None                  # Contains the size of every entry, from least to most recently used
+        self.__int_total_bytes = 0
+
+        os.makedirs(string_directory, exist_ok=True)
+
+        return None
+
+
+    # Return the cache entry of a url, or None should it not be cached
+    def lookup(self, string_url):
+        # The entry contains the status code, the headers, the validators, and the analysis of the webpage.
+        # "bool_is_fresh" is set should the webpage have been checked less than the ttl ago
+        string_key = self._get_key(string_url)
+        try:
+            with open(self._get_path(string_key, ".json"), "r", encoding="utf-8") as file_entry:
+                dict_cache_entry = json.load(file_entry)
+        except (OSError, ValueError):
+            return None
+        if (dict_cache_entry["url"] != string_url):
+            return None
+
+        # Mark the entry as the most recently used one
+        self._mark_used(string_key)
+        dict_cache_entry["bool_is_fresh"] = (time.time() - dict_cache_entry["validated_time"]) < self.__int_ttl_seconds
+
+        return dict_cache_entry
+
+
+    # Return the headers that ask the server to only send the webpage should it have changed since it was cached
+    def get_conditional_headers(self, dict_cache_entry):
+        dict_conditional_headers = {}
+        if (dict_cache_entry != None):
+            if (dict_cache_entry["etag"] != None):
+                dict_conditional_headers["If-None-Match"] = dict_cache_entry["etag"]
+            if (dict_cache_entry["last_modified"] != None):
+                dict_conditional_headers["If-Modified-Since"] = dict_cache_entry["last_modified"]
+
+        return dict_conditional_headers
+
+
+    # Return the cached headers of a webpage as http.client would
+    def get_headers(self, dict_cache_entry):
+        import http.client
+
+        dict_header_info = http.client.HTTPMessage()
+        for string_header_name, string_header_value in dict_cache_entry["headers"]:
+            dict_header_info[string_header_name] = string_header_value
+
+        return dict_header_info
+
+
+    # Return the cached body of a webpage in bytes
+    def read_body(self, string_url):
+        with open(self._get_path(self._get_key(string_url), ".body"), "rb") as file_body:
+            return file_body.read()
+
+
+    # Mark a cache entry as up to date after the server answered 304 Not Modified
+    def revalidate(self, string_url, dict_cache_entry, dict_header_info):
+        # The server may send newer validators and a new date along with the 304
+        dict_cache_entry = dict(dict_cache_entry)
+        del dict_cache_entry["bool_is_fresh"]
+        dict_cache_entry["validated_time"] = time.time()
+        if (dict_header_info != None):
+            list_headers = [tuple_header for tuple_header in dict_cache_entry["headers"] if tuple_header[0].lower() != "date"]
+            list_headers += [("Date", dict_header_info["Date"])] if (dict_header_info["Date"] != None) else []
+            dict_cache_entry["headers"] = list_headers
+            dict_cache_entry["etag"] = dict_header_info["ETag"] or dict_cache_entry["etag"]
+            dict_cache_entry["last_modified"] = dict_header_info["Last-Modified"] or dict_cache_entry["last_modified"]
+        self._write_entry(self._get_key(string_url), dict_cache_entry)
+
+        return None
+
+
+    # Replace the cached analysis of a webpage, such as after analyzing its cached body again
+    def update_analysis(self, string_url, dict_cache_entry, dict_analysis):
+        dict_cache_entry = dict(dict_cache_entry)
+        del dict_cache_entry["bool_is_fresh"]
+        dict_cache_entry["analysis"] = dict_analysis
+        self._write_entry(self._get_key(string_url), dict_cache_entry)
+
+        return None
+
+
+    # Return a temporary file in the cache directory to write a body to while it is being downloaded
+    def open_body_writer(self):
+        import tempfile
+
+        int_file_descriptor, string_path = tempfile.mkstemp(".tmp", "body-", self.__string_directory)
+        os.close(int_file_descriptor)
+
+        return open(string_path, "wb")
+
+
+    # Remove a temporary file returned by open_body_writer
+    def discard_body_writer(self, file_body):
+        file_body.close()
+        os.remove(file_body.name)
+
+        return None
+
+
+    # Cache a webpage, either from its body in bytes or from a file returned by open_body_writer
+    def store(self, string_url, int_status_code, dict_header_info, dict_analysis, bytes_body = None, file_body = None):
+        string_key = self._get_key(string_url)
+
+        # Write the body first, so that an entry never exists without its body
+        if (file_body == None):
+            file_body = self.open_body_writer()
+            file_body.write(bytes_body)
+        file_body.close()
+        os.replace(file_body.name, self._get_path(string_key, ".body"))
+
+        self._write_entry(string_key, {"url": string_url, "status_code": int_status_code, "headers": list(dict_header_info.items()),\
+            "etag": dict_header_info["ETag"], "last_modified": dict_header_info["Last-Modified"], "validated_time": time.time(),\
+            "analysis": dict_analysis})
+
+        # Remove the least recently used webpages should the cache have grown too large
+        self._evict()
+
+        return None
+
+
+    # Not supposed to be called
+    def _get_key(self, string_url):
+        return hashlib.sha256(string_url.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+    # Not supposed to be called
+    def _get_path(self, string_key, string_extension):
+        return os.path.join(self.__string_directory, string_key + string_extension)
+
+
+    # Not supposed to be called
+    def _write_entry(self, string_key, dict_cache_entry):
+        import tempfile
+
+        # Write to a temporary file first, so that a half written entry is never read
+        int_file_descriptor, string_path = tempfile.mkstemp(".tmp", "entry-", self.__string_directory)
+        with os.fdopen(int_file_descriptor, "w", encoding="utf-8") as file_entry:
+            json.dump(dict_cache_entry, file_entry, separators=(",", ":"))
+        os.replace(string_path, self._get_path(string_key, ".json"))
+
+        self._mark_used(string_key)
+
+        return None
+
+
+    # Not supposed to be called
+    def _load_entry_sizes(self):
+        # Find the size of every entry, ordered from the least to the most recently used, the first time it is needed
+        if (self.__dict_entry_bytes != None):
+            return None
+
+        list_entries = []
+        for dir_entry in os.scandir(self.__string_directory):
+            if (dir_entry.name.endswith(".json")):
+                string_key = dir_entry.name[:-5]
+                int_entry_bytes = dir_entry.stat().st_size
+                try:
+                    int_entry_bytes += os.stat(self._get_path(string_key, ".body")).st_size
+                except OSError:
+                    pass
+                list_entries.append((dir_entry.stat().st_mtime, string_key, int_entry_bytes))
+        list_entries.sort()
+
+        self.__dict_entry_bytes = {}
+        self.__int_total_bytes = 0
+        for float_used_time, string_key, int_entry_bytes in list_entries:
+            self.__dict_entry_bytes[string_key] = int_entry_bytes
+            self.__int_total_bytes += int_entry_bytes
+
+        return None
+
+
+    # Not supposed to be called
+    def _mark_used(self, string_key):
+        # Move the entry to the end of the order, and record the time on disk for the next run
+        with self.__lock:
+            self._load_entry_sizes()
+            self.__int_total_bytes -= self.__dict_entry_bytes.pop(string_key, 0)
+            int_entry_bytes = 0
+            for string_extension in (".json", ".body"):
+                try:
+                    int_entry_bytes += os.stat(self._get_path(string_key, string_extension)).st_size
+                except OSError:
+                    pass
+            self.__dict_entry_bytes[string_key] = int_entry_bytes
+            self.__int_total_bytes += int_entry_bytes
+
+        try:
+            os.utime(self._get_path(string_key, ".json"))
+        except OSError:
+            pass
+
+        return None
+
+
+    # Not supposed to be called
+    def _evict(self):
+        # Remove the least recently used entries until the cache fits, but always keep the newest one
+        with self.__lock:
+            while (self.__int_total_bytes > self.__int_max_bytes) and (len(self.__dict_entry_bytes) > 1):
+                string_key = next(iter(self.__dict_entry_bytes))
+                self.__int_total_bytes -= self.__dict_entry_bytes.pop(string_key)
+                for string_extension in (".json", ".body"):
+                    try:
+                        os.remove(self._get_path(string_key, string_extension))
+                    except OSError:
+                        pass
+
+        return None
+
+
+
+# The response to a request sent by PortanConnectionPool, whose connection goes back to the pool once it is closed
+class PortanPooledResponse:
+    # Constructor taking the pool, and the connection and host limit the response is using
+    def __init__(self, connection_pool, tuple_host, connection, response, semaphore_host):
+        self.status = response.status                   # Contains the status code, such as 200
+        self.msg = response.msg                         # Contains the headers of the response
+        self.bool_truncated = False                     # Set once the body was cut off at the maximum number of bytes
+
+        self.__connection_pool = connection_pool
+        self.__tuple_host = tuple_host
+        self.__connection = connection
+        self.__response = response
+        self.__semaphore_host = semaphore_host
+
+        return None
+
+
+    # Read the body chunk by chunk, stopping after int_max_bytes should it be given
+    #   NOTE: a gzipped or deflated body is decompressed as it arrives, and int_max_bytes counts the decompressed bytes,
+    #         so that a small compressed body can not turn into more than that
+    def iterate_chunks(self, int_chunk_size = 65536, int_max_bytes = 0):
+        import zlib
+
+        string_encoding = (self.msg.get("Content-Encoding") or "identity").strip().lower()
+        if (string_encoding not in ("identity", "gzip", "x-gzip", "deflate")):
+            raise urllib.error.URLError("Unsupported Content-Encoding: " + string_encoding)
+
+        decompressor = None
+        bytes_compressed = b""                          # Contains the compressed bytes read, but not decompressed yet
+        int_bytes_read = 0
+        while True:
+            int_read_size = int_chunk_size
+            if (int_max_bytes > 0):
+                int_read_size = min(int_read_size, int_max_bytes - int_bytes_read)
+                if (int_read_size <= 0):
+                    # Stop reading, should there be more of the body left
+                    self.bool_truncated = (not self._is_body_read()) or (len(bytes_compressed) > 0) or\
+                        ((decompressor != None) and (not decompressor.eof))
+                    return None
+
+            if (string_encoding == "identity"):
+                bytes_chunk = self._read(int_read_size)
+                if (len(bytes_chunk) == 0):
+                    return None
+            else:
+                # Read more of the body once everything read so far has been decompressed
+                if (len(bytes_compressed) == 0):
+                    bytes_compressed = self._read(int_chunk_size)
+                    if (len(bytes_compressed) == 0) or ((decompressor != None) and (decompressor.eof)):
+                        return None
+                if (decompressor == None):
+                    decompressor = self._get_decompressor(string_encoding, bytes_compressed)
+
+                try:
+                    bytes_chunk = decompressor.decompress(bytes_compressed, int_read_size)
+                except zlib.error as error:
+                    raise urllib.error.URLError(error)
+                bytes_compressed = decompressor.unconsumed_tail
+                if (len(bytes_chunk) == 0):
+                    continue
+
+            int_bytes_read += len(bytes_chunk)
+            yield bytes_chunk
+
+        return None
+
+
+    # Not supposed to be called
+    def _read(self, int_read_size):
+        import http.client
+
+        # Returns the next bytes of the body as they arrived, which is empty once it has been read
+        try:
+            return self.__response.read1(int_read_size)
+        except (http.client.HTTPException, OSError) as error:
+            raise urllib.error.URLError(error)
+
+
+    # Not supposed to be called
+    def _get_decompressor(self, string_encoding, bytes_first_chunk):
+        import zlib
+
+        # gzip bodies have a gzip header, and deflate bodies should have a zlib header, but some servers send raw deflate
+        # data instead. A zlib header starts with the compression method 8, and is a multiple of 31
+        if (string_encoding in ("gzip", "x-gzip")):
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if (len(bytes_first_chunk) >= 2) and (bytes_first_chunk[0] & 0x0f == 8) and ((bytes_first_chunk[0] * 256 + bytes_first_chunk[1]) % 31 == 0):
+            return zlib.decompressobj(zlib.MAX_WBITS)
+
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+
+
+    # Not supposed to be called
+    def _is_body_read(self):
+        # A response with a known length is not closed by http.client until one more read, so check both
+        return self.__response.isclosed() or (self.__response.length == 0)
+
+
+    # Read and drop the rest of a short body, such as that of a redirect, so the connection can be reused
+    def discard(self):
+        try:
+            for bytes_chunk in self.iterate_chunks(65536, 1048576):
+                pass
+        except urllib.error.URLError:
+            pass
+        self.close()
+
+        return None
+
+
+    # Give the connection back to the pool should the whole body have been read, otherwise close it
+    def close(self):
+        if (self.__connection == None):
+            return None
+
+        if (self._is_body_read()) and (not self.__response.will_close):
+            self.__response.close()
+            self.__connection_pool._release_connection(self.__tuple_host, self.__connection)
+        else:
+            self.__connection.close()
+        self.__semaphore_host.release()
+        self.__connection = None
+
+        return None
+
+
+
+# Splits html into tags and plaintext, either all at once or chunk by chunk while the webpage is being downloaded
+class PortanHtmlTokenizer:
+    TOKEN_TEXT = 0                                      # A plaintext segment
+    TOKEN_TAG = 1                                       # A complete tag, or the last piece of a long one
+    TOKEN_TAG_PART = 2                                  # A piece of a comment or element that continues in the next token
+
+    # The regexes are compiled by the first tokenizer and then shared by all of them
+    __html_tag_name_regex = None
+    __html_tag_end_regex = None
+    __html_comment_end_regex = None
+    __dict_raw_text_end_regex = None
+
+    # Constructor taking the length up to which an unfinished tag is held back to wait for the rest of it
+    def __init__(self, int_max_tag_length = 65536):
+        self.__int_max_tag_length = int_max_tag_length
+        self.__string_pending = ""                      # Contains the unfinished end of the previous chunk
+        self.__int_pending_search_position = 0          # Where in the pending text to continue looking for the end of an element
+        self.__element_end_regex = None                 # Finds the end of the comment or element the tokenizer is inside of
+
+        # Only the first tokenizer has to compile the regexes
+        if (PortanHtmlTokenizer.__html_tag_name_regex != None):
+            return None
+
+        # Create the regex to find the start of a normal tag
+        PortanHtmlTokenizer.__html_tag_name_regex = re.compile(r"""(?P<tag_name>
+            <(/?)                                                           # Opening tag and possible / to close it
+            ([a-zA-Z][^\s\/>]*)                                             # Immediately followed by the name of the tag
+        )""", re.VERBOSE)
+
+        # Create the regex to find the end of a tag, or the start of a quoted attribute value that might contain a >
+        PortanHtmlTokenizer.__html_tag_end_regex = re.compile(r"""(?P<tag_end>
+            =\s*(["'])|                                                     # The opening quote of an attribute value
+            >                                                               # The ending of the tag
+        )""", re.VERBOSE)
+
+        # Create the regexes to find the end of comments, and of the elements whose contents are not plaintext
+        PortanHtmlTokenizer.__html_comment_end_regex = re.compile("-->")
+        PortanHtmlTokenizer.__dict_raw_text_end_regex = {}
+        for string_tag_name in ["script", "noscript", "style"]:
+            PortanHtmlTokenizer.__dict_raw_text_end_regex[string_tag_name] = re.compile("</" + string_tag_name + "\\s*>", re.IGNORECASE)
+
+        return None
+
+
+    # Split the next chunk of html, yielding (token kind, text) pairs for everything that is complete
+    def feed(self, string_chunk, bool_is_final = False):
+        # Comments, document information, and complete script, noscript, and style elements are kept together
+        # as one tag each. Should the chunk end inside one of them, it is given out in TOKEN_TAG_PART pieces up
+        # to the final TOKEN_TAG, so that long elements are not held in memory. An unfinished normal tag at the
+        # end of the chunk is held back until the next chunk. Every character is only looked at a bounded number
+        # of times, so the work grows linearly with the size of the webpage
+        string_buffer = self.__string_pending + string_chunk
+        int_buffer_length = len(string_buffer)
+        int_position = 0
+        int_search_position = self.__int_pending_search_position
+        self.__string_pending = ""
+        self.__int_pending_search_position = 0
+
+        # Remember the positions after which a quote character no longer occurs, so an unterminated
+        # attribute value does not cause the rest of the webpage to be searched again for every tag
+        dict_quote_exhausted_position = {}
+
+        while True:
+            # Inside a comment or element, look for its end
+            if (self.__element_end_regex != None):
+                match_element_end = self.__element_end_regex.search(string_buffer, max(int_search_position, int_position))
+                if (match_element_end != None):
+                    yield (self.TOKEN_TAG, string_buffer[int_position:match_element_end.end()])
+                    self.__element_end_regex = None
+                    int_position = match_element_end.end()
+                    continue
+
+                # Comments and elements that are never closed run until the end of the webpage
+                if (bool_is_final):
+                    yield (self.TOKEN_TAG, string_buffer[int_position:])
+                    self.__element_end_regex = None
+                    return None
+
+                # Hold back enough of the chunk to still find an end that is split over two chunks
+                int_hold_position = max(int_position, int_buffer_length - 32)
+                if (int_hold_position > int_position):
+                    yield (self.TOKEN_TAG_PART, string_buffer[int_position:int_hold_position])
+                self.__string_pending = string_buffer[int_hold_position:]
+                self.__int_pending_search_position = max(0, int_search_position - int_hold_position)
+                return None
+
+            if (int_position >= int_buffer_length):
+                return None
+
+            # Find the next possible tag, everything before it is plaintext
+            int_tag_start = string_buffer.find("<", int_position)
+            if (int_tag_start == -1):
+                yield (self.TOKEN_TEXT, string_buffer[int_position:])
+                return None
+            if (int_tag_start > int_position):
+                yield (self.TOKEN_TEXT, string_buffer[int_position:int_tag_start])
+            int_position = int_tag_start
+
+            # Wait for the next chunk should it not yet be clear what starts here
+            if (not bool_is_final) and (int_buffer_length - int_tag_start < 4):
+                self.__string_pending = string_buffer[int_tag_start:]
+                return None
+
+            if (string_buffer.startswith("<!--", int_tag_start)):
+                # Comments run until "-->" or, should they not be terminated, the end of the webpage
+                self.__element_end_regex = self.__html_comment_end_regex
+                int_search_position = int_tag_start + 4
+                continue
+
+            if (string_buffer.startswith("<!", int_tag_start) or string_buffer.startswith("<?", int_tag_start)):
+                # Document information such as <!DOCTYPE html> runs until the next >
+                int_tag_end = string_buffer.find(">", int_tag_start + 2)
+                if (int_tag_end == -1):
+                    if (bool_is_final):
+                        yield (self.TOKEN_TAG, string_buffer[int_tag_start:])
+                        return None
+                    if (int_buffer_length - int_tag_start <= self.__int_max_tag_length):
+                        self.__string_pending = string_buffer[int_tag_start:]
+                        return None
+                    int_tag_end = int_buffer_length - 1
+                yield (self.TOKEN_TAG, string_buffer[int_tag_start:int_tag_end + 1])
+                int_position = int_tag_end + 1
+                continue
+
+            # A < that does not start a tag name, such as in "a < b", belongs to the plaintext
+            match_tag_name = self.__html_tag_name_regex.match(string_buffer, int_tag_start)
+            if (match_tag_name == None):
+                yield (self.TOKEN_TEXT, "<")
+                int_position = int_tag_start + 1
+                continue
+
+            # Find the end of the tag while skipping over quoted attribute values. Only once all of the
+            # webpage is known, or the tag has grown too long, is an unterminated quote ended at the first >
+            bool_may_wait = (not bool_is_final) and (int_buffer_length - int_tag_start <= self.__int_max_tag_length)
+            int_tag_end = -1
+            int_tag_search_position = match_tag_name.end()
+            while True:
+                match_tag_end = self.__html_tag_end_regex.search(string_buffer, int_tag_search_position)
+                if (match_tag_end == None):
+                    break
+                string_quote = match_tag_end.group(2)
+                if (string_quote == None):
+                    int_tag_end = match_tag_end.end()
+                    break
+
+                # Skip the quoted attribute value, should it never be closed use the first > instead
+                int_quote_end = -1
+                if (dict_quote_exhausted_position.get(string_quote, int_buffer_length + 1) > match_tag_end.end()):
+                    int_quote_end = string_buffer.find(string_quote, match_tag_end.end())
+                    if (int_quote_end == -1):
+                        dict_quote_exhausted_position[string_quote] = match_tag_end.end()
+                if (int_quote_end == -1):
+                    if (bool_may_wait):
+                        break
+                    int_tag_end = string_buffer.find(">", match_tag_end.end())
+                    int_tag_end = -1 if (int_tag_end == -1) else int_tag_end + 1
+                    break
+                int_tag_search_position = int_quote_end + 1
+
+            if (int_tag_end == -1):
+                # Wait for the rest of the tag in the next chunk
+                if (bool_may_wait):
+                    self.__string_pending = string_buffer[int_tag_start:]
+                    return None
+
+                # A tag that is never closed can not contain any further tags, so the rest is plaintext
+                yield (self.TOKEN_TEXT, string_buffer[int_tag_start:])
+                return None
+
+            # Keep the contents of script, noscript, and style elements together with their tags
+            string_tag_name = match_tag_name.group(3).lower()
+            if (match_tag_name.group(2) == "") and (string_tag_name in self.__dict_raw_text_end_regex) and \
+                (string_buffer[int_tag_end-2] != "/"):
+                self.__element_end_regex = self.__dict_raw_text_end_regex[string_tag_name]
+                int_search_position = int_tag_end
+                continue
+
+            yield (self.TOKEN_TAG, string_buffer[int_tag_start:int_tag_end])
+            int_position = int_tag_end
+
+        return None
+
+
+
+# A first-in-first-out queue of (depth, url) pairs used by --crawl, that moves to a temporary file once it grows large
+class PortanCrawlFrontier:
+    # Constructor taking the number of urls to keep in memory
+    def __init__(self, int_max_in_memory = 10000):
+        self.__int_max_in_memory = int_max_in_memory
+        self.__deque_in_memory = collections.deque()     # Contains the urls at the front of the queue
+        self.__file_overflow = None                     # Contains the urls behind them, once there are too many
+        self.__int_overflow_read_position = 0
+        self.__int_overflow_count = 0
+
+        return None
+
+
+    # Add a url to the back of the queue
+    def push(self, int_depth, string_url):
+        import tempfile
+
+        # Once urls are on disk every newer url has to go there as well, to keep them in order
+        if (self.__int_overflow_count == 0) and (len(self.__deque_in_memory) < self.__int_max_in_memory):
+            self.__deque_in_memory.append((int_depth, string_url))
+            return None
+
+        if (self.__file_overflow == None):
+            self.__file_overflow = tempfile.TemporaryFile("w+", encoding="utf-8", errors="surrogateescape")
+        self.__file_overflow.seek(0, os.SEEK_END)
+        self.__file_overflow.write(str(int_depth) + "\t" + string_url + "\n")
+        self.__int_overflow_count += 1
+
+        return None
+
+
+    # Remove and return the (depth, url) pair at the front of the queue
+    def pop(self):
+        self._refill()
+
+        return self.__deque_in_memory.popleft()
+
+
+    # Return the depth of the url at the front of the queue, or None should it be empty
+    def peek_depth(self):
+        self._refill()
+        if (len(self.__deque_in_memory) == 0):
+            return None
+
+        return self.__deque_in_memory[0][0]
+
+
+    # Not supposed to be called
+    def _refill(self):
+        # Move the oldest urls on disk back into memory once the urls in memory have run out
+        if (len(self.__deque_in_memory) > 0) or (self.__int_overflow_count == 0):
+            return None
+
+        self.__file_overflow.seek(self.__int_overflow_read_position)
+        while (self.__int_overflow_count > 0) and (len(self.__deque_in_memory) < self.__int_max_in_memory):
+            string_depth, string_url = self.__file_overflow.readline().rstrip("\n").split("\t", 1)
+            self.__deque_in_memory.append((int(string_depth), string_url))
+            self.__int_overflow_count -= 1
+        self.__int_overflow_read_position = self.__file_overflow.tell()
+
+        # Start the file over once all of it has been read
+        if (self.__int_overflow_count == 0):
+            self.__file_overflow.seek(0)
+            self.__file_overflow.truncate()
+            self.__int_overflow_read_position = 0
+
+        return None
+
+
+    # Remove the temporary file
+    def close(self):
+        if (self.__file_overflow != None):
+            self.__file_overflow.close()
+            self.__file_overflow = None
+
+        return None
+
+
+
+# Fetches, parses, and keeps the robots.txt of every host, so that urls are checked against its rules in memory without asking
+# the host again until they expire. The rules of the group for Portan, or else those of the group for *, are matched as RFC 9309
+# describes, the longest matching rule winning and Allow winning over a Disallow as long, where * matches any characters and a $
+# at the end matches the end of the url. A missing robots.txt allows everything, while one that can not be reached, or that the
+# server fails to give, disallows everything for a few minutes before it is asked for again
+class PortanRobotsRules:
+    STRING_USER_AGENT = "portan"
+
+    # Constructor taking the number of seconds the robots.txt of a host is kept
+    def __init__(self, int_ttl_seconds = 86400):
+        self.__int_ttl_seconds = int_ttl_seconds
+        self.__lock = threading.Lock()
+        self.__dict_hosts = {}                          # Contains the expiry time, rules, and sitemaps of every host
+        self.__dict_host_locks = {}                     # Makes sure the robots.txt of a host is only downloaded once at a time
+
+        return None
+
+
+    # Return whether the robots.txt of the host of the url allows it to be downloaded
+    def is_allowed(self, string_url):
+        parse_result = urllib.parse.urlsplit(string_url)
+        if (parse_result.scheme not in ("http", "https")) or (parse_result.hostname == None):
+            return True
+
+        # The rules are sorted so that the first one that matches is the one that wins
+        string_path = (parse_result.path or "/") + ("?" + parse_result.query if (parse_result.query != "") else "")
+        if (string_path == "/robots.txt"):
+            return True
+        for int_length, bool_allow, tuple_segments, bool_anchored in self._get_host(parse_result)[1]:
+            if (self._match_rule(string_path, tuple_segments, bool_anchored)):
+                return bool_allow
+
+        return True
+
+
+    # Return the sitemaps the robots.txt of the host of the url lists
+    def get_sitemaps(self, string_url):
+        parse_result = urllib.parse.urlsplit(string_url)
+        if (parse_result.scheme not in ("http", "https")) or (parse_result.hostname == None):
+            return []
+
+        return list(self._get_host(parse_result)[2])
+
+
+    # Not supposed to be called
+    def _get_host(self, parse_result):
+        # Returns the expiry time, rules, and sitemaps of the host, downloading its robots.txt should it not be known or have expired
+        tuple_host = (parse_result.scheme, parse_result.hostname, parse_result.port)
+        with self.__lock:
+            tuple_entry = self.__dict_hosts.get(tuple_host)
+            if (tuple_entry != None) and (tuple_entry[0] > time.time()):
+                return tuple_entry
+            lock_host = self.__dict_host_locks.setdefault(tuple_host, threading.Lock())
+
+        # Another thread may have downloaded it while this one was waiting
+        with lock_host:
+            with self.__lock:
+                tuple_entry = self.__dict_hosts.get(tuple_host)
+            if (tuple_entry == None) or (tuple_entry[0] <= time.time()):
+                tuple_entry = self._fetch(urllib.parse.urlunsplit((parse_result.scheme, parse_result.netloc.rpartition("@")[2], "/robots.txt", "", "")))
+                with self.__lock:
+                    self.__dict_hosts[tuple_host] = tuple_entry
+
+        return tuple_entry
+
+
+    # Not supposed to be called
+    def _fetch(self, string_robots_url):
+        # Only the first 500 KB of a robots.txt are read, as RFC 9309 allows
+        float_now = time.time()
+        tuple_disallow_all = (float_now + min(self.__int_ttl_seconds, 600), ((1, False, ("/",), False),), ())
+        try:
+            pooled_response = Portan()._get_connection_pool().open(string_robots_url)
+            try:
+                bytes_robots = b"".join(pooled_response.iterate_chunks(65536, 512000))
+            finally:
+                pooled_response.close()
+        except urllib.error.HTTPError as error:
+            if (400 <= error.code < 500) and (error.code != 429):
+                return float_now + self.__int_ttl_seconds, (), ()
+            return tuple_disallow_all
+        except urllib.error.URLError:
+            return tuple_disallow_all
+
+        tuple_rules, tuple_sitemaps = self._parse(bytes_robots.decode("utf-8", "replace"))
+
+        return float_now + self.__int_ttl_seconds, tuple_rules, tuple_sitemaps
+
+
+    # Not supposed to be called
+    def _parse(self, string_robots):
+        # Returns the rules for Portan, sorted longest first, and the sitemaps. A group starts with one or more User-agent
+        # lines, and the rules of every group naming Portan are used should there be one, otherwise those of the groups for *
+        list_own_rules = []
+        list_any_rules = []
+        list_sitemaps = []
+        set_group_agents = set()
+        bool_has_own_group = False
+        bool_reading_agents = False
+        for string_line in string_robots.lstrip("\ufeff").splitlines():
+            string_key, string_colon, string_value = string_line.split("#", 1)[0].partition(":")
+            string_key = string_key.strip().lower()
+            string_value = string_value.strip()
+            if (string_colon == ""):
+                continue
+
+            if (string_key == "user-agent"):
+                if (not bool_reading_agents):
+                    set_group_agents = set()
+                    bool_reading_agents = True
+                set_group_agents.add(string_value.split("/")[0].strip().lower())
+                bool_has_own_group = bool_has_own_group or (PortanRobotsRules.STRING_USER_AGENT in set_group_agents)
+            elif (string_key in ("allow", "disallow")):
+                # An empty Disallow allows everything, so it adds no rule, just as an empty Allow
+                bool_reading_agents = False
+                if (string_value == ""):
+                    continue
+                tuple_rule = self._compile_rule(string_value, string_key == "allow")
+                if (PortanRobotsRules.STRING_USER_AGENT in set_group_agents):
+                    list_own_rules.append(tuple_rule)
+                if ("*" in set_group_agents):
+                    list_any_rules.append(tuple_rule)
+            elif (string_key == "sitemap") and (string_value != ""):
+                list_sitemaps.append(string_value)
+
+        list_rules = list_own_rules if (bool_has_own_group) else list_any_rules
+        list_rules.sort(key=lambda tuple_rule: (-tuple_rule[0], not tuple_rule[1]))
+
+        return tuple(list_rules), tuple(list_sitemaps)
+
+
+    # Not supposed to be called
+    def _compile_rule(self, string_value, bool_allow):
+        # A rule is kept as its length, whether it allows, the parts between its wildcards, and whether it ends with $.
+        # Characters that are not ascii are percent-encoded, as they are in the urls the rule is matched with
+        string_path = urllib.parse.quote(string_value, safe="/?=&;:@+$,!*'()%#~[]")
+        bool_anchored = string_path.endswith("$")
+        if (bool_anchored):
+            string_path = string_path[:-1]
+
+        return len(string_value), bool_allow, tuple(string_path.split("*")), bool_anchored
+
+
+    # Not supposed to be called
+    def _match_rule(self, string_path, tuple_segments, bool_anchored):
+        # The path has to start with the first part, after which every other part is found as early as possible, leaving the
+        # most room for the parts after it. This takes no backtracking, however many wildcards the rule has
+        if (not string_path.startswith(tuple_segments[0])):
+            return False
+
+        int_position = len(tuple_segments[0])
+        for string_segment in tuple_segments[1:-1] if (bool_anchored) else tuple_segments[1:]:
+            int_position = string_path.find(string_segment, int_position)
+            if (int_position == -1):
+                return False
+            int_position += len(string_segment)
+
+        # Should the rule end with $, its last part has to end the path, after the parts before it
+        if (not bool_anchored):
+            return True
+        if (len(tuple_segments) == 1):
+            return len(string_path) == int_position
+
+        return string_path.endswith(tuple_segments[-1]) and (len(string_path) - len(tuple_segments[-1]) >= int_position)
+
+
+
+# Reads the urls listed in sitemaps, and in the sitemaps that sitemap indexes list, while they download. The xml is parsed
+# incrementally and every <url> is dropped as soon as its <loc> was returned, and gzipped sitemaps (.xml.gz) are decompressed
+# chunk by chunk, so that sitemaps of millions of urls take no more memory than a chunk. Plain text sitemaps, of one url per
+# line, and local files are read as well. Should robots rules be given, only the urls they allow are returned
+class PortanSitemapReader:
+    # Constructor taking the sitemaps to read, the PortanRobotsRules to obey, and the most sitemaps to read
+    def __init__(self, list_sitemaps, robots_rules = None, int_max_sitemaps = 10000, int_chunk_size = 65536):
+        self.__list_sitemaps = list(list_sitemaps)
+        self.__robots_rules = robots_rules
+        self.__int_max_sitemaps = int_max_sitemaps
+        self.__int_chunk_size = int_chunk_size
+
+        return None
+
+
+    # Return the urls one at a time, those of the sitemaps an index lists after those of the sitemaps before them
+    def __iter__(self):
+        import zlib
+        import xml.etree.ElementTree
+
+        # Only the urls of the sitemaps are kept, so an index can not make a sitemap be read twice
+        deque_sitemaps = collections.deque(self.__list_sitemaps)
+        set_seen_sitemaps = set(deque_sitemaps)
+        int_sitemaps_read = 0
+        while (len(deque_sitemaps) > 0) and (int_sitemaps_read < self.__int_max_sitemaps):
+            string_sitemap = deque_sitemaps.popleft()
+            int_sitemaps_read += 1
+            try:
+                for bool_is_sitemap, string_url in self._read_sitemap(string_sitemap):
+                    if (bool_is_sitemap):
+                        if (string_url not in set_seen_sitemaps):
+                            set_seen_sitemaps.add(string_url)
+                            deque_sitemaps.append(string_url)
+                    elif (self.__robots_rules == None) or (self.__robots_rules.is_allowed(string_url)):
+                        yield string_url
+            except urllib.error.URLError as error:
+                print("Error: " + string_sitemap + ": " + str(error.reason))
+            except (OSError, zlib.error, xml.etree.ElementTree.ParseError) as error:
+                print("Error: " + string_sitemap + ": " + str(error))
+
+        return None
+
+
+    # Not supposed to be called
+    def _read_sitemap(self, string_sitemap):
+        # Returns whether every url found is a sitemap, as listed by an index, and the url. The response, or file, is closed
+        # even should the urls stop being used before the end of the sitemap
+        if (os.path.isfile(string_sitemap)):
+            file_sitemap = open(string_sitemap, "rb")
+            iterable_byte_chunks = iter(lambda: file_sitemap.read(self.__int_chunk_size), b"")
+            function_close = file_sitemap.close
+        else:
+            pooled_response = Portan()._get_connection_pool().open(string_sitemap)
+            iterable_byte_chunks = pooled_response.iterate_chunks(self.__int_chunk_size)
+            function_close = pooled_response.close
+
+        try:
+            yield from self._parse_sitemap(self._decompress_chunks(iterable_byte_chunks))
+        finally:
+            function_close()
+
+        return None
+
+
+    # Not supposed to be called
+    def _decompress_chunks(self, iterable_byte_chunks):
+        import zlib
+
+        # A gzipped sitemap is found by the gzip header of its first chunk rather than by its name, as a server may already
+        # have removed a gzip Content-Encoding. Every chunk decompresses to at most the chunk size
+        decompressor = None
+        bool_is_first_chunk = True
+        for bytes_chunk in iterable_byte_chunks:
+            if (bool_is_first_chunk) and (bytes_chunk.startswith(b"\x1f\x8b")):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            bool_is_first_chunk = False
+            if (decompressor == None):
+                yield bytes_chunk
+                continue
+
+            while (True):
+                bytes_decompressed = decompressor.decompress(bytes_chunk, self.__int_chunk_size)
+                bytes_chunk = decompressor.unconsumed_tail
+                if (len(bytes_decompressed) > 0):
+                    yield bytes_decompressed
+                if (decompressor.eof):
+                    return None
+                if (len(bytes_chunk) == 0) and (len(bytes_decompressed) < self.__int_chunk_size):
+                    break
+
+        return None
+
+
+    # Not supposed to be called
+    def _parse_sitemap(self, iterable_byte_chunks):
+        import itertools
+        import xml.etree.ElementTree
+
+        # A sitemap that does not start with a tag is a plain text sitemap
+        iterator_byte_chunks = iter(iterable_byte_chunks)
+        bytes_start = b""
+        for bytes_chunk in iterator_byte_chunks:
+            bytes_start += bytes_chunk
+            if (bytes_start.lstrip(b"\xef\xbb\xbf \t\r\n") != b""):
+                break
+        if (not bytes_start.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<")):
+            yield from self._parse_text_sitemap(itertools.chain((bytes_start,), iterator_byte_chunks))
+            return None
+
+        # Only the <loc> directly inside the <url> or <sitemap> elements is used, not those of image and video extensions.
+        # Every element is removed from the root once it ends, so that the tree never grows beyond a single one
+        pull_parser = xml.etree.ElementTree.XMLPullParser(("start", "end"))
+        element_root = None
+        int_depth = 0
+        for bytes_chunk in itertools.chain((bytes_start,), iterator_byte_chunks, (None,)):
+            if (bytes_chunk == None):
+                pull_parser.close()
+            else:
+                pull_parser.feed(bytes_chunk)
+
+            for string_event, element in pull_parser.read_events():
+                if (string_event == "start"):
+                    int_depth += 1
+                    if (int_depth == 1):
+                        element_root = element
+                    continue
+
+                int_depth -= 1
+                if (int_depth == 2) and (element.tag.rpartition("}")[2] == "loc") and (element.text != None):
+                    yield element_root.tag.rpartition("}")[2] == "sitemapindex", element.text.strip()
+                elif (int_depth == 1):
+                    element_root.clear()
+
+        return None
+
+
+    # Not supposed to be called
+    def _parse_text_sitemap(self, iterable_byte_chunks):
+        import itertools
+
+        # Every line is a url, and a line can be split between chunks. A line longer than any url is dropped
+        bytes_carry = b""
+        for bytes_chunk in itertools.chain(iterable_byte_chunks, (b"\n",)):
+            list_lines = (bytes_carry + bytes_chunk).split(b"\n")
+            bytes_carry = list_lines.pop()
+            if (len(bytes_carry) > 65536):
+                bytes_carry = b""
+            for bytes_line in list_lines:
+                string_url = bytes_line.decode("utf-8", "replace").strip()
+                if (string_url.startswith(("http://", "https://"))):
+                    yield False, string_url
+
+        return None
+
+
+
+# Keeps the plaintext of analyzed webpages in an on-disk inverted index, so that everything analyzed can be searched
+# without downloading or scanning the webpages again. Every term has a posting for every webpage it occurs on, with
+# the offsets it occurs at and its BM25 weight on that webpage quantized to an impact of 1 to 255. Postings are read
+# from the highest impact down, so a query stops as soon as no webpage it has not seen yet can still make the results
+class PortanSearchIndex:
+    __term_regex = None                                 # Compiled the first time it is needed, then shared by all indexes
+
+    # Constructor taking the file of the index, and after how many added webpages they are committed to disk
+    def __init__(self, string_file_path, int_commit_every = 256):
+        import sqlite3
+
+        self.__int_commit_every = int_commit_every
+        self.__int_uncommitted = 0                      # Contains the number of webpages changed since the last commit
+        self.__dict_term_ids = {}                       # Contains the ids of the terms used most recently
+        self.__dict_df_changes = collections.Counter()  # Contains the change in webpages per term id since the last commit
+        self.__list_postings = []                       # Contains the postings added since the last commit
+        self.__connection = sqlite3.connect(string_file_path)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("PRAGMA cache_size=-65536")
+
+        # The postings are kept twice, by webpage to look up a term on a known webpage, and by impact to read the best first
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS pages (id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL,"\
+            " text_hash BLOB NOT NULL, length INTEGER NOT NULL, indexed_at REAL NOT NULL, plaintext BLOB NOT NULL)")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL, df INTEGER NOT NULL)")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS postings (term_id INTEGER NOT NULL, page_id INTEGER NOT NULL,"\
+            " impact INTEGER NOT NULL, offsets BLOB NOT NULL, PRIMARY KEY (term_id, page_id)) WITHOUT ROWID")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS postings_by_impact ON postings (term_id, impact DESC, page_id)")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY, num_pages INTEGER NOT NULL, total_length INTEGER NOT NULL)")
+        self.__connection.execute("INSERT OR IGNORE INTO stats (id, num_pages, total_length) VALUES (0, 0, 0)")
+        self.__connection.commit()
+
+        self.__int_num_pages, self.__int_total_length = self.__connection.execute("SELECT num_pages, total_length FROM stats").fetchone()
+
+        return None
+
+
+    # Add the plaintext of a webpage to the index, replacing what was indexed for the url before
+    #   NOTE: returns False should the plaintext not have changed since it was indexed
+    def add(self, string_url, string_plaintext):
+        import zlib
+        import array
+
+        bytes_text_hash = hashlib.blake2b(string_plaintext.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        tuple_page = self.__connection.execute("SELECT id, text_hash FROM pages WHERE url = ?", (string_url,)).fetchone()
+        if (tuple_page != None) and (tuple_page[1] == bytes_text_hash):
+            return False
+        if (tuple_page != None):
+            self._remove_page(tuple_page[0])
+
+        # Collect the offsets of every term, and count the terms as the length of the webpage
+        dict_term_offsets = {}
+        int_length = 0
+        for match_term in self._get_term_regex().finditer(string_plaintext):
+            int_length += 1
+            string_term = match_term.group(0).casefold()
+            if (string_term not in dict_term_offsets):
+                dict_term_offsets[string_term] = array.array("I")
+            dict_term_offsets[string_term].append(match_term.start())
+
+        int_page_id = self.__connection.execute("INSERT INTO pages (url, text_hash, length, indexed_at, plaintext) VALUES (?, ?, ?, ?, ?)",\
+            (string_url, bytes_text_hash, int_length, time.time(), zlib.compress(string_plaintext.encode("utf-8", "surrogatepass")))).lastrowid
+
+        # The impacts use the average length of the webpages indexed so far, as the scores of BM25 would
+        float_average_length = (self.__int_total_length + int_length) / (self.__int_num_pages + 1)
+        dict_term_ids = self._get_term_ids(dict_term_offsets.keys())
+        for string_term, array_offsets in dict_term_offsets.items():
+            int_term_id = dict_term_ids[string_term]
+            self.__list_postings.append((int_term_id, int_page_id, self._get_impact(len(array_offsets), int_length, float_average_length),\
+                array_offsets.tobytes()))
+            self.__dict_df_changes[int_term_id] += 1
+
+        self.__int_num_pages += 1
+        self.__int_total_length += int_length
+
+        # Commit in batches, as committing every webpage would make indexing wait on the disk
+        self.__int_uncommitted += 1
+        if (self.__int_uncommitted >= self.__int_commit_every):
+            self.commit()
+
+        return True
+
+
+    # Remove a webpage from the index, returning whether it was indexed
+    def remove(self, string_url):
+        tuple_page = self.__connection.execute("SELECT id FROM pages WHERE url = ?", (string_url,)).fetchone()
+        if (tuple_page == None):
+            return False
+
+        self._remove_page(tuple_page[0])
+        self.__int_uncommitted += 1
+
+        return True
+
+
+    # Return the (url, score, snippet) of the webpages containing every word of the query with the highest BM25 scores, best first
+    def search(self, string_query, int_limit = 10, int_snippet_length = 160):
+        import heapq
+
+        # Uncommitted webpages and term counts would otherwise not be found
+        if (self.__int_uncommitted > 0):
+            self.commit()
+
+        # Look up every word, rarest first, as a word that is not indexed means no webpage contains all of them
+        list_terms = []
+        for string_term in dict.fromkeys([match_term.group(0).casefold() for match_term in self._get_term_regex().finditer(string_query)]):
+            tuple_term = self.__connection.execute("SELECT id, df FROM terms WHERE term = ?", (string_term,)).fetchone()
+            if (tuple_term == None) or (tuple_term[1] <= 0):
+                return []
+            list_terms.append((tuple_term[1], tuple_term[0], string_term))
+        if (len(list_terms) == 0):
+            return []
+        list_terms.sort()
+
+        # Every term weighs its impacts by how rare it is, and starts with the highest impact it could still have
+        list_term_ids = [int_term_id for int_df, int_term_id, string_term in list_terms]
+        list_weights = [math.log(1 + (self.__int_num_pages - int_df + 0.5) / (int_df + 0.5)) * 2.2 / 255 for int_df, int_term_id, string_term in list_terms]
+        list_cursors = [(256, -1) for int_term_id in list_term_ids]
+        list_heap_hits = []                             # Contains the (score, page id) of the best webpages found so far
+        set_seen_page_ids = set()
+
+        # Read the postings of every term in turn, best impact first, and score every webpage the first time it is seen
+        # by looking up its other terms. No unseen webpage can score more than the sum of the impacts the terms are at
+        bool_is_exhausted = False
+        while (not bool_is_exhausted):
+            for int_index, int_term_id in enumerate(list_term_ids):
+                int_last_impact, int_last_page_id = list_cursors[int_index]
+                list_postings = self.__connection.execute("SELECT impact, page_id FROM postings INDEXED BY postings_by_impact WHERE term_id = ?"\
+                    " AND (impact < ? OR (impact = ? AND page_id > ?)) ORDER BY impact DESC, page_id LIMIT 64",\
+                    (int_term_id, int_last_impact, int_last_impact, int_last_page_id)).fetchall()
+                if (len(list_postings) == 0):
+                    bool_is_exhausted = True
+                    break
+                list_cursors[int_index] = list_postings[-1]
+
+                for int_impact, int_page_id in list_postings:
+                    if (int_page_id in set_seen_page_ids):
+                        continue
+                    set_seen_page_ids.add(int_page_id)
+                    float_score = self._get_page_score(int_page_id, list_term_ids, list_weights)
+                    if (float_score == None):
+                        continue
+                    if (len(list_heap_hits) < int_limit):
+                        heapq.heappush(list_heap_hits, (float_score, -int_page_id))
+                    elif ((float_score, -int_page_id) > list_heap_hits[0]):
+                        heapq.heapreplace(list_heap_hits, (float_score, -int_page_id))
+
+            float_threshold = sum([list_weights[int_index] * list_cursors[int_index][0] for int_index in range(len(list_term_ids))])
+            if (len(list_heap_hits) >= int_limit) and (list_heap_hits[0][0] >= float_threshold):
+                break
+
+        # Find the url, and the text around the rarest word, of every result
+        list_hits = []
+        for float_score, int_negative_page_id in sorted(list_heap_hits, reverse=True):
+            string_url, string_snippet = self._get_snippet(-int_negative_page_id, list_terms, int_snippet_length)
+            list_hits.append((string_url, float_score, string_snippet))
+
+        return list_hits
+
+
+    # Return the number of webpages in the index
+    def count(self):
+        return self.__int_num_pages
+
+
+    # Write the webpages added since the last commit to disk
+    def commit(self):
+        # The postings are inserted in the order of the index, which is far faster than inserting them webpage by webpage
+        self.__list_postings.sort()
+        self.__connection.executemany("INSERT INTO postings (term_id, page_id, impact, offsets) VALUES (?, ?, ?, ?)", self.__list_postings)
+        self.__list_postings = []
+        self.__connection.executemany("UPDATE terms SET df = df + ? WHERE id = ?",\
+            [(int_change, int_term_id) for int_term_id, int_change in self.__dict_df_changes.items() if (int_change != 0)])
+        self.__connection.execute("UPDATE stats SET num_pages = ?, total_length = ? WHERE id = 0", (self.__int_num_pages, self.__int_total_length))
+        self.__connection.commit()
+        self.__dict_df_changes.clear()
+        self.__int_uncommitted = 0
+
+        return None
+
+
+    # Commit and close the index
+    def close(self):
+        if (self.__connection != None):
+            self.commit()
+            self.__connection.close()
+            self.__connection = None
+
+        return None
+
+
+    # Not supposed to be called
+    def _get_term_regex(self):
+        # Words are runs of letters and digits, terms longer than 64 characters are rather encoded data than words
+        if (PortanSearchIndex.__term_regex == None):
+            PortanSearchIndex.__term_regex = re.compile("\\w{1,64}")
+
+        return PortanSearchIndex.__term_regex
+
+
+    # Not supposed to be called
+    def _get_impact(self, int_term_frequency, int_length, float_average_length):
+        # Returns the BM25 weight of a term (k1 = 1.2, b = 0.75) without the rarity of the term, from 1 to 255
+        float_weight = int_term_frequency * 2.2 / (int_term_frequency + 1.2 * (0.25 + 0.75 * int_length / max(float_average_length, 1)))
+
+        return max(1, min(255, round(float_weight * 255 / 2.2)))
+
+
+    # Not supposed to be called
+    def _get_term_ids(self, iterable_terms):
+        # Returns the ids of the terms, adding the terms that are not in the index yet
+        dict_term_ids = {}
+        list_unknown_terms = []
+        for string_term in iterable_terms:
+            if (string_term in self.__dict_term_ids):
+                dict_term_ids[string_term] = self.__dict_term_ids[string_term]
+            else:
+                list_unknown_terms.append(string_term)
+
+        # Forget the ids once there are too many to keep in memory
+        if (len(self.__dict_term_ids) + len(list_unknown_terms) > 1000000):
+            self.__dict_term_ids.clear()
+
+        self.__connection.executemany("INSERT OR IGNORE INTO terms (term, df) VALUES (?, 0)", [(string_term,) for string_term in list_unknown_terms])
+        for int_start in range(0, len(list_unknown_terms), 500):
+            list_terms_part = list_unknown_terms[int_start:int_start+500]
+            for int_term_id, string_term in self.__connection.execute("SELECT id, term FROM terms WHERE term IN (" +\
+                ",".join(["?"] * len(list_terms_part)) + ")", list_terms_part):
+                dict_term_ids[string_term] = int_term_id
+                self.__dict_term_ids[string_term] = int_term_id
+
+        return dict_term_ids
+
+
+    # Not supposed to be called
+    def _get_page_score(self, int_page_id, list_term_ids, list_weights):
+        # Returns the score of a webpage, or None should it not contain every term
+        float_score = 0.0
+        for int_index, int_term_id in enumerate(list_term_ids):
+            tuple_posting = self.__connection.execute("SELECT impact FROM postings WHERE term_id = ? AND page_id = ?", (int_term_id, int_page_id)).fetchone()
+            if (tuple_posting == None):
+                return None
+            float_score += list_weights[int_index] * tuple_posting[0]
+
+        return float_score
+
+
+    # Not supposed to be called
+    def _get_snippet(self, int_page_id, list_terms, int_snippet_length):
+        import zlib
+        import array
+
+        # Returns the url of a webpage and the text around the first offset of the rarest term, with the terms in brackets
+        string_url, bytes_plaintext = self.__connection.execute("SELECT url, plaintext FROM pages WHERE id = ?", (int_page_id,)).fetchone()
+        string_plaintext = zlib.decompress(bytes_plaintext).decode("utf-8", "surrogatepass")
+        array_offsets = array.array("I")
+        array_offsets.frombytes(self.__connection.execute("SELECT offsets FROM postings WHERE term_id = ? AND page_id = ?",\
+            (list_terms[0][1], int_page_id)).fetchone()[0])
+
+        int_start = max(0, array_offsets[0] - int_snippet_length // 3)
+        int_end = min(len(string_plaintext), int_start + int_snippet_length)
+        string_snippet = string_plaintext[int_start:int_end]
+        for string_term in [string_term for int_df, int_term_id, string_term in list_terms]:
+            string_snippet = re.sub("(?<!\\w)(" + re.escape(string_term) + ")(?!\\w)", "[\\1]", string_snippet, flags=re.IGNORECASE)
+
+        return string_url, ("..." if (int_start > 0) else "") + string_snippet + ("..." if (int_end < len(string_plaintext)) else "")
+
+
+    # Not supposed to be called
+    def _remove_page(self, int_page_id):
+        import zlib
+
+        # The postings of the webpage might not have been inserted yet
+        if (len(self.__list_postings) > 0):
+            self.commit()
+
+        # Tokenize the stored plaintext again to find the postings of the webpage
+        int_length, bytes_plaintext = self.__connection.execute("SELECT length, plaintext FROM pages WHERE id = ?", (int_page_id,)).fetchone()
+        set_terms = set([match_term.group(0).casefold() for match_term in\
+            self._get_term_regex().finditer(zlib.decompress(bytes_plaintext).decode("utf-8", "surrogatepass"))])
+        dict_term_ids = self._get_term_ids(set_terms)
+        self.__connection.executemany("DELETE FROM postings WHERE term_id = ? AND page_id = ?",\
+            [(int_term_id, int_page_id) for int_term_id in dict_term_ids.values()])
+        for int_term_id in dict_term_ids.values():
+            self.__dict_df_changes[int_term_id] -= 1
+        self.__connection.execute("DELETE FROM pages WHERE id = ?", (int_page_id,))
+
+        self.__int_num_pages -= 1
+        self.__int_total_length -= int_length
+
+        return None
+
+
+
+# Appends one compact json record per webpage to a single file, or stdout, optionally gzipped. The records are
+# collected and written in batches, so that millions of webpages do not mean millions of small writes
+class PortanNdjsonWriter:
+    # Constructor taking the file to append to, or "-" for stdout, whether to gzip it, and how many records to collect
+    def __init__(self, string_file_path, bool_gzip = False, int_flush_every = 256):
+        import gzip
+
+        self.__int_flush_every = int_flush_every
+        self.__list_pending_lines = []                  # Contains the records that have not been written yet
+        self.__file_raw = None                          # Contains the file opened for the records, None for stdout
+
+        # A gzipped file that is appended to holds one gzip member per run, which gzip reads as one stream
+        if (string_file_path == "-"):
+            self.__file_output = sys.stdout.buffer
+        else:
+            self.__file_raw = open(string_file_path, "ab")
+            self.__file_output = self.__file_raw
+        if (bool_gzip):
+            self.__file_output = gzip.GzipFile(fileobj=self.__file_output, mode="wb")
+
+        return None
+
+
+    # Add a record, writing the collected records once there are enough of them
+    def write(self, dict_record):
+        self.__list_pending_lines.append(json.dumps(dict_record, ensure_ascii=False, separators=(",", ":")))
+        if (len(self.__list_pending_lines) >= self.__int_flush_every):
+            self.flush()
+
+        return None
+
+
+    # Write the collected records
+    def flush(self):
+        if (len(self.__list_pending_lines) > 0):
+            self.__file_output.write(("\n".join(self.__list_pending_lines) + "\n").encode("utf-8", "surrogatepass"))
+            self.__list_pending_lines = []
+        self.__file_output.flush()
+
+        return None
+
+
+    # Write the collected records and close the file, but not stdout
+    def close(self):
+        self.flush()
+        if (self.__file_output != self.__file_raw) and (self.__file_output != sys.stdout.buffer):
+            self.__file_output.close()
+        if (self.__file_raw != None):
+            self.__file_raw.close()
+            self.__file_raw = None
+
+        return None
+
+
+
+# Records the calls, wall time, CPU time, input size, and matches of every stage webpages go through, and the
+# memory every stage used at its peak while tracemalloc is tracing. Safe to share between the threads of batch()
+class PortanProfiler:
+    # Constructor
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__dict_stages = {}                         # Contains the totals of every stage, in the order the stages were first run
+
+        return None
+
+
+    # Run a function as a stage, recording its times, the size of its input, and the matches function_count_matches
+    # returns once it is done. Returns whatever the function returns
+    def run_stage(self, string_stage, function_stage, int_input_size = 0, function_count_matches = None):
+        import tracemalloc
+
+        # The peak is measured from the memory already in use, so that only what the stage allocated is counted
+        bool_is_tracing = tracemalloc.is_tracing()
+        int_memory_before = 0
+        if (bool_is_tracing):
+            int_memory_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        float_wall_start = time.perf_counter()
+        float_cpu_start = time.thread_time()
+        result = function_stage()
+        float_cpu_seconds = time.thread_time() - float_cpu_start
+        float_wall_seconds = time.perf_counter() - float_wall_start
+
+        int_peak_memory = (tracemalloc.get_traced_memory()[1] - int_memory_before) if (bool_is_tracing) else 0
+        int_matches = function_count_matches() if (function_count_matches != None) else 0
+        self.add_stage(string_stage, float_wall_seconds, float_cpu_seconds, int_input_size, int_matches, int_peak_memory)
+
+        return result
+
+
+    # Add a stage that was measured elsewhere, such as a download
+    def add_stage(self, string_stage, float_wall_seconds, float_cpu_seconds = 0.0, int_input_size = 0, int_matches = 0, int_peak_memory = 0):
+        with self.__lock:
+            if (string_stage not in self.__dict_stages):
+                self.__dict_stages[string_stage] = {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "input_size": 0, "matches": 0,\
+                    "peak_memory": 0}
+            dict_stage = self.__dict_stages[string_stage]
+            dict_stage["calls"] += 1
+            dict_stage["wall_seconds"] += float_wall_seconds
+            dict_stage["cpu_seconds"] += float_cpu_seconds
+            dict_stage["input_size"] += int_input_size
+            dict_stage["matches"] += int_matches
+            dict_stage["peak_memory"] = max(dict_stage["peak_memory"], int_peak_memory)
+
+        return None
+
+
+    # Add the totals of the stages recorded by another profiler, such as one in a process of --workers
+    def add_stages(self, dict_stages):
+        with self.__lock:
+            for string_stage, dict_other_stage in dict_stages.items():
+                if (string_stage not in self.__dict_stages):
+                    self.__dict_stages[string_stage] = dict(dict_other_stage)
+                    continue
+
+                dict_stage = self.__dict_stages[string_stage]
+                for string_total in ("calls", "wall_seconds", "cpu_seconds", "input_size", "matches"):
+                    dict_stage[string_total] += dict_other_stage[string_total]
+                dict_stage["peak_memory"] = max(dict_stage["peak_memory"], dict_other_stage["peak_memory"])
+
+        return None
+
+
+    # Return a copy of the totals of every stage
+    def get_stages(self):
+        with self.__lock:
+            return dict([(string_stage, dict(dict_stage)) for string_stage, dict_stage in self.__dict_stages.items()])
+
+
+    # Return the stages as a table, with the MB/s of every stage that was given any input
+    def format_table(self):
+        list_lines = ["\nPROFILE:", "--------", "%-16s%-10s%-14s%-14s%-16s%-12s%s" % ("STAGE", "CALLS", "WALL MS", "CPU MS", "INPUT", "MATCHES", "MB/S")]
+        for string_stage, dict_stage in self.get_stages().items():
+            string_throughput = "-"
+            if (dict_stage["input_size"] > 0) and (dict_stage["wall_seconds"] > 0):
+                string_throughput = format(dict_stage["input_size"] / 1000000 / dict_stage["wall_seconds"], ".2f")
+            list_lines.append("%-16s%-10s%-14s%-14s%-16s%-12s%s" % (string_stage, dict_stage["calls"], format(dict_stage["wall_seconds"] * 1000, ".2f"),\
+                format(dict_stage["cpu_seconds"] * 1000, ".2f"), dict_stage["input_size"], dict_stage["matches"], string_throughput))
+
+        return "\n".join(list_lines)
+
+
+    # Return the stages as json
+    def format_json(self):
+        return json.dumps({"stages": self.get_stages()}, indent=1)
+
+
+    # Return the stages in the text format of Prometheus, with a counter per total and a label per stage
+    def format_prometheus(self):
+        list_lines = []
+        for string_total, string_metric, string_help in (("calls", "portan_stage_calls_total", "Times the stage ran"),\
+            ("wall_seconds", "portan_stage_wall_seconds_total", "Wall time spent in the stage"),\
+            ("cpu_seconds", "portan_stage_cpu_seconds_total", "CPU time of the threads running the stage"),\
+            ("input_size", "portan_stage_input_total", "Bytes (fetch, decode, stream) or characters (the rest) given to the stage"),\
+            ("matches", "portan_stage_matches_total", "Items the stage found")):
+            list_lines.append("# HELP " + string_metric + " " + string_help)
+            list_lines.append("# TYPE " + string_metric + " counter")
+            for string_stage, dict_stage in self.get_stages().items():
+                list_lines.append(string_metric + '{stage="' + string_stage + '"} ' + str(dict_stage[string_total]))
+
+        return "\n".join(list_lines) + "\n"
+
+
+
+# Keeps the Content-Type and size of every image checked by Portan.verify_images(), until the server says they expire, so that
+# images shared by many webpages, such as those of a CDN, are only checked once
+class PortanImageProbeCache:
+    # Constructor taking the file to keep the images in, or ":memory:", and how many seconds they are kept should their server not say
+    def __init__(self, string_file_path = ":memory:", int_ttl_seconds = 86400, int_commit_every = 64):
+        import sqlite3
+
+        self.__int_ttl_seconds = int_ttl_seconds
+        self.__int_commit_every = int_commit_every
+        self.__int_uncommitted = 0                      # Contains the number of images stored since the last commit
+        self.__lock = threading.Lock()                  # The cache is shared by the threads checking the images
+        self.__connection = sqlite3.connect(string_file_path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS probes (url TEXT PRIMARY KEY, content_type TEXT NOT NULL, size INTEGER NOT NULL,"\
+            " expires_at REAL NOT NULL) WITHOUT ROWID")
+        self.__connection.commit()
+
+        return None
+
+
+    # Return the Content-Type and size of the url, or None should it not have been checked or have expired
+    def lookup(self, string_url):
+        with self.__lock:
+            return self.__connection.execute("SELECT content_type, size FROM probes WHERE url = ? AND expires_at > ?",\
+                (string_url, time.time())).fetchone()
+
+
+    # Keep the Content-Type and size of the url, for as long as the Cache-Control or Expires header of its response allows
+    def store(self, string_url, string_content_type, int_size, dict_header_info = None):
+        with self.__lock:
+            self.__connection.execute("INSERT OR REPLACE INTO probes (url, content_type, size, expires_at) VALUES (?, ?, ?, ?)",\
+                (string_url, string_content_type, int_size, time.time() + self._get_max_age(dict_header_info)))
+            self.__int_uncommitted += 1
+            if (self.__int_uncommitted >= self.__int_commit_every):
+                self.__connection.commit()
+                self.__int_uncommitted = 0
+
+        return None
+
+
+    # Commit and close the cache
+    def close(self):
+        with self.__lock:
+            if (self.__connection != None):
+                self.__connection.commit()
+                self.__connection.close()
+                self.__connection = None
+
+        return None
+
+
+    # Not supposed to be called
+    def _get_max_age(self, dict_header_info):
+        import email.utils
+
+        # Returns the seconds the response may be kept, from its max-age or Expires, or the default should it have neither
+        if (dict_header_info == None):
+            return self.__int_ttl_seconds
+
+        match_max_age = re.search("max-age\\s*=\\s*(\\d+)", dict_header_info.get("Cache-Control") or "")
+        if (match_max_age != None):
+            return int(match_max_age.group(1))
+
+        try:
+            return email.utils.parsedate_to_datetime(dict_header_info.get("Expires")).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return self.__int_ttl_seconds
+
+
+
+# Reads the webpages of a local html file, a directory of them, or a WARC archive, gzipped or not, one at a time without
+# loading whole archives. Uncompressed files are memory-mapped, and WARC archives are read record by record, so that
+# analyzing a crawl of many gigabytes again needs neither the network nor the memory to hold it. Every webpage is
+# returned as the url, the status code, the headers, and the body, as Portan._fetch_webpage() would
+class PortanArchiveReader:
+    TUPLE_HTML_EXTENSIONS = (".html", ".htm", ".xhtml", ".html.gz", ".htm.gz", ".xhtml.gz")
+    TUPLE_WARC_EXTENSIONS = (".warc", ".warc.gz")
+
+    # Constructor taking the file or directory, and the most bytes to read of every webpage, 0 for no limit
+    def __init__(self, string_path, int_max_bytes = 0):
+        self.__string_path = string_path
+        self.__int_max_bytes = int_max_bytes
+
+        return None
+
+
+    # Return the webpages one at a time, those of a directory in the order of their paths
+    def __iter__(self):
+        if (not os.path.isdir(self.__string_path)):
+            yield from self._read_file(self.__string_path)
+            return None
+
+        for string_directory, list_directories, list_files in os.walk(self.__string_path):
+            list_directories.sort()
+            for string_file_name in sorted(list_files):
+                if (string_file_name.lower().endswith(PortanArchiveReader.TUPLE_HTML_EXTENSIONS + PortanArchiveReader.TUPLE_WARC_EXTENSIONS)):
+                    yield from self._read_file(os.path.join(string_directory, string_file_name))
+
+        return None
+
+
+    # Not supposed to be called
+    def _read_file(self, string_file_path):
+        import gzip
+        import mmap
+
+        # Html files are returned as a single webpage, with the file url and without headers, so their charset is found
+        # in the html. A file that could be read is 200, as a downloaded webpage would be, so that --index and the others
+        # that leave out webpages that could not be downloaded take it. Empty files can not be memory-mapped, and are left out
+        string_lower_path = string_file_path.lower()
+        if (os.path.getsize(string_file_path) == 0):
+            return None
+        with open(string_file_path, "rb") as file_input, mmap.mmap(file_input.fileno(), 0, access=mmap.ACCESS_READ) as mmap_input:
+            if (string_lower_path.endswith(PortanArchiveReader.TUPLE_WARC_EXTENSIONS)):
+                file_records = gzip.GzipFile(fileobj=mmap_input, mode="rb") if (string_lower_path.endswith(".gz")) else mmap_input
+                yield from self._read_warc_records(file_records, string_file_path)
+            elif (string_lower_path.endswith(".gz")):
+                with gzip.GzipFile(fileobj=mmap_input, mode="rb") as file_webpage:
+                    yield "file://" + os.path.abspath(string_file_path), 200, None, file_webpage.read(self.__int_max_bytes or -1)
+            else:
+                yield "file://" + os.path.abspath(string_file_path), 200, None, mmap_input[:self.__int_max_bytes or len(mmap_input)]
+
+        return None
+
+
+    # Not supposed to be called
+    def _read_warc_records(self, file_records, string_file_path):
+        import io
+        import mmap
+        import zlib
+        import http.client
+
+        # Every record is a WARC/1.0 line, headers, and a block of Content-Length bytes. Only the responses and resources
+        # with a text Content-Type are returned, the blocks of the other records are skipped without being read
+        connection_pool = Portan()._get_connection_pool()
+        int_released = 0                                # Contains up to where the pages of a memory-mapped archive were released
+        while (True):
+            # The pages of a memory-mapped archive that were read are released, so that they do not add up while it is read
+            if (isinstance(file_records, mmap.mmap)) and (hasattr(mmap, "MADV_DONTNEED")):
+                int_read = file_records.tell() - file_records.tell() % mmap.PAGESIZE
+                if (int_read > int_released):
+                    file_records.madvise(mmap.MADV_DONTNEED, int_released, int_read - int_released)
+                    int_released = int_read
+
+            bytes_line = file_records.readline()
+            if (bytes_line == b""):
+                return None
+            if (bytes_line.strip() == b""):
+                continue
+            if (not bytes_line.startswith(b"WARC/")):
+                print("Error: " + string_file_path + ": no WARC record at byte " + str(file_records.tell() - len(bytes_line)))
+                return None
+
+            dict_warc_headers = {}
+            for bytes_line in iter(file_records.readline, b""):
+                if (bytes_line.strip() == b""):
+                    break
+                bytes_name, bytes_separator, bytes_value = bytes_line.partition(b":")
+                dict_warc_headers[bytes_name.strip().lower().decode("latin-1")] = bytes_value.strip().decode("utf-8", "replace")
+            int_block_length = int(dict_warc_headers.get("content-length", "0"))
+            string_type = dict_warc_headers.get("warc-type")
+            if (string_type not in ("response", "resource")):
+                file_records.seek(int_block_length, os.SEEK_CUR)
+                continue
+
+            # A response block is the HTTP response as it was received, a resource block only the body
+            bytes_block = file_records.read(int_block_length)
+            string_url = dict_warc_headers.get("warc-target-uri", "").strip("<>")
+            if (string_type == "response"):
+                bytes_head, bytes_separator, bytes_body = bytes_block.partition(b"\r\n\r\n")
+                if (bytes_separator == b""):
+                    bytes_head, bytes_separator, bytes_body = bytes_block.partition(b"\n\n")
+                bytes_status_line, bytes_separator, bytes_header_lines = bytes_head.partition(b"\n")
+                list_status_parts = bytes_status_line.split()
+                if (len(list_status_parts) < 2) or (not list_status_parts[1].isdigit()):
+                    continue
+                int_status_code = int(list_status_parts[1])
+                dict_header_info = http.client.parse_headers(io.BytesIO(bytes_header_lines.lstrip(b"\r\n") + b"\r\n\r\n"))
+            else:
+                int_status_code = 200
+                dict_header_info = http.client.parse_headers(io.BytesIO(b"Content-Type: " + dict_warc_headers.get("content-type", "").encode("latin-1") +\
+                    b"\r\n\r\n"))
+                bytes_body = bytes_block
+            if (not connection_pool._is_text_content_type(dict_header_info["Content-Type"])):
+                continue
+
+            try:
+                yield string_url, int_status_code, dict_header_info, self._decode_body(bytes_body, dict_header_info)
+            except (ValueError, zlib.error) as error:
+                print("Error: " + string_url + ": " + str(error))
+
+        return None
 
-        # Remember to add in recursive searching
 
-        # Display the help string
-        print(string_help_data)
+    # Not supposed to be called
+    def _decode_body(self, bytes_body, dict_header_info):
+        import zlib
+
+        # Undoes the chunked Transfer-Encoding and the gzip or deflate Content-Encoding the body was received with, as
+        # these are archived as they were sent
+        if ("chunked" in (dict_header_info["Transfer-Encoding"] or "").lower()):
+            list_chunks = []
+            int_position = 0
+            while (int_position < len(bytes_body)):
+                int_line_end = bytes_body.find(b"\n", int_position)
+                if (int_line_end == -1):
+                    break
+                int_chunk_size = int(bytes_body[int_position:int_line_end].split(b";")[0].strip() or b"0", 16)
+                if (int_chunk_size == 0):
+                    break
+                list_chunks.append(bytes_body[int_line_end + 1:int_line_end + 1 + int_chunk_size])
+                int_position = bytes_body.find(b"\n", int_line_end + 1 + int_chunk_size) + 1
+                if (int_position == 0):
+                    break
+            bytes_body = b"".join(list_chunks)
+
+        string_encoding = (dict_header_info["Content-Encoding"] or "identity").strip().lower()
+        if (string_encoding in ("gzip", "x-gzip", "deflate")):
+            # deflate bodies should have a zlib header, but some servers send raw deflate data instead
+            int_window_bits = 16 + zlib.MAX_WBITS
+            if (string_encoding == "deflate"):
+                int_window_bits = zlib.MAX_WBITS if ((len(bytes_body) >= 2) and (bytes_body[0] & 0x0f == 8) and\
+                    ((bytes_body[0] * 256 + bytes_body[1]) % 31 == 0)) else -zlib.MAX_WBITS
+            bytes_body = zlib.decompressobj(int_window_bits).decompress(bytes_body, self.__int_max_bytes)
+        elif (string_encoding != "identity"):
+            raise ValueError("Not text, but " + string_encoding + " encoded")
+
+        if (self.__int_max_bytes > 0):
+            bytes_body = bytes_body[:self.__int_max_bytes]
+
+        return bytes_body
+
+
+
+# Keeps what --watch found on every webpage the last time it changed: the hash of its body, the ETag and Last-Modified to
+# ask the server whether it changed, and its hyperlinks, emails, images, and --search results to compare the next one with
+class PortanWatchSnapshots:
+    TUPLE_KINDS = ("hyperlinks", "emails", "images", "search")
+
+    # Constructor taking the file to keep the snapshots in, or ":memory:" to only keep them while running
+    def __init__(self, string_file_path = ":memory:"):
+        import sqlite3
+
+        self.__lock = threading.Lock()                  # The snapshots are shared by the threads polling the webpages
+        self.__connection = sqlite3.connect(string_file_path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS snapshots (url TEXT PRIMARY KEY, body_hash BLOB NOT NULL, etag TEXT,"\
+            " last_modified TEXT, found TEXT NOT NULL, checked_at REAL NOT NULL) WITHOUT ROWID")
+        self.__connection.commit()
+
         return None
 
 
-    # Displays the Portan Version
-    def version_menu(self):
-        print("Portan v1.0.0\n")
+    # Return the snapshot of the url as a dictionary, or None should there not be one
+    def lookup(self, string_url):
+        with self.__lock:
+            tuple_row = self.__connection.execute("SELECT body_hash, etag, last_modified, found FROM snapshots WHERE url = ?",\
+                (string_url,)).fetchone()
+        if (tuple_row == None):
+            return None
+
+        return {"body_hash": tuple_row[0], "etag": tuple_row[1], "last_modified": tuple_row[2], "found": json.loads(tuple_row[3])}
+
+
+    # Return the headers that ask the server to only send the webpage should it have changed since the snapshot
+    def get_conditional_headers(self, dict_snapshot):
+        dict_request_headers = {}
+        if (dict_snapshot != None) and (dict_snapshot["etag"] != None):
+            dict_request_headers["If-None-Match"] = dict_snapshot["etag"]
+        if (dict_snapshot != None) and (dict_snapshot["last_modified"] != None):
+            dict_request_headers["If-Modified-Since"] = dict_snapshot["last_modified"]
+
+        return dict_request_headers
+
+
+    # Replace the snapshot of the url, returning what was added and removed since the previous one, or None should there not be one
+    def store(self, string_url, bytes_body_hash, dict_header_info, dict_found):
+        dict_previous = self.lookup(string_url)
+        with self.__lock:
+            self.__connection.execute("INSERT OR REPLACE INTO snapshots (url, body_hash, etag, last_modified, found, checked_at)"\
+                " VALUES (?, ?, ?, ?, ?, ?)", (string_url, bytes_body_hash, None if (dict_header_info == None) else dict_header_info.get("ETag"),\
+                None if (dict_header_info == None) else dict_header_info.get("Last-Modified"), json.dumps(dict_found, ensure_ascii=False), time.time()))
+            self.__connection.commit()
+        if (dict_previous == None):
+            return None
+
+        # Keep the order in which things were found, comparing with sets. The --search results are only compared while searching
+        dict_changes = {"added": {}, "removed": {}}
+        for string_kind in [string_kind for string_kind in PortanWatchSnapshots.TUPLE_KINDS if (string_kind in dict_found)]:
+            list_previous = dict_previous["found"].get(string_kind) or []
+            list_current = dict_found.get(string_kind) or []
+            set_previous = set(list_previous)
+            set_current = set(list_current)
+            dict_changes["added"][string_kind] = [string_item for string_item in list_current if (string_item not in set_previous)]
+            dict_changes["removed"][string_kind] = [string_item for string_item in list_previous if (string_item not in set_current)]
+
+        return dict_changes
+
+
+    # Commit and close the snapshots
+    def close(self):
+        with self.__lock:
+            if (self.__connection != None):
+                self.__connection.commit()
+                self.__connection.close()
+                self.__connection = None
+
         return None
 
 
-    # Display the license under which Portan is published
-    def license_menu(self, bool_no_output):
-        string_license = """\n# Portan is free software: you can redistribute it and/or modify it
-# under the terms of the GNU General Public License as published by the
-# Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# Portan is distributed in the hope that it will be useful, but
-# WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
-# See the GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License along
-# with this program.  If not, see <http://www.gnu.org/licenses/>."""
 
-        if (not bool_no_output):
-            print(string_license)
+# Finds any number of strings in plaintext at once, ignoring case, with an Aho-Corasick automaton, so that the plaintext is
+# read a single time however many strings there are, and whatever characters they contain. Every occurrence is returned
+# with the int_context characters before and after it as soon as it is found. Finding the strings does not change the
+# automaton, so that it is built once and shared by the threads of batch()
+class PortanKeywordSearch:
+    __tuple_whitespace = ("\n", "\r", "\t", "\f", "\v")
+
+    # Constructor taking the strings to search for, and how many characters before and after every occurrence are returned
+    def __init__(self, list_terms, int_context = 40):
+        # The strings are matched whatever their case, so strings that only differ in case are the same, and the first is kept.
+        # They are compared lowercased, as the states are, rather than casefolded, which can change their length
+        dict_terms = {}
+        for string_term in list_terms:
+            if (string_term.strip() != ""):
+                dict_terms.setdefault(string_term.lower(), string_term)
+        self.__list_terms = list(dict_terms.values())
+        self.__int_context = int_context
+        self.__list_transitions = [{}]                  # Contains the state every character leads to, for every state
+        self.__list_fail = [0]                          # Contains the state to continue in when no character leads on, for every state
+        self.__list_outputs = [()]                      # Contains the strings found once a state is reached, for every state
+        self.__dict_whitespace = dict.fromkeys(map(ord, PortanKeywordSearch.__tuple_whitespace), " ")
+
+        # Add every string as a path of states, one per character
+        for string_term in self.__list_terms:
+            int_state = 0
+            for string_character in string_term.lower():
+                if (string_character not in self.__list_transitions[int_state]):
+                    self.__list_transitions[int_state][string_character] = len(self.__list_transitions)
+                    self.__list_transitions.append({})
+                    self.__list_fail.append(0)
+                    self.__list_outputs.append(())
+                int_state = self.__list_transitions[int_state][string_character]
+            self.__list_outputs[int_state] = (string_term,)
+
+        # Link every state to the longest end of its path that is the start of a string, breadth-first, so that every
+        # state also finds the strings that end within it
+        deque_states = collections.deque(self.__list_transitions[0].values())
+        while (len(deque_states) > 0):
+            int_state = deque_states.popleft()
+            for string_character, int_next_state in self.__list_transitions[int_state].items():
+                int_fail = self.__list_fail[int_state]
+                while (int_fail != 0) and (string_character not in self.__list_transitions[int_fail]):
+                    int_fail = self.__list_fail[int_fail]
+                int_fail = self.__list_transitions[int_fail].get(string_character, 0)
+                self.__list_fail[int_next_state] = int_fail if (int_fail != int_next_state) else 0
+                self.__list_outputs[int_next_state] = self.__list_outputs[int_next_state] + self.__list_outputs[self.__list_fail[int_next_state]]
+                deque_states.append(int_next_state)
+
+        # Outside of any string, skip ahead to the next character a string starts with
+        self.__start_regex = re.compile("[" + "".join(map(re.escape, self.__list_transitions[0])) + "]", re.IGNORECASE)\
+            if (len(self.__list_terms) > 0) else None
+
         return None
 
 
-    # This function searches for the input text in the text found in-website
-    # should no results be found, display appropriate message, otherwise
-    # display however many characters are available (before and after) including 
-    # the searched text.
-    def display_search(self, string_to_search_for, bool_no_output):
-        # This function will accomplish this with the help of regex
-        string_to_return_regex = re.compile("""(?P<full_result>
-            (.+?)                                     # This will return a number of characters available up to the string until a newline is found
-            ("""+string_to_search_for+""")            # The actual string to search for
-            (.+?)                                     # This will return a number of characters available after the string until a newline is found
-        )""", re.VERBOSE | re.UNICODE | re.IGNORECASE)
-        
-        # Find the actual input
-        list_found_strings = self._from_tuple_to_list(string_to_return_regex.findall(self.__string_webpage_plain_text))
+    # Return the strings searched for
+    def get_terms(self):
+        return list(self.__list_terms)
+
 
-        # Display the results in order
-        if (not bool_no_output) and (not (list_found_strings == None)):
-            print("\nSEARCH RESULTS FOR: "+string_to_search_for)
-            print("--------------------"+"-"*len(string_to_search_for))
-            for element in list_found_strings:
-                print("<..." + element + "...>")
+    # Return a (string, occurrence) pair for every occurrence of every string in the text, in the order in which they end,
+    # the occurrence being the string as written in the text with the characters around it, all on one line
+    def find(self, string_text):
+        if (self.__start_regex == None):
+            return None
 
+        # Local names, as this runs once for every character
+        list_transitions = self.__list_transitions
+        list_fail = self.__list_fail
+        list_outputs = self.__list_outputs
+        int_context = self.__int_context
+        int_text_length = len(string_text)
+        int_state = 0
+        int_position = 0
+        while (int_position < int_text_length):
+            if (int_state == 0):
+                match_start = self.__start_regex.search(string_text, int_position)
+                if (match_start == None):
+                    break
+                int_position = match_start.start()
+
+            string_character = string_text[int_position].lower()
+            while (int_state != 0) and (string_character not in list_transitions[int_state]):
+                int_state = list_fail[int_state]
+            int_state = list_transitions[int_state].get(string_character, 0)
+            int_position += 1
+            for string_term in list_outputs[int_state]:
+                int_start = int_position - len(string_term)
+                yield string_term, string_text[max(0, int_start - int_context):int_position + int_context].translate(self.__dict_whitespace)
 
-        # Set the required memeber variable for writing if necessary
-        self.__list_found_searched_strings = list_found_strings
+        return None
+
+
+# Counts the words, terms, and n-grams of the plaintext of webpages as it is fed, without keeping a list of the words. The
+# terms are the words without the articles, prepositions, and other stopwords, so that what is left is the reduced text.
+# Every webpage is fed until bool_is_final, after which its counts are added to the totals. The totals of other
+# PortanTermStatistics, such as those of a process of --workers, or of a single webpage, are added with add_totals()
+class PortanTermStatistics:
+    __word_regex = None                                 # Compiled the first time it is needed, then shared by all statistics
+
+    # The English articles, prepositions, conjunctions, pronouns, and auxiliary verbs that are left out of the terms
+    FROZENSET_STOPWORDS = frozenset(("a", "an", "the", "about", "above", "across", "after", "against", "along", "among", "around", "as",\
+        "at", "before", "behind", "below", "beneath", "beside", "between", "beyond", "but", "by", "despite", "down", "during", "except",\
+        "for", "from", "in", "inside", "into", "like", "near", "of", "off", "on", "onto", "out", "outside", "over", "past", "per", "since",\
+        "through", "throughout", "till", "to", "toward", "towards", "under", "underneath", "until", "up", "upon", "via", "with", "within",\
+        "without", "and", "or", "nor", "so", "yet", "if", "than", "that", "then", "though", "because", "while", "whether", "i", "me", "my",\
+        "we", "us", "our", "you", "your", "he", "him", "his", "she", "her", "it", "its", "they", "them", "their", "this", "these", "those",\
+        "who", "whom", "whose", "which", "what", "is", "am", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does",\
+        "did", "will", "would", "shall", "should", "can", "could", "may", "might", "must", "not", "no", "also", "there", "here"))
+
+    # Constructor taking the number of terms in the n-grams counted, 1 to count none, whether to leave out the stopwords,
+    # and how many of the most common terms and n-grams are shown
+    def __init__(self, int_ngram_size = 2, bool_filter_stopwords = True, int_top = 10):
+        self.__lock = threading.Lock()
+        self.__int_ngram_size = int_ngram_size
+        self.__bool_filter_stopwords = bool_filter_stopwords
+        self.__int_top = int_top
+        self.__int_num_pages = 0                        # Contains the number of webpages added to the totals
+        self.__int_num_words = 0                        # Contains the number of words, stopwords included
+        self.__counter_terms = collections.Counter()    # Contains how often every term was found
+        self.__counter_ngrams = collections.Counter()   # Contains how often every n-gram was found
+        self.__counter_pages = collections.Counter()    # Contains the number of webpages every term was found on
+
+        # The webpage that is being fed
+        self.__string_carry = ""                        # Contains the end of the text fed last, which may be the start of a word
+        self.__int_page_words = 0
+        self.__counter_page_terms = collections.Counter()
+        self.__counter_page_ngrams = collections.Counter()
+        self.__deque_window = collections.deque(maxlen=max(1, int_ngram_size))
 
         return None
-    
 
-    # This function will create files containing the information found in the hyperlink
-    def write_files(self):
-        # Create the file to strore the general data
-        file_general_data = open(os.getcwd() + "/../general_output.txt", 'w')
-        file_general_data.write("\n\nACCESSED: \t\t%s\nSTATUS CODE: \t\t%s\nLAST MODIFIED: \t\t%s\nDATE ACCESSED: \t\t%s\nCONTENT TYPE: \t\t%s\nCONTENT LANGUAGE: \t%s\nRECEIVED BYTES: \t%s\n\n" \
-            % (self.__string_provided_url, self.__string_status_code, self.__string_last_modified, self.__string_current_date, self.__string_content_type, self.__string_content_language,self.__string_content_length_bytes))
-        file_general_data.write("EMAILS: \t\t%s\nHYPERLINKS: \t\t%s\nTAGS: \t\t\t%s\nSEARCHABLE TEXT: \t%s BYTES" \
-            % (self.__int_num_emails, self.__int_num_hyperlinks, self.__int_num_html_tags, self.__int_num_text))
-        file_general_data.close()
 
-        # Create the file to store the image links
-        file_image_data = open(os.getcwd() + "/../image_output.txt", 'w')
-        file_image_data.write("\n".join(self.__list_image_hyperlinks))
-        file_image_data.close()
+    # Return the settings, so that the same statistics can be made elsewhere, such as in a process of --workers
+    def get_settings(self):
+        return (self.__int_ngram_size, self.__bool_filter_stopwords, self.__int_top)
+
+
+    # Count the words of the next part of the plaintext of a webpage, and add the webpage to the totals once bool_is_final is set.
+    # A word at the end of the text is only counted with the next text, as it may continue there
+    #   NOTE: words longer than 64 characters are rather encoded data than words, and are not counted
+    def feed(self, string_text, bool_is_final = False):
+        if (PortanTermStatistics.__word_regex == None):
+            PortanTermStatistics.__word_regex = re.compile("\\w+")
+
+        if (self.__string_carry != ""):
+            string_text = self.__string_carry + string_text
+            self.__string_carry = ""
+
+        # Local names, as this runs once for every word
+        int_text_length = len(string_text)
+        int_ngram_size = self.__int_ngram_size
+        set_stopwords = PortanTermStatistics.FROZENSET_STOPWORDS if (self.__bool_filter_stopwords) else frozenset()
+        counter_terms = self.__counter_page_terms
+        counter_ngrams = self.__counter_page_ngrams
+        deque_window = self.__deque_window
+        int_words = 0
+        for match_word in PortanTermStatistics.__word_regex.finditer(string_text):
+            string_word = match_word.group()
+            if (match_word.end() == int_text_length) and (not bool_is_final):
+                self.__string_carry = string_word[:65]
+                break
+
+            # Stopwords and encoded data are not terms, and no n-gram spans them
+            int_words += 1
+            string_term = string_word.lower()
+            if (len(string_word) > 64) or (string_term in set_stopwords) or ((len(string_word) < 2) and (self.__bool_filter_stopwords)):
+                deque_window.clear()
+                continue
+
+            counter_terms[string_term] += 1
+            if (int_ngram_size > 1):
+                deque_window.append(string_term)
+                if (len(deque_window) == int_ngram_size):
+                    counter_ngrams[" ".join(deque_window)] += 1
+        self.__int_page_words += int_words
+
+        if (bool_is_final):
+            self._end_page()
 
-        # create the file to store the hypelinks
-        file_hyperlink_data = open(os.getcwd() + "/../hyperlink_output.txt", 'w')
-        file_hyperlink_data.write("\n".join(self.__list_hyperlinks))
-        file_hyperlink_data.close()
+        return None
 
-        # Create the file to store the emails
-        file_email_data = open(os.getcwd() + "/../email_output.txt", 'w')
-        file_email_data.write("\n".join(self.__list_emails))
-        file_email_data.close()
 
-        # Create the file to store the plaintext
-        file_plaintext_data = open(os.getcwd() + "/../plaintext_output.txt", 'w')
-        file_plaintext_data.write(self.__string_webpage_plain_text)
-        file_plaintext_data.close()
+    # Add totals returned by get_totals(), of a single webpage or of many
+    def add_totals(self, dict_totals):
+        with self.__lock:
+            self.__int_num_pages += dict_totals["pages"]
+            self.__int_num_words += dict_totals["words"]
+            self.__counter_terms.update(dict_totals["terms"])
+            self.__counter_ngrams.update(dict_totals["ngrams"])
 
-        # Create the file to store the tags
-        file_tag_data = open(os.getcwd() + "/../tag_output.txt", 'w')
-        file_tag_data.write("\n".join(self.__list_html_tags))
-        file_tag_data.close()
+            # The totals of a single webpage leave out the webpages per term, as every term was found on that webpage
+            if ("term_pages" in dict_totals):
+                self.__counter_pages.update(dict_totals["term_pages"])
+            else:
+                self.__counter_pages.update(dict_totals["terms"].keys())
+
+        return None
+
+
+    # Return the totals as a dictionary that can be stored as json, and added to other statistics with add_totals()
+    def get_totals(self):
+        with self.__lock:
+            dict_totals = {"pages": self.__int_num_pages, "words": self.__int_num_words, "terms": dict(self.__counter_terms),\
+                "ngrams": dict(self.__counter_ngrams)}
+            if (self.__int_num_pages != 1):
+                dict_totals["term_pages"] = dict(self.__counter_pages)
+
+        return dict_totals
+
+
+    # Return the number of webpages added to the totals
+    def count(self):
+        return self.__int_num_pages
 
-        # Create the file to store the searched text
-        file_searched_data = open(os.getcwd() + "/../searched_output.txt", 'w')
-        file_searched_data.write("\n".join(self.__list_found_searched_strings))
-        file_searched_data.close()
+
+    # Return the most common terms and n-grams of totals returned by get_totals(), or of these statistics, as lists of [term, count]
+    def get_top(self, dict_totals = None):
+        if (dict_totals == None):
+            dict_totals = self.get_totals()
+
+        return {"words": dict_totals["words"], "terms": [list(tuple_term) for tuple_term in collections.Counter(dict_totals["terms"]).most_common(self.__int_top)],\
+            "ngrams": [list(tuple_ngram) for tuple_ngram in collections.Counter(dict_totals["ngrams"]).most_common(self.__int_top)]}
+
+
+    # Return the most common terms, with the number of webpages they were found on, and n-grams as a table
+    def format_table(self):
+        with self.__lock:
+            list_top_terms = self.__counter_terms.most_common(self.__int_top)
+            list_top_ngrams = self.__counter_ngrams.most_common(self.__int_top)
+            list_lines = ["\nCORPUS TERMS:", "-------------", "WEBPAGES: \t\t" + str(self.__int_num_pages), "WORDS: \t\t\t" + str(self.__int_num_words),\
+                "TERMS: \t\t\t" + str(len(self.__counter_terms)), "", "%-32s%-12s%s" % ("TERM", "COUNT", "WEBPAGES")]
+            for string_term, int_count in list_top_terms:
+                list_lines.append("%-32s%-12s%s" % (string_term, int_count, self.__counter_pages[string_term]))
+            if (self.__int_ngram_size > 1):
+                list_lines += ["", "%-32s%s" % ("N-GRAM", "COUNT")]
+                for string_ngram, int_count in list_top_ngrams:
+                    list_lines.append("%-32s%s" % (string_ngram, int_count))
+
+        return "\n".join(list_lines)
+
+
+    # Not supposed to be called
+    def _end_page(self):
+        # Adds the counts of the webpage that was fed to the totals, and starts the next webpage
+        with self.__lock:
+            self.__int_num_pages += 1
+            self.__int_num_words += self.__int_page_words
+            self.__counter_pages.update(self.__counter_page_terms.keys())
+            if (self.__int_num_pages == 1):
+                self.__counter_terms, self.__counter_page_terms = self.__counter_page_terms, self.__counter_terms
+                self.__counter_ngrams, self.__counter_page_ngrams = self.__counter_page_ngrams, self.__counter_ngrams
+            else:
+                self.__counter_terms.update(self.__counter_page_terms)
+                self.__counter_ngrams.update(self.__counter_page_ngrams)
+                self.__counter_page_terms = collections.Counter()
+                self.__counter_page_ngrams = collections.Counter()
+
+        self.__string_carry = ""
+        self.__int_page_words = 0
+        self.__deque_window.clear()
 
         return None
 
 
-    # Displays a message for use when using the flag --verbose
-    def __log(self, string_to_display, bool_display_condition):
-        # This function will only display a message should bool_display_condition is ture
-        if (bool_display_condition):
-            print("<<verbose>> " + string_to_display)
+
+# Finds the webpages whose plaintext is nearly the same as that of a webpage seen before, such as print views, pages with a session
+# id in their url, and pages of a pagination that only differ in a few lines. Every plaintext is reduced to a 64 bit SimHash of
+# its words, leaving out the stopwords, so that similar texts have fingerprints that differ in few bits. The fingerprints are
+# indexed by int_max_distance + 1 bands of their bits, and two fingerprints that differ in at most int_max_distance bits are the
+# same in at least one band. Only the fingerprints that share a band with a new one are compared with it, which with the 16 bit
+# bands of the default distance of 3 is a few hundred even after millions of webpages
+class PortanNearDuplicates:
+    __dict_word_digests = {}                            # Contains the 8 byte hash of the words seen, shared by all indexes
+    __tuple_bit_masks = None                            # Contains a mask for every bit of a byte, with that bit of every byte set
+
+    # Constructor taking the most bits a fingerprint may differ in to be a near-duplicate, and the fewest words it is made of
+    def __init__(self, int_max_distance = 3, int_min_words = 16):
+        import array
+
+        self.__lock = threading.Lock()
+        self.__int_max_distance = int_max_distance
+        self.__int_min_words = int_min_words
+        self.__array_fingerprints = array.array("Q")   # Contains the fingerprint of every webpage added, by its number
+        self.__list_urls = []                           # Contains the url of every webpage added, by its number
+
+        # Every band is a shift and a mask of the fingerprint, and a dictionary of the numbers of the webpages by the bits in it
+        int_bands = min(int_max_distance + 1, 64)
+        self.__list_bands = []
+        for int_band in range(int_bands):
+            int_first_bit = int_band * 64 // int_bands
+            int_last_bit = (int_band + 1) * 64 // int_bands
+            self.__list_bands.append((int_first_bit, (1 << (int_last_bit - int_first_bit)) - 1, {}))
+
+        return None
+
+
+    # Return the fingerprint of the text, or None should it have too few words to tell a near-duplicate from a similar webpage
+    def fingerprint(self, string_text):
+        set_words = set(string_text.lower().split()) - PortanTermStatistics.FROZENSET_STOPWORDS
+        if (len(set_words) < self.__int_min_words):
+            return None
+
+        # A bit of the fingerprint is set should it be set in the hash of more than half the words. The hashes are joined into
+        # one integer, and every bit is counted at once in every byte of a column with a mask, so the words are not looped over
+        bytes_hashes = self._get_word_digests(set_words)
+        tuple_bit_masks = self._get_bit_masks(len(set_words))
+        int_fingerprint = 0
+        for int_byte in range(8):
+            int_column = int.from_bytes(bytes_hashes[int_byte::8], "little")
+            for int_bit in range(8):
+                if ((int_column & tuple_bit_masks[int_bit]).bit_count() * 2 > len(set_words)):
+                    int_fingerprint |= 1 << (int_byte * 8 + int_bit)
+
+        return int_fingerprint
+
+
+    # Return the url of the webpage the fingerprint is closest to, and the number of bits they differ in, or None should no
+    # webpage differ in at most the distance
+    def find(self, int_fingerprint):
+        with self.__lock:
+            int_best_id = None
+            int_best_distance = self.__int_max_distance + 1
+            for int_first_bit, int_mask, dict_band in self.__list_bands:
+                for int_id in dict_band.get((int_fingerprint >> int_first_bit) & int_mask, ()):
+                    int_distance = (self.__array_fingerprints[int_id] ^ int_fingerprint).bit_count()
+                    if (int_distance < int_best_distance):
+                        int_best_id = int_id
+                        int_best_distance = int_distance
+
+            if (int_best_id == None):
+                return None
+
+            return self.__list_urls[int_best_id], int_best_distance
+
+
+    # Add the fingerprint of the webpage of the url to the index
+    def add(self, int_fingerprint, string_url):
+        import array
+
+        with self.__lock:
+            int_id = len(self.__list_urls)
+            self.__array_fingerprints.append(int_fingerprint)
+            self.__list_urls.append(string_url)
+            for int_first_bit, int_mask, dict_band in self.__list_bands:
+                int_key = (int_fingerprint >> int_first_bit) & int_mask
+                if (int_key not in dict_band):
+                    dict_band[int_key] = array.array("I")
+                dict_band[int_key].append(int_id)
+
+        return None
+
+
+    # Return the url of the webpage the text of the url is a near-duplicate of, or None after adding it to the index should it
+    # be none. A webpage is never a near-duplicate of itself, so that a url analyzed again is not added twice
+    def check(self, string_url, string_text):
+        int_fingerprint = self.fingerprint(string_text)
+        if (int_fingerprint == None):
+            return None
+
+        tuple_found = self.find(int_fingerprint)
+        if (tuple_found == None):
+            self.add(int_fingerprint, string_url)
+            return None
+        if (tuple_found[0] == string_url):
+            return None
+
+        return tuple_found[0]
+
+
+    # Return the number of webpages in the index
+    def count(self):
+        return len(self.__list_urls)
+
+
+    # Not supposed to be called
+    def _get_word_digests(self, set_words):
+        # The words of the webpages of a website are mostly the same, so their hashes are kept, until there are too many of them.
+        # A full dictionary is replaced rather than cleared, so that other threads still have the hashes they looked up
+        dict_word_digests = PortanNearDuplicates.__dict_word_digests
+        set_missing_words = set_words - dict_word_digests.keys()
+        if (len(dict_word_digests) + len(set_missing_words) > 262144):
+            dict_word_digests = {}
+            PortanNearDuplicates.__dict_word_digests = dict_word_digests
+            set_missing_words = set_words
+        for string_word in set_missing_words:
+            dict_word_digests[string_word] = hashlib.blake2b(string_word.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+
+        return b"".join(map(dict_word_digests.__getitem__, set_words))
+
+
+    # Not supposed to be called
+    def _get_bit_masks(self, int_hashes):
+        # A mask for every bit of a byte, with that bit set in every byte, long enough for the hashes. Bits past the end of a
+        # shorter column are not set in it, so the masks are only made again for more hashes than ever before
+        tuple_bit_masks = PortanNearDuplicates.__tuple_bit_masks
+        if (tuple_bit_masks == None) or (tuple_bit_masks[0].bit_length() < int_hashes * 8 - 7):
+            int_length = max(int_hashes, 4096)
+            tuple_bit_masks = tuple([int.from_bytes(bytes([1 << int_bit]) * int_length, "little") for int_bit in range(8)])
+            PortanNearDuplicates.__tuple_bit_masks = tuple_bit_masks
+
+        return tuple_bit_masks
+
+
+
+# Answers requests to analyze a url, or html that was sent along, with the json record of the webpage, over HTTP on a
+# port or a Unix socket. The regexes, connections, and processes of --workers stay warm between the requests. At most
+# int_concurrency requests are analyzed at the same time, and int_queue_size wait for their turn, after which requests
+# are answered with 503 right away, so that the callers back off instead of the server falling behind
+#   POST /analyze           {"url": "..."}, or {"html": "...", "url": "...", "extractors": [...]}, or the html itself with ?url=
+#   GET  /analyze?url=...   The same as POST with {"url": "..."}
+#   GET  /health            The requests waiting and being analyzed, as json
+#   GET  /metrics           The stages of the profiler and the requests answered, as Prometheus text
+class PortanServer:
+    # Constructor taking how many requests are analyzed and wait at most, how many processes analyze them, 0 for threads
+    # only, the most bytes to download or receive of every webpage, the CPU seconds every webpage may take, whether
+    # to show every request, and the profiler to record the stages in, a new one by default
+    def __init__(self, int_concurrency = 8, int_queue_size = 64, int_workers = 0, int_max_bytes = 0, float_cpu_budget = 0.0, bool_is_verbose = False,\
+        profiler = None):
+        self.__int_concurrency = int_concurrency
+        self.__int_queue_size = int_queue_size
+        self.__int_workers = int_workers
+        self.__int_max_bytes = int_max_bytes
+        self.__float_cpu_budget = float_cpu_budget
+        self.__bool_is_verbose = bool_is_verbose
+        self.__lock = threading.Lock()
+        self.__semaphore_analyses = threading.Semaphore(int_concurrency)
+        self.__int_waiting = 0                          # Contains the number of requests waiting for their turn
+        self.__int_active = 0                           # Contains the number of requests being analyzed
+        self.__counter_responses = collections.Counter()    # Contains the number of responses per status code
+        self.__float_start_time = time.time()
+        self.__process_executor = None                  # Contains the processes of --workers, started with the server
+        self.__server = None
+        self.__string_socket_path = None                # Contains the path of the Unix socket, which is removed once done
+        self.__profiler = profiler if (profiler != None) else PortanProfiler()  # Records the stages of every webpage, for /metrics
+
+        return None
+
+
+    # Answer requests on the address, a port, host:port, or unix:path, until interrupted
+    def serve_forever(self, string_address = "127.0.0.1:8750"):
+        import concurrent.futures
+
+        Portan().set_profiler(self.__profiler)
+        if (self.__int_workers > 0):
+            self.__process_executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.__int_workers, initializer=_ignore_interrupts)
+        try:
+            self.__server = self._create_server(string_address)
+            print("Serving on " + string_address + "...")
+            self.__server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+        return None
+
+
+    # Stop answering requests, and stop the processes
+    def close(self):
+        if (self.__server != None):
+            self.__server.server_close()
+            self.__server = None
+        if (self.__string_socket_path != None) and (os.path.exists(self.__string_socket_path)):
+            os.remove(self.__string_socket_path)
+            self.__string_socket_path = None
+        if (self.__process_executor != None):
+            self.__process_executor.shutdown()
+            self.__process_executor = None
+
+        return None
+
+
+    # Analyze the url or html of a request, returning the HTTP status code and the json to answer with
+    def analyze(self, dict_request):
+        string_url = dict_request.get("url")
+        string_html = dict_request.get("html")
+        list_extractors = dict_request.get("extractors")
+        if (isinstance(list_extractors, str)):
+            list_extractors = list_extractors.split(",")
+        if (string_url == None) and (string_html == None):
+            return 400, {"error": "no url or html to analyze"}
+        if (not isinstance(string_url, (str, type(None)))) or (not isinstance(string_html, (str, type(None)))) or\
+            (not isinstance(list_extractors, (list, type(None)))):
+            return 400, {"error": "the url and html are strings, and the extractors a list of them"}
+        tuple_extractors = tuple(list_extractors) if (list_extractors != None) else None
+
+        # Only wait for a turn should there be room in the queue, answering 503 otherwise
+        with self.__lock:
+            if (self.__int_waiting + self.__int_active >= self.__int_concurrency + self.__int_queue_size):
+                return 503, {"error": "too many requests waiting, try again later"}
+            self.__int_waiting += 1
+        with self.__semaphore_analyses:
+            with self.__lock:
+                self.__int_waiting -= 1
+                self.__int_active += 1
+            try:
+                return self._analyze_webpage(string_url, string_html, tuple_extractors)
+            finally:
+                with self.__lock:
+                    self.__int_active -= 1
+
+
+    # Return the requests waiting and being analyzed, and the responses so far
+    def get_health(self):
+        with self.__lock:
+            return {"status": "ok", "waiting": self.__int_waiting, "active": self.__int_active, "concurrency": self.__int_concurrency,\
+                "queue_size": self.__int_queue_size, "workers": self.__int_workers, "uptime_seconds": round(time.time() - self.__float_start_time, 3),\
+                "responses": dict([(str(int_status), int_count) for int_status, int_count in self.__counter_responses.items()])}
+
+
+    # Return the stages of the profiler, and the requests of the server, in the text format of Prometheus
+    def format_metrics(self):
+        dict_health = self.get_health()
+        list_lines = ["# HELP portan_server_responses_total Requests answered, by HTTP status code", "# TYPE portan_server_responses_total counter"]
+        for string_status, int_count in sorted(dict_health["responses"].items()):
+            list_lines.append('portan_server_responses_total{code="' + string_status + '"} ' + str(int_count))
+        for string_metric, string_help, string_value in (("portan_server_waiting", "Requests waiting for their turn", str(dict_health["waiting"])),\
+            ("portan_server_active", "Requests being analyzed", str(dict_health["active"])),\
+            ("portan_server_uptime_seconds", "Seconds since the server started", str(dict_health["uptime_seconds"]))):
+            list_lines.append("# HELP " + string_metric + " " + string_help)
+            list_lines.append("# TYPE " + string_metric + " gauge")
+            list_lines.append(string_metric + " " + string_value)
+
+        return self.__profiler.format_prometheus() + "\n".join(list_lines) + "\n"
+
+
+    # Not supposed to be called
+    def _analyze_webpage(self, string_url, string_html, tuple_extractors):
+        # Downloads the url unless its html was sent along, and analyzes it in a process of --workers should there be any
+        portan_webpage = Portan()
+        try:
+            if (string_html != None):
+                bytes_webpage = string_html.encode("utf-8", "surrogatepass")
+                tuple_fetched_webpage = ("N/A", {"Content-Type": "text/html; charset=utf-8"}, bytes_webpage, None)
+                string_url = "N/A" if (string_url == None) else string_url
+            else:
+                tuple_fetched_webpage = portan_webpage._fetch_webpage(string_url, self.__int_max_bytes)
+
+            if (self.__process_executor != None) and (tuple_fetched_webpage[3] == None) and (tuple_extractors == None):
+                list_analyses, dict_stages, dict_term_totals = self.__process_executor.submit(_process_webpage_chunk,\
+                    [(string_url, tuple_fetched_webpage[0], tuple_fetched_webpage[1], tuple_fetched_webpage[2])], False, False, True,\
+                    self.__float_cpu_budget).result()
+                self.__profiler.add_stages(dict_stages)
+                if ("error" in list_analyses[0]):
+                    return 422, {"error": list_analyses[0]["error"]}
+                portan_webpage._set_processed_webpage(string_url, tuple_fetched_webpage, list_analyses[0], self.__int_max_bytes)
+            else:
+                portan_webpage._process_fetched_webpage(string_url, tuple_fetched_webpage, self.__bool_is_verbose, self.__int_max_bytes, tuple_extractors)
+        except urllib.error.URLError as error:
+            return 502, {"error": str(error.reason)}
+        except UnicodeDecodeError as error:
+            return 422, {"error": str(error)}
+        except ValueError as error:
+            return 400, {"error": str(error)}
+
+        return 200, portan_webpage.get_record()
+
+
+    # Not supposed to be called
+    def _create_server(self, string_address):
+        import http.server
+        import socketserver
+
+        # Returns an HTTP server on the address, every request of which is answered on a thread of its own
+        portan_server = self
+        int_max_body_bytes = self.__int_max_bytes or 33554432
+        bool_is_verbose = self.__bool_is_verbose
+
+        class PortanRequestHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            # Answer GET /health, /metrics, and /analyze?url=
+            def do_GET(self):
+                parse_result = urllib.parse.urlsplit(self.path)
+                if (parse_result.path == "/health"):
+                    self._respond(200, portan_server.get_health())
+                elif (parse_result.path == "/metrics"):
+                    self._respond(200, portan_server.format_metrics(), "text/plain; version=0.0.4")
+                elif (parse_result.path == "/analyze"):
+                    self._respond(*portan_server.analyze(dict(urllib.parse.parse_qsl(parse_result.query))))
+                else:
+                    self._respond(404, {"error": "unknown path, use /analyze, /health, or /metrics"})
+
+                return None
+
+            # Answer POST /analyze, with json or the html itself
+            def do_POST(self):
+                parse_result = urllib.parse.urlsplit(self.path)
+                string_length = self.headers.get("Content-Length") or "0"
+                int_length = int(string_length) if (string_length.isdigit()) else 0
+                if (parse_result.path != "/analyze"):
+                    self.close_connection = True
+                    self._respond(404, {"error": "unknown path, use /analyze"})
+                    return None
+                if (int_length > int_max_body_bytes):
+                    self.close_connection = True
+                    self._respond(413, {"error": "more than " + str(int_max_body_bytes) + " bytes"})
+                    return None
+
+                bytes_body = self.rfile.read(int_length)
+                dict_request = dict(urllib.parse.parse_qsl(parse_result.query))
+                if ((self.headers.get("Content-Type") or "").split(";")[0].strip().lower() == "application/json"):
+                    try:
+                        dict_request.update(json.loads(bytes_body))
+                    except (ValueError, TypeError) as error:
+                        self._respond(400, {"error": "no json: " + str(error)})
+                        return None
+                else:
+                    dict_request["html"] = Portan()._decode_webpage(bytes_body, self.headers)
+                self._respond(*portan_server.analyze(dict_request))
+
+                return None
+
+            # Not supposed to be called
+            def _respond(self, int_status, body, string_content_type = "application/json"):
+                # Counts the response, before sending it so that /health and /metrics include every response a client
+                # has received, and sends the json, or text
+                if (not isinstance(body, str)):
+                    body = json.dumps(body, ensure_ascii=False)
+                bytes_body = body.encode("utf-8", "surrogatepass")
+                portan_server._count_response(int_status)
+                self.send_response(int_status)
+                self.send_header("Content-Type", string_content_type + ("; charset=utf-8" if (string_content_type == "application/json") else ""))
+                self.send_header("Content-Length", str(len(bytes_body)))
+                if (int_status == 503):
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(bytes_body)
+
+                return None
+
+            # Show the requests only with --verbose
+            def log_message(self, string_format, *args):
+                if (bool_is_verbose):
+                    print("<<verbose>> " + (string_format % args))
+
+                return None
+
+        # A Unix socket is given as unix:path, anything else is a port or host:port
+        if (string_address.startswith("unix:")):
+            class PortanUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+                daemon_threads = True
+
+                # Unix sockets have no client address, which the handler logs
+                def get_request(self):
+                    socket_request, client_address = super().get_request()
+                    return socket_request, ("unix", 0)
+
+            if (os.path.exists(string_address[5:])):
+                os.remove(string_address[5:])
+            unix_server = PortanUnixServer(string_address[5:], PortanRequestHandler)
+            self.__string_socket_path = string_address[5:]
+            return unix_server
+
+        string_host, string_separator, string_port = string_address.rpartition(":")
+        return http.server.ThreadingHTTPServer((string_host or "127.0.0.1", int(string_port)), PortanRequestHandler)
+
+
+    # Not supposed to be called
+    def _count_response(self, int_status):
+        with self.__lock:
+            self.__counter_responses[int_status] += 1
+
+        return None
+
+
+
+# Raised within the analysis of a webpage once it has used up the CPU budget set by Portan.set_cpu_budget()
+class PortanCpuBudgetExceeded(Exception):
+    # Constructor taking the stage the analysis was in
+    def __init__(self, string_stage):
+        Exception.__init__(self, "used up the CPU budget in the " + string_stage + " stage")
+        self.string_stage = string_stage
+
+        return None
+
+
+
+# The analysis of a single webpage, as returned by analyze() and Portan.get_result()
+#   NOTE: everything that was not extracted is None, everything that was extracted but not found is empty
+#   NOTE: results can not be changed, hold their lists as tuples, and share their strings with every other result through
+#         sys.intern, so that the results of thousands of webpages linking to the same hyperlinks fit in memory
+class PortanPageResult:
+    __slots__ = ("url", "status_code", "last_modified", "content_language", "date", "content_type", "content_length",\
+        "html_tags", "plaintext", "hyperlinks", "emails", "images", "extracted")
+
+    # Constructor taking the headers and everything found on the webpage, with what any other extractor found by its name
+    def __init__(self, string_url, int_status_code, dict_header_info, list_html_tags, string_plaintext, list_hyperlinks, list_emails, list_images,\
+        dict_extracted = None):
+        dict_header_info = {} if (dict_header_info == None) else dict_header_info
+        list_header_values = [dict_header_info.get(string_header) for string_header in\
+            ("Last-Modified", "Content-language", "Date", "Content-Type", "Content-Length")]
+
+        # The tags are not interned, as they are rarely the same on different webpages
+        tuple_values = tuple([self._intern(string_url), int_status_code] + [self._intern(string_value) for string_value in list_header_values] +\
+            [None if (list_html_tags == None) else tuple(list_html_tags), string_plaintext, self._intern_all(list_hyperlinks),\
+            self._intern_all(list_emails), self._intern_all(list_images), dict(dict_extracted or {})])
+        self.__setstate__(tuple_values)
+
+        return None
+
+
+    # Results can not be changed
+    def __setattr__(self, string_name, value):
+        raise AttributeError("PortanPageResult can not be changed")
+
+
+    # Results can not be changed
+    def __delattr__(self, string_name):
+        raise AttributeError("PortanPageResult can not be changed")
+
+
+    # Return every value in the order of __slots__, used by pickle to send results between processes
+    def __getstate__(self):
+        return tuple([getattr(self, string_name) for string_name in PortanPageResult.__slots__])
+
+
+    # Set every value in the order of __slots__, used by the constructor and by pickle
+    def __setstate__(self, tuple_values):
+        for string_name, value in zip(PortanPageResult.__slots__, tuple_values):
+            object.__setattr__(self, string_name, value)
 
         return None
 
 
+    # Not supposed to be called
+    def _intern(self, string_value):
+        # Returns the one copy of the string kept by sys.intern, or the value itself should it not be a string
+        if (type(string_value) != str):
+            return string_value
+
+        return sys.intern(string_value)
+
+
+    # Not supposed to be called
+    def _intern_all(self, list_strings):
+        if (list_strings == None):
+            return None
+
+        return tuple([self._intern(string_value) for string_value in list_strings])
+
+
+    # Show the url and the number of items found, rather than everything found
+    def __repr__(self):
+        list_counts = []
+        for string_name in Portan.TUPLE_EXTRACTORS:
+            if (getattr(self, string_name) != None):
+                list_counts.append(string_name + "=" + str(len(getattr(self, string_name))))
+
+        return "PortanPageResult(" + ", ".join([repr(self.url), "status_code=" + str(self.status_code)] + list_counts) + ")"
+
+
+
+# Analyze a webpage, given either its url or its html, without printing anything, and return a PortanPageResult
+#   >> portan.analyze(string_html, extractors=("emails", "hyperlinks"), base_url="https://example.com/")
+#   NOTE: errors while downloading are raised as urllib.error.URLError, and only the given extractors, and those they need, are run.
+#         The arguments are named without the prefixes of the rest of Portan, as callers write them as keywords
+def analyze(url_or_html, extractors = None, base_url = None):
+    portan_webpage = Portan()
+
+    # A single extractor may be given by its name, rather than as a tuple with only its name
+    tuple_extractors = None
+    if (isinstance(extractors, str)):
+        tuple_extractors = (extractors,)
+    elif (extractors != None):
+        tuple_extractors = tuple(extractors)
+
+    # Anything that is a single http or https url is downloaded, the rest is taken to be html
+    if (re.match(r"https?://[^\s<>]+$", url_or_html, re.IGNORECASE) != None):
+        tuple_fetched_webpage = portan_webpage._fetch_webpage(url_or_html, 0)
+        portan_webpage._process_fetched_webpage(url_or_html, tuple_fetched_webpage, False, 0, tuple_extractors)
+    else:
+        portan_webpage.process_webpage("N/A" if (base_url == None) else base_url, "N/A", None, url_or_html,\
+            False, tuple_extractors)
+
+    return portan_webpage.get_result()
+
+
+# Register an extractor that analyze() and --extract can run by its name, given the inputs it names, see Portan.register_extractor()
+#   >> portan.register_extractor("title_length", lambda list_html_tags: len(list_html_tags), ("html_tags",))
+def register_extractor(string_name, function_extract, tuple_inputs):
+    Portan().register_extractor(string_name, function_extract, tuple_inputs)
+
+    return None
+
+
+
+# Analyze a chunk of downloaded webpages in a process of the pool started by batch(), returning only what was found
+#   NOTE: defined outside of Portan, so that the processes can find it by name
+def _process_webpage_chunk(list_webpages, bool_keep_plaintext, bool_keep_tags, bool_profile = False, float_cpu_budget = 0.0, tuple_term_settings = None,\
+    tuple_extractors = None):
+    # Should bool_profile be set, the stages are recorded in a profiler of this process, and sent back after the analyses.
+    # The same goes for the terms of the webpages, should tuple_term_settings be given. Only the given extractors, and those
+    # they need, are run should there be any
+    Portan().set_cpu_budget(float_cpu_budget)
+    profiler = None
+    if (bool_profile):
+        profiler = PortanProfiler()
+        Portan().set_profiler(profiler)
+    term_statistics = None
+    if (tuple_term_settings != None):
+        term_statistics = PortanTermStatistics(*tuple_term_settings)
+    Portan().set_term_statistics(term_statistics)
+    Portan().set_near_duplicates(None)
+
+    list_analyses = []
+    for string_url, int_status_code, dict_header_info, bytes_webpage in list_webpages:
+        portan_webpage = Portan()
+        try:
+            string_webpage = portan_webpage._run_stage("decode", lambda: portan_webpage._decode_webpage(bytes_webpage, dict_header_info), len(bytes_webpage))
+            portan_webpage.process_webpage(string_url, int_status_code, dict_header_info, string_webpage, False, tuple_extractors)
+        except UnicodeDecodeError as error:
+            list_analyses.append({"error": str(error)})
+            continue
+
+        # The tags and the plaintext are the largest part of the analysis, so they are only sent back when needed
+        dict_analysis = portan_webpage._get_analysis()
+        if (not bool_keep_plaintext):
+            dict_analysis["plaintext"] = None
+        if (not bool_keep_tags):
+            dict_analysis["html_tags"] = None
+        list_analyses.append(dict_analysis)
+
+    dict_stages = None
+    if (profiler != None):
+        Portan().set_profiler(None)
+        dict_stages = profiler.get_stages()
+    dict_term_totals = None
+    if (term_statistics != None):
+        Portan().set_term_statistics(None)
+        dict_term_totals = term_statistics.get_totals()
+
+    return list_analyses, dict_stages, dict_term_totals
+
+
+
+# Leave Ctrl+C to the program that started the processes of --workers, which stops them once it is done
+def _ignore_interrupts():
+    import signal
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    return None
+
+
 
 # Main function which controls the execution of the program
 def main():
     # Create the portan object, and pass the relevant switches
     list_to_pass = list(sys.argv)
-    portan = Portan(list_to_pass)
+    portan = Portan()
+    portan.run_commandline(list_to_pass)
     
     return None
 
 
-# Run the main function
-main()
+# Run the main function, but only when run as a program rather than imported
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1041 @@
+#! python3
+#! /usr/bin/python3
+# -*- Mode: Python; coding: utf-8; indent-tabs-mode: t; c-basic-offset: 4; tab-width: 4 -*-
+#
+# test_portan.py
+# Copyright (C) 2020 Benrick Smit <metatronicprogramming@hotmail.com>
+#
+# Portan is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Portan is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Regression tests, run with
+#   >> python -m unittest discover tests
+
+import contextlib
+import glob
+import gzip
+import http.server
+import io
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import threading
+import unittest
+import unittest.mock
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Portan is found next to the tests directory, in source/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source"))
+import portan
+
+
+# Analyze the html files of a directory as --local does, returning the Portan object of every webpage by its file name
+def analyze_local_files(dict_files):
+    dict_webpages = {}
+    with tempfile.TemporaryDirectory() as string_directory:
+        for string_file_name, bytes_webpage in dict_files.items():
+            with open(os.path.join(string_directory, string_file_name), "wb") as file_webpage:
+                file_webpage.write(bytes_webpage)
+
+        portan.Portan().analyze_local(string_directory, False, None,\
+            lambda portan_webpage: dict_webpages.__setitem__(os.path.basename(portan_webpage.get_result().url), portan_webpage))
+
+    return dict_webpages
+
+
+# Run portan.py with the arguments in a process of its own, as the shared settings of the commandline stay set once it is done,
+# returning what it wrote to stdout
+def run_portan(list_arguments):
+    string_portan_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "source", "portan.py")
+    completed_process = subprocess.run([sys.executable, string_portan_file] + list_arguments, capture_output=True, text=True, timeout=120)
+    if (completed_process.returncode != 0):
+        raise AssertionError(completed_process.stderr)
+
+    return completed_process.stdout
+
+
+# Serve webpages from 127.0.0.1 while in the with block, yielding the url of the server and a list of the requests it was sent.
+# The webpages are given as the body and the headers to send by path, and a webpage is answered with 304 Not Modified
+# should its ETag or Last-Modified be asked about
+@contextlib.contextmanager
+def serve_webpages(dict_webpages):
+    list_requests = []
+
+    class WebpageHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            list_requests.append((self.path, dict(self.headers)))
+            if (self.path not in dict_webpages):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+
+            bytes_body, dict_headers = dict_webpages[self.path]
+            bool_not_modified = ((self.headers["If-None-Match"] != None) and (self.headers["If-None-Match"] == dict_headers.get("ETag"))) or\
+                ((self.headers["If-Modified-Since"] != None) and (self.headers["If-Modified-Since"] == dict_headers.get("Last-Modified")))
+            self.send_response(304 if (bool_not_modified) else 200)
+            for string_header_name, string_header_value in dict_headers.items():
+                self.send_header(string_header_name, string_header_value)
+            self.send_header("Content-Length", "0" if (bool_not_modified) else str(len(bytes_body)))
+            self.end_headers()
+            if (not bool_not_modified):
+                self.wfile.write(bytes_body)
+
+            return None
+
+        def log_message(self, *tuple_arguments):
+            return None
+
+    # Connections cut off by the client, as by --max-bytes, are not worth a traceback
+    http_server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), WebpageHandler)
+    http_server.handle_error = lambda *tuple_arguments: None
+    thread_server = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread_server.start()
+    try:
+        yield "http://127.0.0.1:" + str(http_server.server_address[1]), list_requests
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+
+    return None
+
+
+# Answer requests with the PortanServer on the address while in the with block, yielding the HTTP server it created
+@contextlib.contextmanager
+def run_portan_server(portan_server, string_address):
+    http_server = portan_server._create_server(string_address)
+    thread_server = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread_server.start()
+    try:
+        yield http_server
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+        portan_server.close()
+
+    return None
+
+
+# Wait until the function returns True, for at most five seconds
+def wait_until(function_condition):
+    float_deadline = time.monotonic() + 5
+    while (not function_condition()) and (time.monotonic() < float_deadline):
+        time.sleep(0.01)
+
+    return function_condition()
+
+
+class TestCharset(unittest.TestCase):
+    # Codecs that are not text encodings are decoded as UTF-8, rather than stopping the whole run
+    def test_non_text_codecs(self):
+        dict_files = {}
+        for string_codec in ("hex", "base64", "zlib", "rot13", "bogus"):
+            dict_files[string_codec + ".html"] = ("<html><head><meta charset=\"" + string_codec + "\"></head>" +\
+                "<body>café <a href=\"mailto:jane@example.com\">Jane</a></body></html>").encode("utf-8")
+
+        dict_webpages = analyze_local_files(dict_files)
+        self.assertEqual(sorted(dict_webpages), sorted(dict_files))
+        for portan_webpage in dict_webpages.values():
+            self.assertEqual(portan_webpage.get_result().emails, ("jane@example.com",))
+            self.assertIn("café", portan_webpage.get_result().plaintext)
+
+        return None
+
+
+    # UTF-16 and UTF-32 named by a <meta> are taken to be UTF-8, as the <meta> could be read as ASCII
+    def test_meta_utf16(self):
+        dict_webpages = analyze_local_files({"utf16.html": "<meta charset=\"utf-16\"><p>café</p>".encode("utf-8")})
+        self.assertIn("café", dict_webpages["utf16.html"].get_result().plaintext)
+
+        return None
+
+
+class TestExtractors(unittest.TestCase):
+    # The emails written so that only people can read them are found whether or not the plaintext is extracted as well
+    def test_obfuscated_emails_alone(self):
+        string_html = "<p>Write to jane [at] example [dot] com or <a href=\"mailto:joe@example.com\">Joe</a></p>"
+        tuple_emails = portan.analyze(string_html, ("emails",)).emails
+        self.assertIn("jane@example.com", tuple_emails)
+        self.assertEqual(sorted(tuple_emails), sorted(portan.analyze(string_html).emails))
+
+        return None
+
+
+    # The extractors can be given by keyword, and a single one by its name
+    def test_analyze_extractors_keyword(self):
+        string_html = "<p>jane@example.com <a href=\"https://example.com/\">Example</a></p>"
+        for value_extractors in (("emails",), ["emails"], "emails"):
+            page_result = portan.analyze(string_html, extractors=value_extractors, base_url="https://example.com/")
+            self.assertEqual(page_result.emails, ("jane@example.com",))
+            self.assertEqual(page_result.hyperlinks, None)
+
+        return None
+
+
+class TestScanners(unittest.TestCase):
+    # The regexes the scanners replaced, which backtracked over their lazy groups and so took quadratic time
+    old_email_regex = re.compile(r"""(?P<full_email>
+        (?![@.,%&#\-\/*{}])
+        ([a-zA-Z0-9\u00a1-\uffff.!#$%&’*+\/=?\^_`\{\|\}~\-]+)
+        @
+        ([a-zA-Z0-9\u00a1-\uffff\-]+)
+        (\.[a-zA-Z0-9\-]+)+
+        )""", re.VERBOSE)
+    old_hyperlink_regex = re.compile(r"""(?P<full_url>
+        (?![@.,%&#\-]+)
+        (?P<protocol>(http|https)\://)
+        ([a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,$+_~]+?)
+        (\.[a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,$+_~]+?)
+        (\.[a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,$+_~]+?)
+        (?![@])
+        (?(protocol)((:\d)+))?
+        ([a-zA-Z0-9\u00a1-\uffff?\-=#:;%@&.,\/$+_~]+)
+        (?![.,?!\-])
+        )""", re.VERBOSE | re.UNICODE)
+    old_image_regex = re.compile(r"""(?P<image_hyperlinks>
+        (.+?.jpg)|(.+?.jpeg)|(.+?.gif)|(.+?.png)|(.+?.tiff)|(.+?.jpg)|(.+?.bmp)
+        )""", re.VERBOSE | re.UNICODE | re.IGNORECASE)
+
+
+    # The scanners find exactly what the regexes found on every webpage of the benchmark corpus
+    def test_scanners_match_regexes(self):
+        portan_webpage = portan.Portan()
+        list_corpus_files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark", "corpus", "*")))
+        self.assertGreater(len(list_corpus_files), 0)
+        for string_corpus_file in list_corpus_files:
+            with open(string_corpus_file, "rb") as file_webpage:
+                bytes_webpage = file_webpage.read()
+            if (string_corpus_file.endswith(".gz")):
+                bytes_webpage = gzip.decompress(bytes_webpage)
+            string_webpage = bytes_webpage.decode("utf-8", "replace").replace("\n", " ")
+
+            list_hyperlinks = [tuple_match[0] for tuple_match in self.old_hyperlink_regex.findall(string_webpage)]
+            self.assertEqual(portan_webpage._scan_hyperlinks(string_webpage), list_hyperlinks, string_corpus_file)
+            self.assertEqual(portan_webpage._scan_emails(string_webpage, False),\
+                [tuple_match[0] for tuple_match in self.old_email_regex.findall(string_webpage)], string_corpus_file)
+            self.assertEqual(portan_webpage._scan_images(list_hyperlinks),\
+                [tuple_match[0] for tuple_match in self.old_image_regex.findall("\n".join(list_hyperlinks))], string_corpus_file)
+
+        return None
+
+
+class TestCpuBudget(unittest.TestCase):
+    # A webpage that uses up its CPU budget keeps the stage it was stopped in, and is not analyzed any further
+    def test_near_zero_budget(self):
+        portan_webpage = portan.Portan()
+        portan_webpage.set_cpu_budget(1e-9)
+        try:
+            portan_webpage.process_webpage("https://example.com/", 200, None, "<p>jane@example.com https://www.example.com/a.png</p>" * 1000)
+        finally:
+            portan_webpage.set_cpu_budget(0)
+        self.assertIsNotNone(portan_webpage.get_record()["cpu_budget_stage"])
+
+        return None
+
+
+    # --cpu-budget reports the webpages it stopped, and where
+    def test_cpu_budget_reported(self):
+        string_webpage_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark", "corpus", "pathological.html")
+        with contextlib.redirect_stdout(io.StringIO()) as file_output:
+            try:
+                portan.Portan(["portan.py", "--local", string_webpage_file, "--cpu-budget", "1"])
+            finally:
+                portan.Portan().set_cpu_budget(0)
+        self.assertRegex(file_output.getvalue(), r"Error: file://\S*pathological\.html: used up its CPU budget of 1 ms in the \w+ stage")
+
+        return None
+
+
+class TestEmails(unittest.TestCase):
+    # An email is found from its @, with at most 64 characters of name before it and 255 of domain after it
+    def test_bounded_windows(self):
+        portan_webpage = portan.Portan()
+        self.assertEqual(portan_webpage._scan_emails("}@font-face a.b@c.org, " + "n" * 64 + "@long.com " + "m" * 65 + "@long.com"),\
+            ["a.b@c.org", "n" * 64 + "@long.com"])
+        self.assertEqual(portan_webpage._scan_emails("a@" + "b" * 250 + ".com a@" + "c" * 260 + ".com"), ["a@" + "b" * 250 + ".com"])
+
+        return None
+
+
+    # The percent-encoded addresses of a mailto: hyperlink are found, but not its subject
+    def test_mailto(self):
+        portan_webpage = portan.Portan()
+        self.assertEqual(portan_webpage._scan_mailto_emails("<a href=\"mailto:jane%40example.com,joe%40example.org?subject=Hi%40there\">"),\
+            ["jane@example.com", "joe@example.org"])
+
+        return None
+
+
+    # The emails written for people to read are found, but not a sentence that only looks like one
+    def test_obfuscated(self):
+        portan_webpage = portan.Portan()
+        self.assertEqual(portan_webpage._scan_obfuscated_emails("jane [at] example [dot] com, joe(at)example(dot)org, ann {AT} mail.example.net, " +\
+            "bob&#64;example.com, eve &#x40; example dot com, look [at] page 3.5"),\
+            ["jane@example.com", "joe@example.org", "ann@mail.example.net", "bob@example.com", "eve@example.com"])
+        self.assertEqual(portan.analyze("<p>jane [at] example [dot] com</p><script>joe [at] example [dot] org</script>").emails, ("jane@example.com",))
+
+        return None
+
+
+class TestLocal(unittest.TestCase):
+    # Local html files are read as webpages that were found, so that --index and --near-duplicates take them
+    def test_local_status(self):
+        dict_webpages = analyze_local_files({"page.html": b"<p>zebra crossing</p>"})
+        self.assertEqual(dict_webpages["page.html"].get_result().status_code, 200)
+
+        return None
+
+
+class TestNearDuplicates(unittest.TestCase):
+    # A local file with the same text as one read before is a near-duplicate of it
+    def test_local_near_duplicates(self):
+        bytes_webpage = ("<p>" + " ".join(["word" + str(int_word) for int_word in range(200)]) + "</p>").encode("utf-8")
+        portan.Portan().set_near_duplicates(portan.PortanNearDuplicates())
+        try:
+            dict_webpages = analyze_local_files({"a.html": bytes_webpage, "b.html": bytes_webpage})
+        finally:
+            portan.Portan().set_near_duplicates(None)
+        self.assertNotIn("near_duplicate_of", dict_webpages["a.html"].get_record())
+        self.assertTrue(dict_webpages["b.html"].get_record()["near_duplicate_of"].endswith("/a.html"))
+
+        return None
+
+
+class TestKeywordSearch(unittest.TestCase):
+    # Strings that only differ in case are searched for once, and found whatever their case in the text
+    def test_terms_differing_in_case(self):
+        keyword_search = portan.PortanKeywordSearch(["ab", "AB", "abc"])
+        self.assertEqual(keyword_search.get_terms(), ["ab", "abc"])
+        self.assertEqual([string_term for string_term, string_occurrence in keyword_search.find("x AB y abc")], ["ab", "ab", "abc"])
+
+        return None
+
+
+class TestHttpCache(unittest.TestCase):
+    # Analyze the url with the cache in the directory, returning the emails found
+    def get_emails(self, string_directory, string_url, int_ttl_seconds = 0, int_max_bytes = 0):
+        portan_webpage = portan.Portan()
+        portan_webpage.set_http_cache(portan.PortanHttpCache(string_directory, int_ttl_seconds=int_ttl_seconds))
+        try:
+            portan_webpage.get(string_url, False, int_max_bytes)
+        finally:
+            portan_webpage.set_http_cache(None)
+
+        return portan_webpage.get_result().emails
+
+
+    # A webpage with an ETag is asked for with If-None-Match, and its cached analysis is used once the server answers 304
+    def test_etag_revalidation(self):
+        dict_webpages = {"/": (b"<p>jane@example.com</p>", {"ETag": "\"v1\""})}
+        with tempfile.TemporaryDirectory() as string_directory, serve_webpages(dict_webpages) as (string_url, list_requests):
+            self.assertEqual(self.get_emails(string_directory, string_url + "/"), ("jane@example.com",))
+            self.assertEqual(self.get_emails(string_directory, string_url + "/"), ("jane@example.com",))
+            self.assertEqual(list_requests[1][1].get("If-None-Match"), "\"v1\"")
+
+            # Once the webpage changes, the server sends it again, and it is analyzed again
+            dict_webpages["/"] = (b"<p>joe@example.com</p>", {"ETag": "\"v2\""})
+            self.assertEqual(self.get_emails(string_directory, string_url + "/"), ("joe@example.com",))
+            self.assertEqual(self.get_emails(string_directory, string_url + "/"), ("joe@example.com",))
+            self.assertEqual(list_requests[3][1].get("If-None-Match"), "\"v2\"")
+
+        return None
+
+
+    # A webpage with a Last-Modified is asked for with If-Modified-Since, and its cached analysis is used once the server answers 304
+    def test_last_modified_revalidation(self):
+        string_last_modified = "Sun, 18 Oct 2026 12:00:00 GMT"
+        dict_webpages = {"/": (b"<p>jane@example.com</p>", {"Last-Modified": string_last_modified})}
+        with tempfile.TemporaryDirectory() as string_directory, serve_webpages(dict_webpages) as (string_url, list_requests):
+            self.assertEqual(self.get_emails(string_directory, string_url + "/"), ("jane@example.com",))
+            self.assertEqual(self.get_emails(string_directory, string_url + "/"), ("jane@example.com",))
+            self.assertEqual(list_requests[1][1].get("If-Modified-Since"), string_last_modified)
+            self.assertNotIn("If-None-Match", list_requests[1][1])
+
+        return None
+
+
+    # A webpage cached less than the ttl ago is used without asking the server at all
+    def test_fresh_entry(self):
+        with tempfile.TemporaryDirectory() as string_directory,\
+            serve_webpages({"/": (b"<p>jane@example.com</p>", {"ETag": "\"v1\""})}) as (string_url, list_requests):
+            self.assertEqual(self.get_emails(string_directory, string_url + "/", 600), ("jane@example.com",))
+            self.assertEqual(self.get_emails(string_directory, string_url + "/", 600), ("jane@example.com",))
+            self.assertEqual(len(list_requests), 1)
+
+        return None
+
+
+    # A webpage cut off by --max-bytes is not cached, so it is downloaded in full again rather than revalidated
+    def test_truncated_body(self):
+        dict_webpages = {"/": (b"<p>jane@example.com</p>" + b" " * 4096, {"ETag": "\"v1\""})}
+        with tempfile.TemporaryDirectory() as string_directory, serve_webpages(dict_webpages) as (string_url, list_requests):
+            self.assertEqual(self.get_emails(string_directory, string_url + "/", int_max_bytes=1024), ("jane@example.com",))
+            self.assertEqual(portan.PortanHttpCache(string_directory).lookup(string_url + "/"), None)
+            self.assertEqual(self.get_emails(string_directory, string_url + "/"), ("jane@example.com",))
+            self.assertNotIn("If-None-Match", list_requests[-1][1])
+            self.assertNotEqual(portan.PortanHttpCache(string_directory).lookup(string_url + "/"), None)
+            self.assertEqual([string_file for string_file in os.listdir(string_directory) if (string_file.endswith(".tmp"))], [])
+
+        return None
+
+
+    # The body of a webpage cut off while streaming is removed from the cache directory rather than kept
+    def test_truncated_stream(self):
+        with tempfile.TemporaryDirectory() as string_directory,\
+            serve_webpages({"/": (b"<p>jane@example.com</p>" + b" " * 4096, {"ETag": "\"v1\""})}) as (string_url, list_requests):
+            portan_webpage = portan.Portan()
+            portan_webpage.set_http_cache(portan.PortanHttpCache(string_directory))
+            try:
+                portan_webpage.get_streamed(string_url + "/", False, 256, 1024)
+            finally:
+                portan_webpage.set_http_cache(None)
+            self.assertEqual(portan_webpage.get_result().emails, ("jane@example.com",))
+            self.assertEqual(portan.PortanHttpCache(string_directory).lookup(string_url + "/"), None)
+            self.assertEqual(os.listdir(string_directory), [])
+
+        return None
+
+
+class TestStream(unittest.TestCase):
+    # A webpage analyzed chunk by chunk has the same emails, hyperlinks, and images, in the same order, as when analyzed at once
+    def test_stream_order(self):
+        string_html = "<p>b@example.com <a href=\"mailto:c%40example.com\">c</a> a [at] example [dot] com</p>" +\
+            "<a href=\"/z.png\">z</a> https://example.com/y.gif <img src=\"/x.jpg\"> d@example.com " * 50
+        bytes_html = string_html.encode("utf-8")
+        portan_webpage = portan.Portan()
+        portan_webpage.process_webpage("https://example.com/", 200, None, string_html)
+        portan_stream = portan.Portan()
+        portan_stream.process_webpage_stream("https://example.com/", 200, None,\
+            [bytes_html[int_start:int_start + 256] for int_start in range(0, len(bytes_html), 256)])
+        for string_list in ("emails", "hyperlinks", "images"):
+            self.assertEqual(getattr(portan_stream.get_result(), string_list), getattr(portan_webpage.get_result(), string_list))
+
+        return None
+
+
+    # Only the given extractors, and those they need, are run while streaming, and a partial analysis is not cached
+    def test_stream_extractors(self):
+        bytes_html = b"<p>jane@example.com <a href=\"/page\">page</a> <img src=\"/x.jpg\"></p>" * 100
+        portan_stream = portan.Portan()
+        portan_stream.process_webpage_stream("https://example.com/", 200, None, [bytes_html], tuple_extractors=("emails",))
+        page_result = portan_stream.get_result()
+        self.assertEqual(page_result.emails, ("jane@example.com",))
+        self.assertEqual((page_result.hyperlinks, page_result.images, page_result.html_tags, page_result.plaintext), (None, None, None, None))
+        self.assertEqual(portan_stream.get_record()["num_html_tags"], 0)
+
+        with tempfile.TemporaryDirectory() as string_directory, serve_webpages({"/": (bytes_html, {"ETag": "\"1\""})}) as (string_url, list_requests):
+            http_cache = portan.PortanHttpCache(string_directory)
+            portan_stream.set_http_cache(http_cache)
+            try:
+                portan_stream.get_streamed(string_url + "/", tuple_extractors=("emails",))
+                self.assertEqual(portan_stream.get_result().emails, ("jane@example.com",))
+                self.assertEqual(http_cache.lookup(string_url + "/"), None)
+                portan_stream.get_streamed(string_url + "/")
+                self.assertEqual(http_cache.lookup(string_url + "/")["analysis"]["num_hyperlinks"], 1)
+            finally:
+                portan_stream.set_http_cache(None)
+
+        return None
+
+
+    # The other extractors are run on what was found while streaming
+    def test_stream_registered_extractor(self):
+        portan_stream = portan.Portan()
+        portan_stream.process_webpage_stream("https://example.com/", 200, None,\
+            [b"<html><head><link rel=\"canonical\" href=\"https://example.com/a\"></head><body>a</body></html>"], tuple_extractors=("canonical",))
+        self.assertEqual(portan_stream.get_result().extracted, {"canonical": "https://example.com/a"})
+        self.assertEqual(portan_stream.get_result().html_tags, None)
+
+        return None
+
+
+class TestBatch(unittest.TestCase):
+    # Every webpage of a batch is analyzed on a thread of the pool, rather than on the thread of the event loop
+    def test_batch_analyzes_on_threads(self):
+        dict_webpages = {"/" + str(int_page): (("<p>page" + str(int_page) + "@example.com</p>").encode("utf-8"), {}) for int_page in range(8)}
+        list_analysis_threads = []
+        function_process = portan.Portan._process_fetched_webpage
+        def process_fetched_webpage(portan_webpage, *tuple_arguments):
+            list_analysis_threads.append(threading.get_ident())
+            return function_process(portan_webpage, *tuple_arguments)
+
+        dict_emails = {}
+        with serve_webpages(dict_webpages) as (string_url, list_requests),\
+            unittest.mock.patch.object(portan.Portan, "_process_fetched_webpage", process_fetched_webpage):
+            portan.Portan().batch([string_url + string_path for string_path in dict_webpages], 4, False, None,\
+                lambda portan_webpage: dict_emails.__setitem__(portan_webpage.get_result().url, portan_webpage.get_result().emails))
+        self.assertEqual(dict_emails, {string_url + string_path: ("page" + string_path[1:] + "@example.com",) for string_path in dict_webpages})
+        self.assertEqual(len(list_analysis_threads), 8)
+        self.assertNotIn(threading.get_ident(), list_analysis_threads)
+
+        return None
+
+
+class TestServer(unittest.TestCase):
+    # A request that finds every analysis taken and the queue full is answered with 503 and Retry-After, rather than waiting
+    def test_queue_full(self):
+        portan_server = portan.PortanServer(1, 1)
+        event_release = threading.Event()
+        def analyze_webpage(portan_server, string_url, string_html, tuple_extractors):
+            event_release.wait(5)
+            return 200, {"html": string_html}
+
+        with unittest.mock.patch.object(portan.PortanServer, "_analyze_webpage", analyze_webpage),\
+            run_portan_server(portan_server, "127.0.0.1:0") as http_server:
+            list_responses = []
+            list_threads = [threading.Thread(target=lambda: list_responses.append(portan_server.analyze({"html": "a"})))]
+            list_threads[0].start()
+            self.assertTrue(wait_until(lambda: portan_server.get_health()["active"] == 1))
+            list_threads.append(threading.Thread(target=lambda: list_responses.append(portan_server.analyze({"html": "b"}))))
+            list_threads[1].start()
+            self.assertTrue(wait_until(lambda: portan_server.get_health()["waiting"] == 1))
+
+            self.assertEqual(portan_server.analyze({"html": "c"})[0], 503)
+            with self.assertRaises(urllib.error.HTTPError) as context_error:
+                urllib.request.urlopen("http://127.0.0.1:" + str(http_server.server_address[1]) + "/analyze?html=d", timeout=5)
+            self.assertEqual(context_error.exception.code, 503)
+            self.assertEqual(context_error.exception.headers["Retry-After"], "1")
+            context_error.exception.close()
+
+            event_release.set()
+            for thread_request in list_threads:
+                thread_request.join(5)
+        self.assertEqual(sorted([dict_response["html"] for int_status, dict_response in list_responses if (int_status == 200)]), ["a", "b"])
+
+        return None
+
+
+    # /health shows the requests answered before it, and /metrics counts them by status code, the /health request among them
+    def test_health_and_metrics(self):
+        portan_server = portan.PortanServer(2, 4)
+        with run_portan_server(portan_server, "127.0.0.1:0") as http_server:
+            string_server_url = "http://127.0.0.1:" + str(http_server.server_address[1])
+            with urllib.request.urlopen(string_server_url + "/analyze?html=" + urllib.parse.quote("<p>jane@example.com</p>"), timeout=5) as http_response:
+                self.assertEqual(json.loads(http_response.read())["emails"], ["jane@example.com"])
+            with urllib.request.urlopen(string_server_url + "/health", timeout=5) as http_response:
+                dict_health = json.loads(http_response.read())
+            with urllib.request.urlopen(string_server_url + "/metrics", timeout=5) as http_response:
+                string_content_type = http_response.headers["Content-Type"]
+                string_metrics = http_response.read().decode("utf-8")
+        self.assertEqual((dict_health["status"], dict_health["concurrency"], dict_health["queue_size"]), ("ok", 2, 4))
+        self.assertEqual(dict_health["responses"], {"200": 1})
+        self.assertTrue(string_content_type.startswith("text/plain"))
+        self.assertIn('portan_server_responses_total{code="200"} 2', string_metrics.splitlines())
+        self.assertIn("portan_server_active 0", string_metrics.splitlines())
+
+        return None
+
+
+    # The server answers on a Unix socket as well, which is removed once it is closed
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not supported")
+    def test_unix_socket(self):
+        import http.client
+
+        portan_server = portan.PortanServer()
+        with tempfile.TemporaryDirectory() as string_directory:
+            string_socket_path = os.path.join(string_directory, "portan.sock")
+            with run_portan_server(portan_server, "unix:" + string_socket_path):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as socket_client:
+                    socket_client.settimeout(5)
+                    socket_client.connect(string_socket_path)
+                    socket_client.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+                    http_response = http.client.HTTPResponse(socket_client)
+                    http_response.begin()
+                    self.assertEqual(http_response.status, 200)
+                    self.assertEqual(json.loads(http_response.read())["status"], "ok")
+                    http_response.close()
+            self.assertFalse(os.path.exists(string_socket_path))
+
+        return None
+
+
+class TestCrawl(unittest.TestCase):
+    # The webpages of the crawled website, each linking to the next depth, to itself with a fragment, to an image, and to another host
+    dict_webpages = {"/": (b"<a href=\"/a\">a</a> <a href=\"/a#top\">a</a> <a href=\"/b\">b</a> <a href=\"/logo.png\">logo</a>" +\
+        b" <a href=\"http://other.test/x\">x</a>", {}), "/a": (b"<a href=\"/c\">c</a> <a href=\"/\">home</a>", {}), "/b": (b"<p>b</p>", {}),\
+        "/c": (b"<a href=\"/d\">d</a>", {}), "/d": (b"<p>d</p>", {})}
+
+
+    # Crawl the website with the limits, returning the paths that were downloaded
+    def crawl(self, int_max_depth, int_max_pages):
+        with serve_webpages(self.dict_webpages) as (string_url, list_requests), contextlib.redirect_stdout(io.StringIO()):
+            portan.Portan().crawl(string_url + "/", int_max_depth, int_max_pages, True, 2)
+
+        return [string_path for string_path, dict_headers in list_requests]
+
+
+    # Every webpage within the depth is downloaded once, without the fragments, images, and other hosts
+    def test_depth_limit(self):
+        self.assertEqual(sorted(self.crawl(2, 100)), ["/", "/a", "/b", "/c"])
+        self.assertEqual(sorted(self.crawl(0, 100)), ["/"])
+
+        return None
+
+
+    # No more webpages are downloaded than the page limit allows
+    def test_page_limit(self):
+        self.assertEqual(len(self.crawl(3, 2)), 2)
+
+        return None
+
+
+    # The frontier keeps the urls in order once they no longer fit in memory
+    def test_frontier_overflow(self):
+        crawl_frontier = portan.PortanCrawlFrontier(2)
+        for int_url in range(5):
+            crawl_frontier.push(int_url // 2, "https://example.com/" + str(int_url))
+        self.assertEqual(crawl_frontier.peek_depth(), 0)
+        self.assertEqual([crawl_frontier.pop() for int_url in range(5)], [(int_url // 2, "https://example.com/" + str(int_url)) for int_url in range(5)])
+        self.assertEqual(crawl_frontier.peek_depth(), None)
+        crawl_frontier.close()
+
+        return None
+
+
+class TestSearchIndex(unittest.TestCase):
+    # Only webpages with every word of the query are found, best first, whatever the case of the words. The webpages are as long
+    # as each other, so those with the most giraffes come first
+    def test_search(self):
+        with tempfile.TemporaryDirectory() as string_directory:
+            search_index = portan.PortanSearchIndex(os.path.join(string_directory, "pages.db"))
+            for int_page in range(30):
+                search_index.add("https://example.com/" + str(int_page), "giraffe " * (int_page % 5 + 1) + "filler " * (10 - int_page % 5) +\
+                    ("zebra" if (int_page % 2 == 0) else "lion"))
+            list_hits = search_index.search("Zebra GIRAFFE", 5)
+            self.assertEqual(len(list_hits), 5)
+            self.assertEqual([int(string_url.rpartition("/")[2]) % 2 for string_url, float_score, string_snippet in list_hits], [0] * 5)
+            self.assertEqual([float_score for string_url, float_score, string_snippet in list_hits],\
+                sorted([float_score for string_url, float_score, string_snippet in list_hits], reverse=True))
+            self.assertEqual(int(list_hits[0][0].rpartition("/")[2]) % 5, 4)
+            self.assertIn("giraffe", list_hits[0][2])
+            self.assertEqual(len(search_index.search("zebra giraffe", 100)), 15)
+            self.assertEqual(search_index.search("zebra elephant"), [])
+            search_index.close()
+
+        return None
+
+
+    # A webpage indexed again replaces what was indexed for it before, unless its plaintext did not change, and can be removed
+    def test_replace_and_remove(self):
+        with tempfile.TemporaryDirectory() as string_directory:
+            search_index = portan.PortanSearchIndex(os.path.join(string_directory, "pages.db"))
+            self.assertTrue(search_index.add("https://example.com/", "old zebra"))
+            self.assertFalse(search_index.add("https://example.com/", "old zebra"))
+            self.assertTrue(search_index.add("https://example.com/", "new zebra"))
+            self.assertEqual(search_index.search("old"), [])
+            self.assertEqual([tuple_hit[0] for tuple_hit in search_index.search("new zebra")], ["https://example.com/"])
+            self.assertEqual(search_index.count(), 1)
+            self.assertTrue(search_index.remove("https://example.com/"))
+            self.assertFalse(search_index.remove("https://example.com/"))
+            self.assertEqual(search_index.search("zebra"), [])
+            search_index.close()
+
+        return None
+
+
+    # What was indexed is still there once the index is opened again
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as string_directory:
+            string_index_file = os.path.join(string_directory, "pages.db")
+            search_index = portan.PortanSearchIndex(string_index_file)
+            search_index.add("https://example.com/a", "zebra crossing")
+            search_index.add("https://example.com/b", "pelican crossing")
+            search_index.close()
+
+            search_index = portan.PortanSearchIndex(string_index_file)
+            self.assertEqual(search_index.count(), 2)
+            self.assertEqual([tuple_hit[0] for tuple_hit in search_index.search("pelican")], ["https://example.com/b"])
+            self.assertEqual(len(search_index.search("crossing")), 2)
+            search_index.close()
+
+        return None
+
+
+class TestWorkers(unittest.TestCase):
+    # A chunk analyzed as a process of --workers does finds what process_webpage() finds, together with the stages and the terms
+    def test_process_webpage_chunk(self):
+        string_html = "<p>jane@example.com zebra zebra <a href=\"/a.png\">a</a></p>"
+        portan_webpage = portan.Portan()
+        term_statistics = portan.PortanTermStatistics()
+        portan_webpage.set_term_statistics(term_statistics)
+        try:
+            portan_webpage.process_webpage("https://example.com/", 200, None, string_html)
+        finally:
+            portan_webpage.set_term_statistics(None)
+        list_analyses, dict_stages, dict_term_totals = portan._process_webpage_chunk([("https://example.com/", 200, None,\
+            string_html.encode("utf-8"))], False, False, True, 0.0, portan.PortanTermStatistics().get_settings())
+        for string_list in ("emails", "hyperlinks", "images"):
+            self.assertEqual(list_analyses[0][string_list], portan_webpage._get_analysis()[string_list])
+        self.assertEqual((list_analyses[0]["plaintext"], list_analyses[0]["html_tags"]), (None, None))
+        self.assertIn("hyperlinks", dict_stages)
+        self.assertEqual(dict_term_totals, term_statistics.get_totals())
+
+        return None
+
+
+    # --workers analyzes the webpages of --batch in other processes, finding what is found without them
+    def test_batch_workers(self):
+        dict_webpages = {"/" + str(int_page): (("<p>page" + str(int_page) + "@example.com <a href=\"/" + str(int_page + 1) +\
+            "\">next</a></p>").encode("utf-8"), {}) for int_page in range(20)}
+        dict_emails = {}
+        with tempfile.TemporaryDirectory() as string_directory, serve_webpages(dict_webpages) as (string_url, list_requests):
+            string_url_file = os.path.join(string_directory, "urls.txt")
+            with open(string_url_file, "w") as file_urls:
+                file_urls.write("\n".join([string_url + string_path for string_path in dict_webpages]))
+            for string_workers in ("0", "2"):
+                string_ndjson_file = os.path.join(string_directory, string_workers + ".ndjson")
+                run_portan(["--batch", string_url_file, "--ndjson", string_ndjson_file, "--no-output"] +\
+                    (["--workers", string_workers] if (string_workers != "0") else []))
+                with open(string_ndjson_file, "r", encoding="utf-8") as file_records:
+                    dict_emails[string_workers] = dict([(dict_record["url"], (dict_record["emails"], dict_record["hyperlinks"])) for dict_record in\
+                        map(json.loads, file_records)])
+        self.assertEqual(len(dict_emails["2"]), 20)
+        self.assertEqual(dict_emails["2"], dict_emails["0"])
+
+        return None
+
+
+class TestNdjson(unittest.TestCase):
+    # Every record is a line of json, written once there are enough of them or the writer is closed, appended to what is there
+    def test_write_and_append(self):
+        with tempfile.TemporaryDirectory() as string_directory:
+            string_ndjson_file = os.path.join(string_directory, "records.ndjson")
+            for int_run in range(2):
+                ndjson_writer = portan.PortanNdjsonWriter(string_ndjson_file, False, 2)
+                int_size = os.path.getsize(string_ndjson_file)
+                ndjson_writer.write({"url": "https://example.com/" + str(int_run), "text": "café\nline"})
+                self.assertEqual(os.path.getsize(string_ndjson_file), int_size)
+                ndjson_writer.write({"url": "https://example.com/" + str(int_run), "emails": []})
+                ndjson_writer.close()
+            with open(string_ndjson_file, "r", encoding="utf-8") as file_records:
+                list_lines = file_records.read().splitlines()
+        self.assertEqual(len(list_lines), 4)
+        self.assertEqual(json.loads(list_lines[2]), {"url": "https://example.com/1", "text": "café\nline"})
+
+        return None
+
+
+    # A gzipped file holds one gzip member per run, which are read back as a single stream
+    def test_gzip(self):
+        with tempfile.TemporaryDirectory() as string_directory:
+            string_ndjson_file = os.path.join(string_directory, "records.ndjson.gz")
+            for int_run in range(2):
+                ndjson_writer = portan.PortanNdjsonWriter(string_ndjson_file, True)
+                ndjson_writer.write({"run": int_run})
+                ndjson_writer.close()
+            with gzip.open(string_ndjson_file, "rt", encoding="utf-8") as file_records:
+                self.assertEqual([json.loads(string_line) for string_line in file_records], [{"run": 0}, {"run": 1}])
+
+        return None
+
+
+    # --ndjson writes a record with what was found for every webpage
+    def test_commandline_records(self):
+        with tempfile.TemporaryDirectory() as string_directory:
+            string_webpage_file = os.path.join(string_directory, "page.html")
+            with open(string_webpage_file, "wb") as file_webpage:
+                file_webpage.write(b"<p>jane@example.com <a href=\"https://example.com/a.png\">a</a></p>")
+            string_ndjson_file = os.path.join(string_directory, "records.ndjson")
+            run_portan(["--local", string_webpage_file, "--ndjson", string_ndjson_file, "--no-output"])
+            with open(string_ndjson_file, "r", encoding="utf-8") as file_records:
+                list_records = [json.loads(string_line) for string_line in file_records]
+        self.assertEqual(len(list_records), 1)
+        self.assertEqual((list_records[0]["emails"], list_records[0]["hyperlinks"], list_records[0]["images"]),\
+            (["jane@example.com"], ["https://example.com/a.png"], ["https://example.com/a.png"]))
+        self.assertEqual(list_records[0]["status_code"], 200)
+
+        return None
+
+
+class TestProfiler(unittest.TestCase):
+    # Every stage of a webpage is recorded with its input size and what it found
+    def test_stages(self):
+        profiler = portan.PortanProfiler()
+        portan_webpage = portan.Portan()
+        portan_webpage.set_profiler(profiler)
+        try:
+            for int_page in range(2):
+                portan_webpage.process_webpage("https://example.com/", 200, None, "<p>jane@example.com <a href=\"/a.png\">a</a></p>")
+        finally:
+            portan_webpage.set_profiler(None)
+        dict_stages = profiler.get_stages()
+        self.assertEqual(list(dict_stages)[:3], ["headers", "tags", "text"])
+        self.assertEqual([dict_stages[string_stage]["calls"] for string_stage in ("tags", "hyperlinks", "emails", "images")], [2, 2, 2, 2])
+        self.assertEqual((dict_stages["emails"]["matches"], dict_stages["images"]["matches"], dict_stages["tags"]["matches"]), (2, 2, 8))
+        self.assertEqual(dict_stages["emails"]["input_size"], 2 * len("<p>jane@example.com <a href=\"/a.png\">a</a></p>"))
+
+        return None
+
+
+    # The totals of another profiler, such as one of a process of --workers, are added to the totals of the same stages
+    def test_add_stages(self):
+        profiler = portan.PortanProfiler()
+        profiler.add_stage("fetch", 0.5, 0.1, 100, 1, 10)
+        other_profiler = portan.PortanProfiler()
+        other_profiler.add_stage("fetch", 0.25, 0.1, 50, 2, 30)
+        other_profiler.add_stage("emails", 0.125)
+        profiler.add_stages(other_profiler.get_stages())
+        self.assertEqual(profiler.get_stages()["fetch"], {"calls": 2, "wall_seconds": 0.75, "cpu_seconds": 0.2, "input_size": 150, "matches": 3,\
+            "peak_memory": 30})
+        self.assertEqual(profiler.get_stages()["emails"]["calls"], 1)
+
+        return None
+
+
+    # The stages are shown as a table, json, and the text format of Prometheus
+    def test_formats(self):
+        profiler = portan.PortanProfiler()
+        profiler.add_stage("fetch", 0.5, 0.25, 1000000, 3)
+        self.assertIn("fetch", profiler.format_table())
+        self.assertIn("2.00", profiler.format_table().splitlines()[-1])
+        self.assertEqual(json.loads(profiler.format_json())["stages"]["fetch"]["input_size"], 1000000)
+        self.assertIn('portan_stage_matches_total{stage="fetch"} 3', profiler.format_prometheus().splitlines())
+
+        return None
+
+
+class TestPageResult(unittest.TestCase):
+    # A result has no __dict__, can not be changed, and holds tuples rather than lists
+    def test_immutable(self):
+        page_result = portan.analyze("<p>jane@example.com <a href=\"/a.png\">a</a></p>", base_url="https://example.com/")
+        self.assertFalse(hasattr(page_result, "__dict__"))
+        with self.assertRaises(AttributeError):
+            page_result.emails = ()
+        with self.assertRaises(AttributeError):
+            del page_result.url
+        self.assertEqual((page_result.emails, page_result.images), (("jane@example.com",), ("https://example.com/a.png",)))
+        self.assertEqual(repr(page_result), "PortanPageResult('https://example.com/', status_code=N/A, html_tags=4, plaintext=18, " +\
+            "hyperlinks=1, emails=1, images=1)")
+
+        return None
+
+
+    # The urls and headers of different results are the same string objects, so that many results take little memory
+    def test_interned_strings(self):
+        dict_header_info = {"Content-Type": "text/html; charset=" + "utf-8", "Date": "Sun, 18 Oct 2026 12:00:00 GMT"}
+        tuple_results = tuple([portan.PortanPageResult("https://example.com/" + "page", 200, dict(dict_header_info), None, None,\
+            ["https://example.com/" + "a"], None, None) for int_result in range(2)])
+        self.assertIs(tuple_results[0].url, tuple_results[1].url)
+        self.assertIs(tuple_results[0].content_type, tuple_results[1].content_type)
+        self.assertIs(tuple_results[0].hyperlinks[0], tuple_results[1].hyperlinks[0])
+        self.assertEqual((tuple_results[0].emails, tuple_results[0].html_tags), (None, None))
+
+        return None
+
+
+    # A result is sent between processes by pickle unchanged
+    def test_pickle(self):
+        import pickle
+
+        page_result = portan.analyze("<p>jane@example.com</p>", base_url="https://example.com/")
+        page_copy = pickle.loads(pickle.dumps(page_result))
+        self.assertEqual([getattr(page_copy, string_name) for string_name in portan.PortanPageResult.__slots__],\
+            [getattr(page_result, string_name) for string_name in portan.PortanPageResult.__slots__])
+
+        return None
+
+
+class TestTermStatistics(unittest.TestCase):
+    # The stopwords are counted as words but not as terms, and no n-gram spans them
+    def test_terms_and_ngrams(self):
+        term_statistics = portan.PortanTermStatistics()
+        term_statistics.feed("The zebra crossing and the Zebra crossing of a road", True)
+        dict_totals = term_statistics.get_totals()
+        self.assertEqual(dict_totals["words"], 10)
+        self.assertEqual(dict_totals["terms"], {"zebra": 2, "crossing": 2, "road": 1})
+        self.assertEqual(dict_totals["ngrams"], {"zebra crossing": 2})
+        self.assertEqual(term_statistics.get_top()["terms"][:2], [["zebra", 2], ["crossing", 2]])
+
+        return None
+
+
+    # Text fed in parts, with words split between them, is counted as the same text fed at once
+    def test_feed_in_parts(self):
+        string_text = "zebra crossing pelican crossing " * 20
+        term_statistics = portan.PortanTermStatistics(3)
+        term_statistics.feed(string_text, True)
+        term_statistics_parts = portan.PortanTermStatistics(3)
+        for int_start in range(0, len(string_text), 7):
+            term_statistics_parts.feed(string_text[int_start:int_start + 7])
+        term_statistics_parts.feed("", True)
+        self.assertEqual(term_statistics_parts.get_totals(), term_statistics.get_totals())
+
+        return None
+
+
+    # The totals of single webpages add up to the totals of all of them, counting the webpages every term was found on
+    def test_add_totals(self):
+        term_statistics = portan.PortanTermStatistics()
+        for string_text in ("zebra crossing", "zebra road", "pelican road"):
+            page_statistics = portan.PortanTermStatistics(*term_statistics.get_settings())
+            page_statistics.feed(string_text, True)
+            term_statistics.add_totals(page_statistics.get_totals())
+        dict_totals = term_statistics.get_totals()
+        self.assertEqual((dict_totals["pages"], dict_totals["words"]), (3, 6))
+        self.assertEqual(dict_totals["term_pages"], {"zebra": 2, "crossing": 1, "road": 2, "pelican": 1})
+        self.assertIn("%-32s%-12s%s" % ("zebra", 2, 2), term_statistics.format_table().splitlines())
+
+        return None
+
+
+    # The terms of the plaintext of every webpage analyzed are added to the statistics that were set, but not those of its scripts
+    def test_webpage_terms(self):
+        term_statistics = portan.PortanTermStatistics()
+        portan_webpage = portan.Portan()
+        portan_webpage.set_term_statistics(term_statistics)
+        try:
+            portan_webpage.process_webpage("https://example.com/", 200, None, "<title>Zebra</title> <script>var zebra;</script> <p>zebra crossing</p>")
+        finally:
+            portan_webpage.set_term_statistics(None)
+        self.assertEqual(term_statistics.get_totals()["terms"], {"zebra": 2, "crossing": 1})
+        self.assertEqual(portan_webpage._get_analysis()["terms"]["terms"], {"zebra": 2, "crossing": 1})
+        self.assertEqual(term_statistics.count(), 1)
+
+        return None
+
+
+class TestWatch(unittest.TestCase):
+    # A snapshot stored again returns what was added and removed since, in the order they were found
+    def test_snapshot_changes(self):
+        watch_snapshots = portan.PortanWatchSnapshots()
+        self.assertEqual(watch_snapshots.store("https://example.com/", b"1", None, {"hyperlinks": ["a", "b", "c"], "emails": []}), None)
+        dict_changes = watch_snapshots.store("https://example.com/", b"2", None, {"hyperlinks": ["d", "c", "a", "e"], "emails": []})
+        self.assertEqual(dict_changes, {"added": {"hyperlinks": ["d", "e"], "emails": []}, "removed": {"hyperlinks": ["b"], "emails": []}})
+        self.assertEqual(watch_snapshots.lookup("https://example.com/")["body_hash"], b"2")
+        watch_snapshots.close()
+
+        return None
+
+
+    # A watched webpage is new the first time, unchanged while the server answers 304 or sends the same body, and changed otherwise
+    def test_poll_states(self):
+        dict_webpages = {"/etag": (b"<p>jane@example.com</p>", {"ETag": "\"v1\""}), "/plain": (b"<p>jane@example.com</p>", {})}
+        watch_snapshots = portan.PortanWatchSnapshots()
+        portan_watch = portan.Portan()
+        with serve_webpages(dict_webpages) as (string_url, list_requests):
+            for string_path in ("/etag", "/plain"):
+                self.assertEqual(portan_watch._poll_watched_webpage(string_url + string_path, watch_snapshots, None)[1], "new")
+                self.assertEqual(portan_watch._poll_watched_webpage(string_url + string_path, watch_snapshots, None)[1], "unchanged")
+            self.assertEqual(list_requests[1][0], "/etag")
+            self.assertEqual(list_requests[1][1].get("If-None-Match"), "\"v1\"")
+
+            dict_webpages["/plain"] = (b"<p>joe@example.com</p>", {})
+            string_url_plain, string_state, dict_changes = portan_watch._poll_watched_webpage(string_url + "/plain", watch_snapshots, None)
+        self.assertEqual(string_state, "changed")
+        self.assertEqual((dict_changes["added"]["emails"], dict_changes["removed"]["emails"]), (["joe@example.com"], ["jane@example.com"]))
+        watch_snapshots.close()
+
+        return None
+
+
+class TestRobots(unittest.TestCase):
+    # The longest rule that matches wins, Allow winning a tie, and * and $ match as RFC 9309 has them. The robots.txt is only
+    # downloaded once for all the urls of its host
+    def test_is_allowed(self):
+        dict_webpages = {"/robots.txt": (b"User-agent: *\nDisallow: /private\nAllow: /private/open\nDisallow: /*.pdf$\nAllow: /same\nDisallow: /same\n", {})}
+        robots_rules = portan.PortanRobotsRules()
+        with serve_webpages(dict_webpages) as (string_url, list_requests):
+            self.assertTrue(robots_rules.is_allowed(string_url + "/public"))
+            self.assertFalse(robots_rules.is_allowed(string_url + "/private/page"))
+            self.assertTrue(robots_rules.is_allowed(string_url + "/private/open/page"))
+            self.assertFalse(robots_rules.is_allowed(string_url + "/files/report.pdf"))
+            self.assertTrue(robots_rules.is_allowed(string_url + "/files/report.pdf?page=2"))
+            self.assertTrue(robots_rules.is_allowed(string_url + "/same"))
+        self.assertEqual([string_path for string_path, dict_headers in list_requests], ["/robots.txt"])
+
+        return None
+
+
+    # The group naming Portan is used instead of the one for *, and the sitemaps are listed whichever group they are in
+    def test_own_group_and_sitemaps(self):
+        dict_webpages = {"/robots.txt": (b"User-agent: *\nDisallow: /\n\nUser-agent: Portan/1.0\nDisallow: /private\n\nSitemap: https://site.test/sitemap.xml\n", {})}
+        robots_rules = portan.PortanRobotsRules()
+        with serve_webpages(dict_webpages) as (string_url, list_requests):
+            self.assertTrue(robots_rules.is_allowed(string_url + "/public"))
+            self.assertFalse(robots_rules.is_allowed(string_url + "/private"))
+            self.assertEqual(robots_rules.get_sitemaps(string_url + "/public"), ["https://site.test/sitemap.xml"])
+
+        return None
+
+
+    # A missing robots.txt allows everything
+    def test_missing_robots(self):
+        robots_rules = portan.PortanRobotsRules()
+        with serve_webpages({}) as (string_url, list_requests):
+            self.assertTrue(robots_rules.is_allowed(string_url + "/private"))
+            self.assertEqual(robots_rules.get_sitemaps(string_url + "/"), [])
+
+        return None
+
+
+class TestSitemap(unittest.TestCase):
+    # The sitemaps of the robots.txt are read, an index leading to the sitemaps it lists, gzipped or not, and only the urls the
+    # robots.txt allows are returned
+    def test_discover(self):
+        dict_webpages = {}
+        with serve_webpages(dict_webpages) as (string_url, list_requests):
+            dict_webpages["/robots.txt"] = (("User-agent: *\nDisallow: /private\nSitemap: " + string_url + "/index.xml\n").encode("utf-8"), {})
+            dict_webpages["/index.xml"] = (("<?xml version=\"1.0\"?><sitemapindex xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">"
+                "<sitemap><loc>" + string_url + "/a.xml</loc></sitemap><sitemap><loc>" + string_url + "/b.xml.gz</loc></sitemap>"
+                "<sitemap><loc>" + string_url + "/a.xml</loc></sitemap></sitemapindex>").encode("utf-8"), {})
+            dict_webpages["/a.xml"] = (("<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\"><url><loc>" + string_url + "/public/1</loc></url>"
+                "<url><loc>" + string_url + "/private/2</loc></url></urlset>").encode("utf-8"), {})
+            dict_webpages["/b.xml.gz"] = (gzip.compress(("<urlset><url><loc>" + string_url + "/public/3</loc></url></urlset>").encode("utf-8")), {})
+
+            list_urls = list(portan.Portan().discover(string_url + "/"))
+            self.assertEqual(list_urls, [string_url + "/public/1", string_url + "/public/3"])
+            self.assertEqual(sorted(string_path for string_path, dict_headers in list_requests), ["/a.xml", "/b.xml.gz", "/index.xml", "/robots.txt"])
+
+        return None
+
+
+    # Without a sitemap in the robots.txt, /sitemap.xml is read, and a plain text sitemap lists a url per line
+    def test_default_and_plain_text(self):
+        dict_webpages = {}
+        with serve_webpages(dict_webpages) as (string_url, list_requests):
+            dict_webpages["/sitemap.xml"] = ((string_url + "/one\n\n" + string_url + "/two\n").encode("utf-8"), {})
+            self.assertEqual(list(portan.Portan().discover(string_url + "/")), [string_url + "/one", string_url + "/two"])
+
+        return None
+
+
+class TestHyperlinks(unittest.TestCase):
+    # An attribute on a line of its own is still an attribute of its tag, and is resolved against the base url
+    def test_href_on_new_line(self):
+        page_result = portan.analyze("<html><body><a\nhref=\"/x\">x</a><a\n  href=\n\"y\">y</a></body></html>", base_url="https://site.test/dir/")
+        self.assertEqual(page_result.hyperlinks, ("https://site.test/x", "https://site.test/dir/y"))
+
+        return None
+
+
+    # The same attribute on a new line is found while streaming as well
+    def test_href_on_new_line_stream(self):
+        portan_stream = portan.Portan()
+        portan_stream.process_webpage_stream("https://site.test/dir/", 200, None, [b"<a\nhref=\"/x\">x</a>"])
+        self.assertEqual(portan_stream.get_result().hyperlinks, ("https://site.test/x",))
+
+        return None
+
+
+# Run the tests, but only when run as a program rather than imported
+if __name__ == "__main__":
+    unittest.main()